@@ -2,103 +2,437 @@ import sys
 import os
 import tempfile
 import shutil
-from PySide6.QtWidgets import QApplication, QMainWindow
-from PySide6.QtGui import QPixmap, QImage
-from PySide6.QtCore import Qt, Signal
+import subprocess
+import threading
+import multiprocessing
+from bisect import bisect_right
+from functools import partial
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QFileDialog, QVBoxLayout, QHBoxLayout, 
     QLabel, QPushButton, QWidget, QScrollArea, QGridLayout, QComboBox,
     QCheckBox, QSpinBox, QFrame, QMessageBox, QDialog, QGroupBox,
-    QRadioButton, QButtonGroup  )
-
-from PySide6.QtGui import QPixmap, QImage
+    QRadioButton, QButtonGroup, QProgressDialog, QLineEdit  )
+from PySide6.QtGui import QPixmap, QImage, QIcon, QKeySequence, QShortcut
 from PySide6.QtCore import Qt, QSize, QThread, Signal
-from PySide6.QtGui import QIcon
-import fitz 
-from pptx import Presentation
-import win32com.client  
-import comtypes.client
-import subprocess
-import threading
-from PIL import ImageDraw
+from PySide6.QtPrintSupport import QPrinter, QPrintDialog
+
+import docsplit_cache
+import docsplit_scheduler
+import docsplit_jobs
+import docsplit_selection
+import docsplit_convert
+import docsplit_trace
+import docsplit_workspace
+import docsplit_exports
+import docsplit_split
+from docsplit_grid import ThumbnailView
+from docsplit_exportpanel import ExportPanel
+from docsplit_overlay import PerfOverlay, format_bytes
+
+# 依賴 PyMuPDF 與 NumPy 的模組在第一次開檔時才載入（load_document_backends），
+# 視窗不必等待；Office 自動化（win32com/comtypes）只在轉換行程中載入
+fitz = None
+docsplit_core = docsplit_render = docsplit_impose = docsplit_print = None
+docsplit_index = docsplit_dedupe = docsplit_pptx = docsplit_optimize = None
+
+
+def load_document_backends():
+    """載入文件處理模組，已載入時直接返回"""
+    global fitz, docsplit_core, docsplit_render, docsplit_impose, docsplit_print
+    global docsplit_index, docsplit_dedupe, docsplit_pptx, docsplit_optimize
+    if fitz is not None:
+        return
+    with docsplit_trace.span("load_document_backends"):
+        import docsplit_core
+        import docsplit_render
+        import docsplit_impose
+        import docsplit_print
+        import docsplit_index
+        import docsplit_dedupe
+        import docsplit_pptx
+        import docsplit_optimize
+        # 最後才設定 fitz，其他執行緒看到 fitz 時其餘模組皆已就緒
+        import fitz
 
 
 class ThumbnailWorker(QThread):
-    thumbnail_ready = Signal(int, QPixmap)
+    # (QImage, 緩衝區擁有者)：QImage 直接指向渲染結果的記憶體，
+    # 擁有者須存活到介面執行緒建立 QPixmap 為止
+    thumbnail_ready = Signal(int, object)
+    page_count_ready = Signal(int)
+    # (第一頁的全域頁碼, [(寬, 高)])：渲染前送出，縮圖格先以頁面比例顯示佔位
+    page_sizes_ready = Signal(int, object)
     finished = Signal()
     
-    def __init__(self, file_path, num_pages):
+    # 一次渲染多份文件時，同時保持開啟（含渲染行程池）的文件數
+    MAX_OPEN_RENDERERS = 2
+    # 渲染佇列清空超過此秒數即關閉渲染器並結束行程池，之後有頁面要渲染時再建立
+    IDLE_CLOSE_SECONDS = 5.0
+    
+    def __init__(self, file_path, num_pages, cache=None, workers=1, target_size=(200, 150), token=None,
+                 hashes=None, documents=None, exit_when_idle=False):
         super().__init__()
-        self.file_path = file_path
+        load_document_backends()
+        # file_path 可為 PDF 路徑列表（多份文件的頁碼依序相接）；之後加入工作區的文件
+        # 由 add_sources 交給同一個工作，sources 為工作執行緒已開啟的文件
+        incoming = [file_path] if isinstance(file_path, str) else list(file_path)
+        self.file_path = incoming[0]
+        self.sources = []
+        self._incoming = incoming
+        self._sources_lock = threading.Lock()
         self.num_pages = num_pages
-        self.is_ppt = file_path.lower().endswith(('.ppt', '.pptx'))
+        self.is_ppt = self.file_path.lower().endswith(('.ppt', '.pptx'))
+        self.cache = cache
+        # 縮圖的最終像素尺寸（已乘上裝置像素比），直接以此大小渲染
+        self.target_size = target_size
+        self.cache_variant = f"{target_size[0]}x{target_size[1]}"
+        # PDF 渲染行程數，1 表示在此執行緒內逐頁渲染
+        self.workers = workers
+        # 可見頁面優先，其次預取視窗，其餘在背景補齊
+        self.scheduler = docsplit_scheduler.RenderScheduler()
+        # 每批取出的頁數；批次越小，捲動後重新排序越快生效
+        self.batch_size = 1 if workers == 1 else workers * 2
+        # 取消後盡快結束，並釋放 COM、暫存目錄與渲染行程
+        self.token = token or docsplit_jobs.CancelToken()
+        self.generation = self.token.generation
+        self.token.on_cancel(self.scheduler.stop)
+        # 由縮圖順便計算的每頁感知雜湊（docsplit_dedupe.PageHashes），供重複頁偵測
+        self.hashes = hashes
+        # docsplit_workspace.DocumentPool，在此執行緒渲染時使用池中的文件
+        self.documents = documents
+        # True 時渲染佇列清空即結束執行緒（批次渲染）；否則閒置等待捲動與重新渲染要求
+        self.exit_when_idle = exit_when_idle
+        
+    def add_sources(self, paths):
+        """將 PDF 接在目前的頁面之後，由工作執行緒開啟後排入渲染，可由任何執行緒呼叫"""
+        with self._sources_lock:
+            self._incoming.extend(paths)
+        self.scheduler.wake()
+        
+    def update_viewport(self, first, last):
+        """可見範圍改變時重新排序渲染工作，可由任何執行緒呼叫"""
+        self.scheduler.update_viewport(first, last)
+        
+    def rerender(self, indexes):
+        """重新排程已被記憶體預算淘汰的頁面"""
+        for index in indexes:
+            self.scheduler.requeue(index)
+        
+    def stop(self):
+        self.token.cancel()
+        
+    def record_hash(self, index, img):
+        if self.hashes is None:
+            return
+        gray = img.convertToFormat(QImage.Format_Grayscale8)
+        self.hashes.set(index, docsplit_dedupe.dhash_gray_buffer(
+            gray.constBits(), gray.width(), gray.height(), gray.bytesPerLine()))
+        
+    def emit_thumbnail(self, index, thumbnail):
+        # 訊號從發出到介面執行緒處理的等待時間，以非同步追蹤事件記錄
+        docsplit_trace.begin_async("thumbnail_signal", f"{self.generation}:{index}")
+        self.thumbnail_ready.emit(index, thumbnail)
+        
+    def emit_cached(self, index, data):
+        img = QImage.fromData(data, "PNG")
+        if img.isNull():
+            return False
+        self.record_hash(index, img)
+        self.emit_thumbnail(index, (img, None))
+        return True
         
     def run(self):
         try:
             if self.is_ppt:
-                # 處理PPT的縮圖
-                temp_dir = tempfile.mkdtemp()
-                ppt_app = None
-                presentation = None
-                
-                try:
-                    ppt_app = win32com.client.Dispatch('PowerPoint.Application')                    
-                    # 使用絕對路徑
-                    abs_file_path = os.path.abspath(self.file_path)                
-                    presentation = ppt_app.Presentations.Open(abs_file_path)
-                    
-                    # 獲取投影片數量
-                    slide_count = presentation.Slides.Count
-                    
-                    for i in range(1, slide_count + 1):
-                        temp_path = os.path.join(temp_dir, f"slide_{i}.png")
-                        presentation.Slides.Item(i).Export(temp_path, "PNG")
-                        
-                        if os.path.exists(temp_path):
-                            pixmap = QPixmap(temp_path)
-                            self.thumbnail_ready.emit(i-1, pixmap)
-                except Exception as e:
-                    import traceback
-                    print(f"PowerPoint處理出錯: {e}\n{traceback.format_exc()}")
-                finally:
-                    # 釋放資源
-                    if presentation:
-                        try:
-                            presentation.Close()
-                        except:
-                            pass
-                    
-                    if ppt_app:
-                        try:
-                            ppt_app.Quit()
-                        except:
-                            pass
-                    
-                    # 確保刪除臨時目錄
-                    try:
-                        # 文件被使用，稍等一下
-                        import time
-                        time.sleep(0.5)
-                        shutil.rmtree(temp_dir, ignore_errors=True)
-                    except:
-                        pass
+                with docsplit_trace.span("file_hash"):
+                    content_hash = docsplit_cache.file_hash(self.file_path) if self.cache else None
+                self.render_ppt(content_hash)
             else:
-                # 處理PDF的縮圖 (原代碼不變)
-                pdf_document = fitz.open(self.file_path)
-                for i in range(len(pdf_document)):
-                    page = pdf_document.load_page(i)
-                    pix = page.get_pixmap(matrix=fitz.Matrix(0.5, 0.5))
-                    
-                    img = QImage(pix.samples, pix.width, pix.height, pix.stride, QImage.Format_RGB888)
-                    pixmap = QPixmap.fromImage(img)
-                    self.thumbnail_ready.emit(i, pixmap)
-                
-                pdf_document.close()
+                self.render_pdf()
         except Exception as e:
             import traceback
             print(f"生成縮圖時發生錯誤: {e}\n{traceback.format_exc()}")
         
         self.finished.emit()
+        
+    def render_ppt(self, content_hash):
+        # 快取中已有投影片數時先不啟動 PowerPoint，遇到未快取的投影片才開啟簡報
+        meta = self.cache.get_meta(content_hash) if self.cache else None
+        converter = None
+        try:
+            if meta:
+                slide_count = meta['page_count']
+            else:
+                # 透過常駐的轉換器匯出投影片，不必每次重新啟動 PowerPoint
+                converter = docsplit_convert.get_converter()
+                slide_count = converter.open(self.file_path, token=self.token)
+                if self.cache:
+                    self.cache.put_meta(content_hash, {'page_count': slide_count})
+            self.scheduler.set_page_count(slide_count)
+            self.page_count_ready.emit(slide_count)
+            
+            # 依排程順序匯出，使用者捲動到的投影片會先出現；與 PDF 相同，
+            # 佇列清空後仍等待捲動與被記憶體預算淘汰的縮圖重新排入
+            while True:
+                batch = self.scheduler.take(1, timeout=0 if self.exit_when_idle else None)
+                if batch is None:
+                    break
+                if not batch:
+                    if self.exit_when_idle:
+                        break
+                    continue
+                index = batch[0]
+                if self.cache:
+                    data = self.cache.get(content_hash, index, self.cache_variant)
+                    if data is not None and self.emit_cached(index, data):
+                        continue
+                if converter is None:
+                    converter = docsplit_convert.get_converter()
+                    converter.open(self.file_path, token=self.token)
+                data = converter.render_page(self.file_path, index, *self.target_size, token=self.token)
+                if self.cache:
+                    self.cache.put(content_hash, index, self.cache_variant, data)
+                self.emit_cached(index, data)
+        except docsplit_jobs.CancelledError:
+            pass
+        except Exception as e:
+            import traceback
+            print(f"PowerPoint處理出錯: {e}\n{traceback.format_exc()}")
+        
+    def render_pdf(self):
+        # 排程器的頁碼即工作區的全域頁碼：各文件的頁面依序相接
+        renderers = []
+        starts = []
+        content_hashes = []
+        recent = []
+        
+        def content_hash(n):
+            # 第一次需要快取時才計算，只看畫面前幾頁時不必讀完每份文件
+            if content_hashes[n] is None:
+                with docsplit_trace.span("file_hash"):
+                    content_hashes[n] = docsplit_cache.file_hash(self.sources[n])
+            return content_hashes[n]
+        
+        def use_renderer(n):
+            # 文件很多時只保留最近使用的渲染器，其餘關閉並釋放渲染行程
+            if n in recent:
+                recent.remove(n)
+            recent.append(n)
+            while len(recent) > self.MAX_OPEN_RENDERERS:
+                renderers[recent.pop(0)].close()
+            return renderers[n]
+        
+        def open_sources():
+            # 開啟新加入的文件，頁面接在目前的最後一頁之後
+            with self._sources_lock:
+                paths, self._incoming = self._incoming, []
+            first = len(renderers)
+            total = starts[-1] + renderers[-1].page_count if renderers else 0
+            for path in paths:
+                with docsplit_trace.span("open_document", workers=self.workers):
+                    renderer = docsplit_render.PageRenderer(path, self.workers, self.documents)
+                    self.sources.append(path)
+                    renderers.append(renderer)
+                    starts.append(total)
+                    content_hashes.append(None)
+                    total += renderer.page_count
+            self.scheduler.set_page_count(total)
+            self.page_count_ready.emit(total)
+            # 頁面大小只需讀取頁面物件，數 GB 的掃描檔也不必解碼影像
+            for renderer, start in zip(renderers[first:], starts[first:]):
+                with docsplit_trace.span("page_sizes", pages=renderer.page_count, large=renderer.large):
+                    sizes = renderer.page_sizes()
+                self.page_sizes_ready.emit(start, sizes)
+        
+        try:
+            open_sources()
+            # 依排程優先順序逐批渲染，優先使用快取
+            idle = False
+            while True:
+                timeout = 0 if self.exit_when_idle else (None if idle else self.IDLE_CLOSE_SECONDS)
+                batch = self.scheduler.take(self.batch_size, timeout=timeout)
+                if batch is None:
+                    break
+                if self._incoming:
+                    open_sources()
+                    if not batch:
+                        continue
+                if not batch:
+                    if self.exit_when_idle:
+                        break
+                    # 佇列清空一段時間：釋放渲染行程，閒置期間不佔用記憶體
+                    for renderer in renderers:
+                        renderer.close()
+                    recent.clear()
+                    idle = True
+                    continue
+                idle = False
+                if docsplit_trace.enabled():
+                    docsplit_trace.counter("render_queue", pending=self.scheduler.pending_count)
+                
+                pending = {}
+                for i in batch:
+                    n = bisect_right(starts, i) - 1
+                    page_number = i - starts[n]
+                    if self.cache:
+                        data = self.cache.get(content_hash(n), page_number, self.cache_variant)
+                        if data is not None and self.emit_cached(i, data):
+                            continue
+                    pending.setdefault(n, []).append(page_number)
+                
+                # 未快取的頁面可分派到多個行程平行渲染，依完成順序顯示；
+                # 以目標尺寸渲染，QImage 直接使用渲染緩衝區，不另外複製
+                for n, page_numbers in pending.items():
+                    base = starts[n]
+                    for page in use_renderer(n).render(page_numbers, ordered=False, fit=self.target_size,
+                                                       want_png=self.cache is not None):
+                        if self.token.cancelled:
+                            break
+                        img = QImage(page.samples, page.width, page.height, page.stride, QImage.Format_RGB888)
+                        self.record_hash(base + page.index, img)
+                        if self.cache:
+                            self.cache.put(content_hash(n), page.index, self.cache_variant, page.png)
+                        self.emit_thumbnail(base + page.index, (img, page))
+        finally:
+            for renderer in renderers:
+                renderer.close()
+
+class ConversionWorker(QThread):
+    """在背景將 Word 文件轉為預覽用 PDF，結果存入轉檔快取"""
+    # (百分比，-1 表示無法估計, 訊息)
+    progress = Signal(int, str)
+    converted = Signal(str)
+    failed = Signal(str)
+    
+    def __init__(self, file_path, cache, token=None):
+        super().__init__()
+        self.file_path = file_path
+        self.cache = cache
+        self.token = token or docsplit_jobs.CancelToken()
+        self.generation = self.token.generation
+        
+    def stop(self):
+        self.token.cancel()
+        
+    def report_hash(self, done, total):
+        # 讀取來源計算雜湊只佔一小段進度，其餘為轉檔
+        self.progress.emit(done * 10 // max(total, 1), "檢查快取/Checking cache...")
+        
+    def convert(self, src_path, pdf_path, token):
+        self.progress.emit(-1, "正在轉換 Word 文件/Converting Word document...")
+        docsplit_core.convert_word_to_pdf(src_path, pdf_path, token)
+        
+    def run(self):
+        try:
+            self.progress.emit(0, "檢查快取/Checking cache...")
+            pdf_path = self.cache.convert(self.file_path, self.convert, self.token, self.report_hash)
+            self.progress.emit(100, "完成/Done")
+            self.converted.emit(pdf_path)
+        except docsplit_jobs.CancelledError:
+            pass
+        except Exception as e:
+            import traceback
+            print(f"從Word轉換到PDF時發生錯誤: {e}\n{traceback.format_exc()}")
+            self.failed.emit(str(e))
+
+
+class IndexWorker(QThread):
+    """在背景擷取頁面文字建立全文索引；只重新擷取內容改變的頁面"""
+    progress = Signal(int, int)
+    indexed = Signal(int)
+    
+    # 每處理這麼多頁回報一次進度，避免訊號塞滿事件佇列
+    PROGRESS_EVERY = 100
+    
+    def __init__(self, entries, token=None):
+        super().__init__()
+        # [(索引鍵（來源文件路徑）, 擷取文字的 PDF)]，依序建立索引
+        self.entries = list(entries)
+        self.token = token or docsplit_jobs.CancelToken()
+        
+    def stop(self):
+        self.token.cancel()
+        
+    def report(self, done, total):
+        if done % self.PROGRESS_EVERY == 0 or done == total:
+            self.progress.emit(done, total)
+        
+    def run(self):
+        try:
+            # SQLite 連線只能在建立它的執行緒使用
+            with docsplit_index.PageIndex() as index:
+                pages = 0
+                for key, pdf_path in self.entries:
+                    content_hash = docsplit_cache.file_hash(pdf_path)
+                    index.update(key, pdf_path, content_hash, self.token, self.report)
+                    pages += index.indexed_pages(key)
+                self.indexed.emit(pages)
+        except docsplit_jobs.CancelledError:
+            pass
+        except Exception as e:
+            import traceback
+            print(f"建立全文索引時發生錯誤: {e}\n{traceback.format_exc()}")
+
+
+class PrintTask:
+    """匯出佇列中的列印工作：組成列印用文件，直接送到印表機或寫出一個檔案交給檢視器"""
+    
+    def __init__(self, parts, layout=None, printer=None, dpi=None, documents=None):
+        # [(PDF 或 PPT 路徑, 頁碼列表)]，依序組成一份列印文件；PPT 只會有一份
+        self.parts = [(path, list(indexes)) for path, indexes in parts]
+        self.layout = layout
+        # printer 為 None 時交給 PDF 檢視器
+        self.printer = printer
+        self.dpi = dpi or docsplit_print.DEFAULT_PRINT_DPI
+        # PDF 來源由文件池（docsplit_workspace.DocumentPool）取得，不重新解析；
+        # 未提供時使用自己的文件池，工作結束時關閉
+        self.owns_documents = documents is None
+        self.documents = documents or docsplit_workspace.DocumentPool(capacity=1)
+        
+    def convert_ppt(self, ppt_path, indexes, token):
+        """將選定投影片轉成 PDF 並載入記憶體"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            temp_pdf = os.path.join(temp_dir, "temp_print.pdf")
+            docsplit_core.convert_ppt_to_pdf(ppt_path, indexes, temp_pdf, token)
+            with open(temp_pdf, 'rb') as f:
+                return fitz.open("pdf", f.read())
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        
+    def build_document(self, token):
+        """組成列印用文件"""
+        path, indexes = self.parts[0]
+        if path.lower().endswith(('.ppt', '.pptx')):
+            source = self.convert_ppt(path, indexes, token)
+        elif len(self.parts) == 1:
+            with self.documents.document(path) as source:
+                return docsplit_print.build_print_document(source, indexes, self.layout, token)
+        else:
+            # 多份文件先依序組成一份，再套用版面
+            source = docsplit_core.compose_pdf(self.documents, self.parts, token)
+        try:
+            return docsplit_print.build_print_document(source, range(source.page_count),
+                                                       self.layout, token)
+        finally:
+            source.close()
+        
+    def __call__(self, job):
+        """在匯出執行緒中執行；回傳檢視器用的 PDF 路徑或送出的頁數"""
+        try:
+            document = self.build_document(job.token)
+            try:
+                if self.printer is None:
+                    return docsplit_print.spool_pdf(document, job.token)
+                job.total_pages = document.page_count
+                return docsplit_print.print_pages(document, self.printer, self.dpi, job.token,
+                                                  lambda done, total: job.advance(1))
+            finally:
+                document.close()
+        finally:
+            if self.owns_documents:
+                self.documents.close()
+
 
 class PrintOptionsDialog(QDialog):
     def __init__(self, parent=None):
@@ -135,6 +469,45 @@ class PrintOptionsDialog(QDialog):
         slides_per_page_group.setLayout(slides_layout)
         layout.addWidget(slides_per_page_group)
 
+        # 紙張與方向（多張/頁時使用）
+        paper_layout = QHBoxLayout()
+        self.paper_combo = QComboBox()
+        for paper in docsplit_impose.PAPER_SIZES:
+            self.paper_combo.addItem(paper.upper(), paper)
+        self.orientation_combo = QComboBox()
+        self.orientation_combo.addItem("自動/Auto", 'auto')
+        self.orientation_combo.addItem("直式/Portrait", 'portrait')
+        self.orientation_combo.addItem("橫式/Landscape", 'landscape')
+        paper_layout.addWidget(QLabel("紙張/Paper"))
+        paper_layout.addWidget(self.paper_combo)
+        paper_layout.addWidget(QLabel("方向/Orientation"))
+        paper_layout.addWidget(self.orientation_combo)
+        layout.addLayout(paper_layout)
+
+        # 輸出方式：直接送到印表機，或交給 PDF 檢視器
+        output_group = QGroupBox("輸出/Output")
+        output_layout = QVBoxLayout()
+        self.output_group = QButtonGroup(self)
+        self.radio_printer = QRadioButton("直接列印/Print directly")
+        self.radio_viewer = QRadioButton("以 PDF 檢視器開啟/Open in PDF viewer")
+        self.radio_printer.setChecked(True)
+        self.output_group.addButton(self.radio_printer)
+        self.output_group.addButton(self.radio_viewer)
+        output_layout.addWidget(self.radio_printer)
+        output_layout.addWidget(self.radio_viewer)
+
+        dpi_layout = QHBoxLayout()
+        self.dpi_combo = QComboBox()
+        for dpi in docsplit_print.PRINT_DPI_CHOICES:
+            self.dpi_combo.addItem(f"{dpi} DPI", dpi)
+        self.dpi_combo.setCurrentIndex(self.dpi_combo.findData(docsplit_print.DEFAULT_PRINT_DPI))
+        self.radio_printer.toggled.connect(self.dpi_combo.setEnabled)
+        dpi_layout.addWidget(QLabel("解析度/Resolution"))
+        dpi_layout.addWidget(self.dpi_combo)
+        output_layout.addLayout(dpi_layout)
+        output_group.setLayout(output_layout)
+        layout.addWidget(output_group)
+
         # 按鈕
         buttons_layout = QHBoxLayout()
         self.ok_button = QPushButton("確認/OK")
@@ -152,6 +525,101 @@ class PrintOptionsDialog(QDialog):
     def get_slides_per_page(self):
         return self.button_group.checkedId() 
 
+    def get_layout(self):
+        """多張/頁時回傳拼版設定，1 張/頁回傳 None（直接列印原始頁面）"""
+        slides_per_page = self.get_slides_per_page()
+        if slides_per_page <= 1:
+            return None
+        return docsplit_impose.ImpositionLayout.for_count(
+            slides_per_page,
+            paper=self.paper_combo.currentData(),
+            orientation=self.orientation_combo.currentData())
+
+    def print_directly(self):
+        return self.radio_printer.isChecked()
+
+    def get_dpi(self):
+        return self.dpi_combo.currentData()
+
+class SplitOptionsDialog(QDialog):
+    """拆分規則：每 N 頁、每個第一層書籤、空白分隔頁或頁碼範圍清單檔"""
+
+    def __init__(self, page_count, bookmarks, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("拆分選項/Split Options")
+        self.setMinimumWidth(360)
+        
+        layout = QVBoxLayout()
+        rule_group = QGroupBox("拆分規則/Split Rule")
+        rule_layout = QGridLayout()
+        self.rule_group = QButtonGroup(self)
+        
+        self.radio_every = QRadioButton("每 N 頁/Every N pages")
+        self.radio_every.setChecked(True)
+        self.every_spin = QSpinBox()
+        self.every_spin.setRange(1, max(1, page_count))
+        self.every_spin.setValue(1)
+        self.radio_every.toggled.connect(self.every_spin.setEnabled)
+        
+        self.radio_outline = QRadioButton(f"每個書籤/At each bookmark ({bookmarks})")
+        # 沒有第一層書籤的文件不能依書籤拆分
+        self.radio_outline.setEnabled(bookmarks > 0)
+        self.radio_blank = QRadioButton("空白分隔頁（不輸出）/At blank separator pages")
+        
+        self.radio_ranges = QRadioButton("頁碼範圍清單/Range list file")
+        self.ranges_edit = QLineEdit()
+        self.ranges_edit.setPlaceholderText("每行「[名稱] 頁碼範圍」/'[name] 1-3,5' per line")
+        self.ranges_button = QPushButton("瀏覽/Browse")
+        self.ranges_button.clicked.connect(self.browse_ranges)
+        for widget in (self.ranges_edit, self.ranges_button):
+            widget.setEnabled(False)
+            self.radio_ranges.toggled.connect(widget.setEnabled)
+        
+        for rule, radio in ((docsplit_split.EVERY, self.radio_every), (docsplit_split.OUTLINE, self.radio_outline),
+                            (docsplit_split.BLANK, self.radio_blank), (docsplit_split.RANGES, self.radio_ranges)):
+            self.rule_group.addButton(radio)
+            radio.setProperty('rule', rule)
+        rule_layout.addWidget(self.radio_every, 0, 0)
+        rule_layout.addWidget(self.every_spin, 0, 1)
+        rule_layout.addWidget(self.radio_outline, 1, 0, 1, 3)
+        rule_layout.addWidget(self.radio_blank, 2, 0, 1, 3)
+        rule_layout.addWidget(self.radio_ranges, 3, 0)
+        rule_layout.addWidget(self.ranges_edit, 3, 1)
+        rule_layout.addWidget(self.ranges_button, 3, 2)
+        rule_group.setLayout(rule_layout)
+        layout.addWidget(rule_group)
+        
+        buttons_layout = QHBoxLayout()
+        self.ok_button = QPushButton("確認/OK")
+        self.cancel_button = QPushButton("取消/Cancel")
+        self.ok_button.clicked.connect(self.accept)
+        self.cancel_button.clicked.connect(self.reject)
+        buttons_layout.addWidget(self.ok_button)
+        buttons_layout.addWidget(self.cancel_button)
+        layout.addLayout(buttons_layout)
+        self.setLayout(layout)
+    
+    def browse_ranges(self):
+        path, _ = QFileDialog.getOpenFileName(self, "頁碼範圍清單/Range List", "", "文字檔/Text (*.txt *.csv);;*")
+        if path:
+            self.ranges_edit.setText(path)
+    
+    def accept(self):
+        if self.radio_ranges.isChecked() and not os.path.isfile(self.ranges_edit.text()):
+            QMessageBox.warning(self, "警告/Warning", "請選擇頁碼範圍清單檔/Please choose a range list file")
+            return
+        super().accept()
+    
+    def get_rule(self):
+        rule = self.rule_group.checkedButton().property('rule')
+        if rule == docsplit_split.EVERY:
+            return docsplit_split.SplitRule(rule, self.every_spin.value())
+        if rule == docsplit_split.OUTLINE:
+            return docsplit_split.SplitRule(rule, 1)
+        if rule == docsplit_split.RANGES:
+            return docsplit_split.SplitRule(rule, self.ranges_edit.text())
+        return docsplit_split.SplitRule(rule, None)
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -160,11 +628,37 @@ class MainWindow(QMainWindow):
         self.setMinimumSize(800, 600)
         self.setWindowIcon(QIcon(os.path.abspath("icon.ico")))
         self.file_path = None
-        self.thumbnails = []
-        self.selected_indexes = []
+        # 縮圖與列印使用的 PDF；Word 文件為轉檔快取中的檔案
+        self.preview_path = None
+        # 工作區共用一個縮圖工作，加入的文件交給它渲染；索引工作每次加入文件會多一個
+        self.thumbnail_worker = None
+        self.index_workers = []
+        self.conversion_worker = None
+        # 介面執行緒的索引查詢連線，第一次搜尋時開啟
+        self.page_index = None
+        # 已取消但尚未結束的縮圖執行緒，結束前須保留參考
+        self.retired_workers = []
+        self.jobs = docsplit_jobs.JobTracker()
+        self.selection = docsplit_selection.PageSelection()
         self.current_file_type = None
+        self.thumbnail_cache = docsplit_cache.ThumbnailCache()
+        self.conversion_cache = docsplit_cache.ConversionCache()
+        # None 表示 docsplit_render.default_workers()
+        self.render_workers = None
+        # 目前文件的 docsplit_dedupe.PageHashes，開始產生縮圖時建立
+        self.page_hashes = None
+        # 工作區：縮圖格中依序排列的 PDF 文件（Word 為預覽 PDF，PPT 不使用工作區）；
+        # 匯出與列印都由文件池取得已開啟的文件
+        self.workspace = docsplit_workspace.Workspace()
+        self.documents = docsplit_workspace.DocumentPool()
+        self.searchable_pages = 0
         
         self.init_ui()
+        # 匯出與列印在背景佇列進行，與文件世代無關：開啟其他文件時不會中斷
+        self.export_queue = docsplit_exports.ExportQueue(on_change=self.export_panel.job_changed.emit)
+        self.export_panel.job_finished.connect(self.export_finished)
+        self.export_panel.clear_button.clicked.connect(self.export_queue.remove_finished)
+        self.init_perf_tools()
     
     def init_ui(self):
         # 主佈局
@@ -177,10 +671,23 @@ class MainWindow(QMainWindow):
         self.open_button = QPushButton("📂打開檔案/Open File")
         self.open_button.clicked.connect(self.open_file)
         
+        self.add_button = QPushButton("➕加入文件/Add Documents")
+        self.add_button.clicked.connect(self.add_documents)
+        self.add_button.setEnabled(False)
+        
         self.export_pdf_button = QPushButton("📄匯出為PDF/Export as PDF")
         self.export_pdf_button.clicked.connect(self.export_to_pdf)
         self.export_pdf_button.setEnabled(False)
         
+        # 匯出 PDF 時的影像最佳化（docsplit_optimize.IMAGE_PRESETS）；None 為保留原始影像
+        self.image_combo = QComboBox()
+        self.image_combo.addItem("影像：原始/Images: Original", None)
+        self.image_combo.addItem("影像：電子郵件 150 DPI/Images: Email 150 DPI", 'email')
+        self.image_combo.addItem("影像：列印 300 DPI/Images: Print 300 DPI", 'print')
+        self.image_combo.addItem("影像：無損 300 DPI/Images: Lossless 300 DPI", 'lossless')
+        self.image_combo.setToolTip("匯出 PDF 時縮小解析度過高的影像並重新壓縮/"
+                                    "Downsample and recompress images when exporting to PDF")
+        
         self.export_ppt_button = QPushButton("✅匯出為PPT/Export as PPT")
         self.export_ppt_button.clicked.connect(self.export_to_ppt)
         self.export_ppt_button.setEnabled(False)
@@ -193,8 +700,16 @@ class MainWindow(QMainWindow):
         self.print_button.clicked.connect(self.print_document)
         self.print_button.setEnabled(False)
         
+        self.split_button = QPushButton("✂️拆分為多個檔案/Split into Files")
+        self.split_button.setToolTip("拆分選取頁面所在的文件/Splits the document of the first selected page")
+        self.split_button.clicked.connect(self.split_document)
+        self.split_button.setEnabled(False)
+        
         button_layout.addWidget(self.open_button)
+        button_layout.addWidget(self.add_button)
         button_layout.addWidget(self.export_pdf_button)
+        button_layout.addWidget(self.image_combo)
+        button_layout.addWidget(self.split_button)
         button_layout.addWidget(self.export_word_button)
         button_layout.addWidget(self.export_ppt_button)       
         button_layout.addWidget(self.print_button)
@@ -202,32 +717,81 @@ class MainWindow(QMainWindow):
         
         main_layout.addLayout(button_layout)
         
-        # 縮圖顯示區域
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
+        # 選取工具列
+        selection_layout = QHBoxLayout()
         
-        self.thumbnails_widget = QWidget()
-        self.thumbnails_layout = QGridLayout(self.thumbnails_widget)
-        self.thumbnails_layout.setSpacing(15) 
-        self.thumbnails_layout.setAlignment(Qt.AlignTop | Qt.AlignLeft)
+        self.select_all_button = QPushButton("全選/Select All")
+        self.select_all_button.clicked.connect(self.select_all)
+        self.select_none_button = QPushButton("全不選/Select None")
+        self.select_none_button.clicked.connect(self.select_none)
+        self.invert_button = QPushButton("反選/Invert")
+        self.invert_button.clicked.connect(self.invert_selection)
+        self.unique_button = QPushButton("僅選不重複頁/Select Unique")
+        self.unique_button.clicked.connect(self.select_unique_pages)
+        self.duplicates_button = QPushButton("標示重複頁/Highlight Duplicates")
+        self.duplicates_button.setCheckable(True)
+        self.duplicates_button.toggled.connect(self.highlight_duplicates)
+        
+        self.range_edit = QLineEdit()
+        self.range_edit.setPlaceholderText("頁碼範圍/Page ranges, e.g. 1-50,75,100-")
+        self.range_edit.returnPressed.connect(self.select_range_expression)
+        
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("搜尋文字並選取/Search text to select")
+        self.search_edit.returnPressed.connect(self.select_search_results)
+        self.index_label = QLabel()
+        
+        self.selection_label = QLabel()
+        
+        selection_layout.addWidget(self.select_all_button)
+        selection_layout.addWidget(self.select_none_button)
+        selection_layout.addWidget(self.invert_button)
+        selection_layout.addWidget(self.unique_button)
+        selection_layout.addWidget(self.duplicates_button)
+        selection_layout.addWidget(self.range_edit)
+        selection_layout.addWidget(self.search_edit)
+        selection_layout.addWidget(self.index_label)
+        selection_layout.addWidget(self.selection_label)
+        
+        main_layout.addLayout(selection_layout)
+        
+        # 縮圖顯示區域
+        # 只繪製可見的格子，捲動時才要求渲染
+        self.thumbnail_view = ThumbnailView(selection=self.selection)
+        self.thumbnail_view.page_clicked.connect(self.toggle_selection)
+        self.thumbnail_view.visible_range_changed.connect(self.request_visible_thumbnails)
+        main_layout.addWidget(self.thumbnail_view)
         
-        scroll_area.setWidget(self.thumbnails_widget)
-        main_layout.addWidget(scroll_area)
+        # 匯出佇列，有工作時才顯示
+        self.export_panel = ExportPanel()
+        main_layout.addWidget(self.export_panel)
         
         main_widget.setLayout(main_layout)
         self.setCentralWidget(main_widget)
     
     def open_file(self):
-        file_path, _ = QFileDialog.getOpenFileName(
+        file_paths, _ = QFileDialog.getOpenFileNames(
             self, "選擇檔案/Select File", "", "文件/Documents (*.ppt *.pptx *.pdf *.docx)"
         )
         
-        if not file_path:
+        if not file_paths:
+            return
+        # 同時選取多個 PDF 時全部載入工作區
+        file_path, extra_paths = file_paths[0], file_paths[1:]
+        if extra_paths and not all(path.lower().endswith('.pdf') for path in file_paths):
+            QMessageBox.warning(self, "警告/Warning", "一次開啟多個檔案時只支援 PDF/Only PDF files can be opened together")
             return
             
         self.file_path = file_path
-        self.clear_thumbnails()
-        self.load_thumbnails()
+        self.preview_path = None
+        with docsplit_trace.span("open_file", path=os.path.basename(file_path)):
+            self.clear_thumbnails()
+            if not file_path.lower().endswith('.pdf'):
+                # 在背景啟動 Office 轉換行程，縮圖與匯出不必等待啟動
+                docsplit_convert.get_converter().warm_up()
+            self.load_thumbnails()
+            if extra_paths:
+                self.add_documents(extra_paths)
         
         # 啟用按鈕
         self.export_pdf_button.setEnabled(True)
@@ -235,31 +799,78 @@ class MainWindow(QMainWindow):
         self.print_button.setEnabled(True)
     
     def clear_thumbnails(self):
-        # 清除現有縮圖
-        for i in reversed(range(self.thumbnails_layout.count())):
-            widget = self.thumbnails_layout.itemAt(i).widget()
-            if widget:
-                widget.deleteLater()
-        self.thumbnails = []
-        self.selected_indexes = []
+        # 進入新的文件世代：取消舊文件的所有工作，並清除現有縮圖
+        self.jobs.new_generation()
+        self.stop_worker()
+        self.thumbnail_view.thumbnail_model.clear()
+        self.index_label.clear()
+        self.page_hashes = None
+        self.workspace.clear()
+        self.thumbnail_view.thumbnail_model.page_labels = None
+        self.searchable_pages = 0
+        self.add_button.setEnabled(False)
+        self.split_button.setEnabled(False)
+        self.duplicates_button.setChecked(False)
+        self.update_selection_label()
+    
+    def stop_worker(self):
+        # 取消後不等待；執行緒結束時才釋放，舊結果由世代編號過濾
+        workers = [self.thumbnail_worker] + self.index_workers + [self.conversion_worker]
+        for worker in workers:
+            if not worker:
+                continue
+            worker.stop()
+            if worker.isRunning():
+                self.retired_workers.append(worker)
+                worker.finished.connect(partial(self.release_worker, worker))
+        self.thumbnail_worker = None
+        self.index_workers = []
+        self.conversion_worker = None
+    
+    def release_worker(self, worker):
+        worker.wait()
+        if worker in self.retired_workers:
+            self.retired_workers.remove(worker)
+    
+    def thumbnail_size(self):
+        # Word文件使用較大的縮圖，其他文件使用標準大小
+        if self.current_file_type == 'word':
+            return QSize(280, 320)
+        return QSize(200, 150)
     
     def load_thumbnails(self):
         if not self.file_path:
             return
+        load_document_backends()
 
         ext = os.path.splitext(self.file_path)[1].lower()
         is_word = ext in ['.doc', '.docx']
         # 設置文件類型
         self.current_file_type = 'word' if is_word else ('pdf' if ext == '.pdf' else 'ppt')
+        self.thumbnail_view.set_thumbnail_size(self.thumbnail_size())
 
         if is_word:
-            # Word → PDF
-            temp_pdf_path = os.path.join(tempfile.gettempdir(), "word_to_pdf_preview.pdf")
-            self.convert_word_to_pdf(self.file_path, temp_pdf_path)
-            preview_path = temp_pdf_path
+            # Word → PDF 在背景執行；未修改的文件直接使用快取中的 PDF
+            self.convert_word_to_pdf(self.file_path)
         else:
-            preview_path = self.file_path
+            self.start_thumbnail_worker(self.file_path)
 
+    def start_thumbnail_worker(self, preview_path):
+        self.preview_path = preview_path
+        generation = self.jobs.generation
+        if self.current_file_type != 'ppt':
+            # PDF 的頁數可直接由文件池取得，文件成為工作區的第一份文件
+            try:
+                with self.documents.document(preview_path) as pdf_document:
+                    page_count = pdf_document.page_count
+            except Exception as e:
+                QMessageBox.critical(self, "錯誤", f"無法開啟檔案/Unable to open the file:\n{e}")
+                return
+            self.workspace.add(self.file_path, page_count, preview_path)
+            self.set_page_count(generation, page_count)
+            self.add_button.setEnabled(True)
+            self.split_button.setEnabled(True)
+        
         # 顯示訊息 + 建立縮圖工作
         msg = QMessageBox()
         msg.setIcon(QMessageBox.Information)
@@ -269,77 +880,283 @@ class MainWindow(QMainWindow):
         msg.show()
         QApplication.processEvents()
 
-        self.worker = ThumbnailWorker(preview_path, None)
-        self.worker.thumbnail_ready.connect(self.add_thumbnail)
-        self.worker.finished.connect(msg.close)
-        self.worker.start()
+        self.page_hashes = docsplit_dedupe.PageHashes()
+        worker = self.create_thumbnail_worker(preview_path)
+        if self.current_file_type == 'ppt':
+            worker.page_count_ready.connect(partial(self.set_page_count, generation))
+        # 頁數確定後即可顯示格狀檢視，縮圖隨捲動陸續出現
+        worker.page_count_ready.connect(msg.close)
+        worker.finished.connect(msg.close)
+        worker.start()
+        
+        if self.current_file_type != 'ppt':
+            self.start_index_worker([(os.path.abspath(self.file_path), preview_path)])
+
+    def create_thumbnail_worker(self, sources):
+        """建立工作區的縮圖工作，渲染 sources（路徑或路徑列表）"""
+        dpr = self.devicePixelRatioF()
+        size = self.thumbnail_size()
+        target_size = (round(size.width() * dpr), round(size.height() * dpr))
+        worker = ThumbnailWorker(sources, None, cache=self.thumbnail_cache,
+                                 workers=self.render_workers or docsplit_render.default_workers(),
+                                 target_size=target_size, token=self.jobs.start(),
+                                 hashes=self.page_hashes, documents=self.documents)
+        worker.thumbnail_ready.connect(partial(self.add_thumbnail, self.jobs.generation))
+        worker.page_sizes_ready.connect(partial(self.set_page_sizes, self.jobs.generation))
+        self.thumbnail_worker = worker
+        return worker
+
+    def add_documents(self, paths=None):
+        """將 PDF 加入工作區，頁面接在目前的頁面之後，可跨文件選取後匯出成一份"""
+        if not self.workspace:
+            return
+        if paths is None:
+            paths, _ = QFileDialog.getOpenFileNames(self, "加入文件/Add Documents", "", "PDF (*.pdf)")
+        if not paths:
+            return
+        
+        added = []
+        errors = []
+        for path in paths:
+            try:
+                with self.documents.document(path) as pdf_document:
+                    page_count = pdf_document.page_count
+            except Exception as e:
+                errors.append(f"{os.path.basename(path)}: {e}")
+                continue
+            added.append(self.workspace.add(path, page_count))
+        if errors:
+            QMessageBox.warning(self, "警告/Warning", "無法開啟以下檔案/Unable to open:\n" + "\n".join(errors))
+        if not added:
+            return
+        
+        model = self.thumbnail_view.thumbnail_model
+        model.page_labels = self.workspace.page_label
+        model.set_page_count(self.workspace.page_count)
+        self.page_hashes.resize(self.workspace.page_count)
+        self.update_selection_label()
+        # 交給現有的縮圖工作，不另外建立執行緒與渲染行程
+        self.thumbnail_worker.add_sources([document.pdf_path for document in added])
+        self.start_index_worker([(os.path.abspath(document.path), document.pdf_path) for document in added])
+
+    def start_index_worker(self, entries):
+        # 與縮圖同時在背景建立全文索引
+        generation = self.jobs.generation
+        self.index_label.setText("建立索引中/Indexing...")
+        worker = IndexWorker(entries, self.jobs.start())
+        worker.progress.connect(partial(self.update_index_progress, generation))
+        worker.indexed.connect(partial(self.index_ready, generation))
+        self.index_workers.append(worker)
+        worker.start()
+
+    def update_index_progress(self, generation, done, total):
+        if self.jobs.is_current(generation):
+            self.index_label.setText(f"索引/Indexing {done}/{total}")
 
+    def index_ready(self, generation, pages):
+        if self.jobs.is_current(generation):
+            self.searchable_pages += pages
+            pages = self.searchable_pages
+            self.index_label.setText(f"可搜尋 {pages} 頁/{pages} pages searchable")
+
+    def request_visible_thumbnails(self, first, last):
+        if self.thumbnail_worker:
+            evicted = self.thumbnail_view.thumbnail_model.evicted_rows(first, last)
+            self.thumbnail_worker.update_viewport(first, last)
+            if evicted:
+                self.thumbnail_worker.rerender(evicted)
     
-    def add_thumbnail(self, index, pixmap):
-        # 縮放縮圖
-        if self.current_file_type == 'word':
-        # Word文件使用較大的縮圖
-            pixmap = pixmap.scaled(QSize(280, 320), Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    def set_page_count(self, generation, count):
+        if self.jobs.is_current(generation):
+            self.thumbnail_view.thumbnail_model.set_page_count(count)
+            self.update_selection_label()
+    
+    def set_page_sizes(self, generation, first, sizes):
+        if self.jobs.is_current(generation):
+            self.thumbnail_view.thumbnail_model.set_page_sizes(first, sizes)
+    
+    def add_thumbnail(self, generation, index, thumbnail):
+        docsplit_trace.end_async("thumbnail_signal", f"{generation}:{index}")
+        # 已關閉文件的結果直接丟棄
+        if not self.jobs.is_current(generation):
+            return
+        
+        with docsplit_trace.span("add_thumbnail", page=index):
+            # 在介面執行緒建立 QPixmap；影像已是最終大小，建立後即釋放渲染緩衝區
+            image, _owner = thumbnail
+            dpr = self.devicePixelRatioF()
+            target = self.thumbnail_size() * dpr
+            if image.width() > target.width() + 1 or image.height() > target.height() + 1:
+                image = image.scaled(target, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            pixmap = QPixmap.fromImage(image)
+            pixmap.setDevicePixelRatio(dpr)
+            
+            self.thumbnail_view.thumbnail_model.set_pixmap(index, pixmap)
+    
+    @property
+    def selected_indexes(self):
+        """依頁碼排序的已選頁面"""
+        return self.selection.indexes()
+    
+    def toggle_selection(self, index, extend=False):
+        # 切換選擇狀態；按住 Shift 時選取從上次點擊到此頁的範圍
+        self.selection.click(index, extend)
+        self.selection_changed()
+    
+    def selection_changed(self):
+        # 選取變動合併後一次重繪
+        self.thumbnail_view.schedule_selection_refresh()
+        self.update_selection_label()
+    
+    def update_selection_label(self):
+        self.selection_label.setText(f"已選 {len(self.selection)} / {self.selection.page_count} 頁")
+    
+    def select_all(self):
+        self.selection.select_all()
+        self.selection_changed()
+    
+    def select_none(self):
+        self.selection.clear()
+        self.selection_changed()
+    
+    def invert_selection(self):
+        self.selection.invert()
+        self.selection_changed()
+    
+    def select_range_expression(self):
+        spec = self.range_edit.text().strip()
+        if not spec:
+            return
+        try:
+            self.selection.select_expression(spec)
+        except ValueError as e:
+            QMessageBox.warning(self, "警告/Warning", f"無效的頁碼範圍/Invalid page range: {e}")
+            return
+        self.selection_changed()
+    
+    def find_duplicates(self):
+        """回傳 (每頁最早的相似頁, 尚未計算雜湊的頁數)"""
+        page_count = self.selection.page_count
+        self.page_hashes.resize(page_count)
+        hashes, known = self.page_hashes.values[:page_count], self.page_hashes.known[:page_count]
+        duplicates = docsplit_dedupe.duplicate_of(hashes, known)
+        return duplicates, page_count - int(known.sum())
+    
+    def warn_unhashed(self, missing):
+        if missing:
+            QMessageBox.information(self, "重複頁/Duplicates",
+                                    f"尚有 {missing} 頁縮圖未完成，這些頁面視為不重複。/"
+                                    f"{missing} pages have no thumbnail yet and are treated as unique.")
+    
+    def select_unique_pages(self):
+        """只選取每組重複頁面的第一頁"""
+        if not self.selection.page_count:
+            return
+        duplicates, missing = self.find_duplicates()
+        self.selection.select_indexes(docsplit_dedupe.unique_pages(duplicates))
+        self.selection_changed()
+        self.warn_unhashed(missing)
+    
+    def highlight_duplicates(self, enabled):
+        model = self.thumbnail_view.thumbnail_model
+        if not enabled or not self.selection.page_count:
+            model.set_duplicate_groups(None)
+            return
+        duplicates, missing = self.find_duplicates()
+        model.set_duplicate_groups(docsplit_dedupe.duplicate_groups(duplicates))
+        self.warn_unhashed(missing)
+    
+    def select_search_results(self):
+        """選取包含搜尋文字的所有頁面（取代目前的選取）"""
+        query = self.search_edit.text().strip()
+        if not query or not self.file_path:
+            return
+        if self.current_file_type == 'ppt':
+            QMessageBox.information(self, "搜尋/Search", "PPT 檔案尚不支援文字搜尋/Text search is not available for PPT files")
+            return
+        if self.page_index is None:
+            self.page_index = docsplit_index.PageIndex()
+        pages = []
+        for document in self.workspace:
+            pages += [document.offset + i for i in self.page_index.search(os.path.abspath(document.path), query)
+                      if i < document.page_count]
+        self.selection.select_indexes(pages)
+        self.selection_changed()
+        if not pages:
+            QMessageBox.information(self, "搜尋/Search", f"找不到「{query}」/No pages contain \"{query}\"")
+    
+    def init_perf_tools(self):
+        # Ctrl+Shift+P 顯示效能面板（同時開始追蹤），Ctrl+Shift+T 匯出追蹤檔
+        self.perf_overlay = PerfOverlay(self.thumbnail_view, self.perf_stats)
+        QShortcut(QKeySequence("Ctrl+Shift+P"), self, self.toggle_perf_overlay)
+        QShortcut(QKeySequence("Ctrl+Shift+T"), self, self.save_trace)
+    
+    def perf_stats(self):
+        """效能面板顯示的 (名稱, 文字, 計數器數值)"""
+        rate = docsplit_trace.rate("add_thumbnail")
+        queue = self.thumbnail_worker.scheduler.pending_count if self.thumbnail_worker else 0
+        memory = docsplit_trace.memory_usage()
+        memory_label = "memory"
+        if memory is None:
+            # 沒有目前用量（例如 macOS）時改顯示峰值，標示清楚避免誤讀
+            memory = docsplit_trace.peak_memory_usage()
+            memory_label = "peak memory"
+        store = self.thumbnail_view.thumbnail_model.store
+        pool = self.documents.stats()
+        exports = self.export_queue.stats()
+        return [
+            ("pages/s", f"{rate:.1f}", rate),
+            ("queue", str(queue), queue),
+            ("documents", f"{pool['open']} open, {pool['hits']} reused", pool['open']),
+            ("exports", f"{exports['running']} running, {exports['queued']} queued, "
+                        f"{exports['pages_per_second']:.0f} pages/s, "
+                        f"{format_bytes(exports['bytes_per_second'])}/s", exports['running']),
+            (memory_label, format_bytes(memory), memory),
+            ("thumbnails", f"{format_bytes(store.hot_bytes)} / {format_bytes(store.budget_bytes)}",
+             store.hot_bytes),
+            ("trace", f"{len(docsplit_trace.events())} events", None),
+        ]
+    
+    def toggle_perf_overlay(self):
+        # 面板顯示期間才追蹤，關閉後不再累積事件
+        active = not self.perf_overlay.isVisible()
+        if active:
+            docsplit_trace.enable()
         else:
-            # 其他文件使用標準大小
-            pixmap = pixmap.scaled(QSize(200, 150), Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        
-        # 創建框架包含縮圖
-        frame = QFrame()
-        frame.setFrameStyle(QFrame.Panel | QFrame.Raised)
-        frame.setLineWidth(2)
-        
-        frame_layout = QVBoxLayout()
-        
-        # 縮圖標籤
-        thumbnail_label = QLabel()
-        thumbnail_label.setPixmap(pixmap)
-        thumbnail_label.setAlignment(Qt.AlignCenter)
-        
-        # 頁碼標籤
-        page_label = QLabel(f"頁 {index + 1}")
-        page_label.setAlignment(Qt.AlignCenter)
-        
-        frame_layout.addWidget(thumbnail_label)
-        frame_layout.addWidget(page_label)
-        frame.setLayout(frame_layout)
-        
-        # 存儲縮圖數據
-        self.thumbnails.append({
-            'index': index,
-            'frame': frame,
-            'selected': False
-        })
-        
-        # 添加點擊事件
-        frame.mousePressEvent = lambda event, idx=index: self.toggle_selection(idx)
-        
-        row = index // 4
-        col = index % 4
-        self.thumbnails_layout.addWidget(frame, row, col)
-    
-    def toggle_selection(self, index):
-        # 切換選擇狀態
-        for thumbnail in self.thumbnails:
-            if thumbnail['index'] == index:
-                thumbnail['selected'] = not thumbnail['selected']
-                
-                if thumbnail['selected']:
-                    thumbnail['frame'].setStyleSheet("background-color: #e0e0ff;")
-                    if index not in self.selected_indexes:
-                        self.selected_indexes.append(index)
-                else:
-                    thumbnail['frame'].setStyleSheet("")
-                    if index in self.selected_indexes:
-                        self.selected_indexes.remove(index)
-                break
+            docsplit_trace.disable()
+        self.perf_overlay.set_active(active)
+    
+    def save_trace(self):
+        """將追蹤事件存成 Chrome trace JSON（chrome://tracing 或 ui.perfetto.dev 開啟）"""
+        if not docsplit_trace.enabled() and not docsplit_trace.events():
+            QMessageBox.information(self, "追蹤/Trace", "追蹤未啟用，請先按 Ctrl+Shift+P 或設定 DOCSPLIT_TRACE=1/"
+                                    "Tracing is off; press Ctrl+Shift+P or set DOCSPLIT_TRACE=1 first")
+            return
+        save_path, _ = QFileDialog.getSaveFileName(self, "儲存追蹤/Save Trace", "docsplit-trace.json",
+                                                   "Trace (*.json)")
+        if not save_path:
+            return
+        count = docsplit_trace.export_chrome(save_path)
+        QMessageBox.information(self, "追蹤/Trace", f"已儲存 {count} 個事件/Saved {count} events")
+    
+    def closeEvent(self, event):
+        self.jobs.cancel_all()
+        self.stop_worker()
+        self.export_queue.shutdown()
+        for worker in list(self.retired_workers):
+            worker.wait()
+        docsplit_convert.shutdown()
+        if self.page_index is not None:
+            self.page_index.close()
+        self.documents.close()
+        super().closeEvent(event)
     
     def export_to_pdf(self):
-        """將選定頁面匯出為PDF"""
+        """將選定頁面加入匯出佇列，在背景匯出為PDF"""
         if not self.file_path:
             return
                 
-        if not self.selected_indexes:
+        if not self.selection:
             QMessageBox.warning(self, "Warning", "Please select pages to export first")
             return
                 
@@ -348,114 +1165,166 @@ class MainWindow(QMainWindow):
         if not save_path:
             return
             
+        # 確保文件名有 .pdf 副檔名
+        if not save_path.lower().endswith('.pdf'):
+            save_path += '.pdf'
+        
+        # 使用絕對路徑
+        abs_file_path = os.path.abspath(self.file_path)
+        abs_save_path = os.path.abspath(save_path)
+        # 提交時就固定選取與來源，匯出期間可以繼續選取或開啟其他文件
+        indexes = self.selected_indexes
+        parts = self.workspace.parts(indexes) if self.workspace else None
+        documents = self.documents
+        images = None
+        if self.image_combo.currentData():
+            images = docsplit_optimize.IMAGE_PRESETS[self.image_combo.currentData()]._replace(
+                workers=self.render_workers or docsplit_optimize.default_workers())
+        
+        def export(job):
+            # 匯出給使用者的檔案清除重複資源並壓縮；Word 文件沿用已轉出的預覽 PDF
+            with docsplit_trace.span("export_to_pdf", pages=len(indexes)):
+                if parts and (len(indexes) >= docsplit_exports.PROCESS_MIN_PAGES or images):
+                    # 大型匯出與影像最佳化在子行程中進行，介面不因 GIL 停頓
+                    return docsplit_exports.run_in_process(
+                        job, docsplit_exports.export_pdf_parts, parts, abs_save_path, 'compact', images,
+                        partial_path=docsplit_core.partial_path(abs_save_path))
+                if parts:
+                    # PDF 與 Word 的預覽 PDF 由文件池取得，工作區的多份文件依序組成一份
+                    return docsplit_core.export_parts(documents, parts, abs_save_path, preset='compact',
+                                                      token=job.token, progress=job.advance,
+                                                      on_write=job.wrote)
+                # PPT 透過 Office 轉檔，不最佳化影像
+                result = docsplit_core.rebuild_document(abs_file_path, indexes, abs_save_path,
+                                                        job.token, preset='compact')
+                job.advance(result.pages)
+                job.wrote(result.size)
+                return result
+        
+        self.submit_export('pdf', os.path.basename(abs_save_path), export, abs_save_path, len(indexes))
+    
+    def split_document(self):
+        """依規則將文件拆分為多個 PDF，在背景由行程池平行寫出"""
+        if not self.workspace:
+            return
+        indexes = self.selected_indexes
+        document = self.workspace.locate(indexes[0])[0] if indexes else self.workspace.documents[0]
         try:
-            # 確保文件名有 .pdf 副檔名
-            if not save_path.lower().endswith('.pdf'):
-                save_path += '.pdf'
-            
-            # 使用絕對路徑
-            abs_file_path = os.path.abspath(self.file_path)
-            abs_save_path = os.path.abspath(save_path)
-            
-            # 檢查是PDF還是PPT
-            is_pdf = self.file_path.lower().endswith('.pdf')
-            is_ppt = self.file_path.lower().endswith(('.ppt', '.pptx'))
-            is_word = self.file_path.lower().endswith(('.doc', '.docx'))
+            with self.documents.document(document.pdf_path) as pdf_document:
+                bookmarks = sum(1 for entry in pdf_document.get_toc(simple=True) if entry[0] == 1)
+        except Exception as e:
+            QMessageBox.critical(self, "錯誤", f"無法開啟檔案/Unable to open the file:\n{e}")
+            return
+        
+        dialog = SplitOptionsDialog(document.page_count, bookmarks, self)
+        dialog.setWindowTitle(f"拆分/Split: {document.name}")
+        if dialog.exec() != QDialog.Accepted:
+            return
+        rule = dialog.get_rule()
+        out_dir = QFileDialog.getExistingDirectory(self, "輸出資料夾/Output Folder")
+        if not out_dir:
+            return
+        
+        out_dir = os.path.abspath(out_dir)
+        pdf_path = os.path.abspath(document.pdf_path)
+        # Word 文件的輸出檔名使用原始檔名而非預覽 PDF
+        stem = os.path.splitext(document.name)[0]
+        workers = self.render_workers or docsplit_render.default_workers()
+        
+        def split(job):
+            # 空白分隔頁不寫出，規劃完成後以實際要寫出的頁數作為進度總數
+            def planned(pages):
+                job.total_pages = pages
             
-            if is_pdf:
-                # PDF到PDF的處理
-                try:
-                    # 打開PDF
-                    pdf_document = fitz.open(abs_file_path)
-                    # 創建新的PDF
-                    new_pdf = fitz.open()
-                    
-                    # 複製選定的頁面
-                    for idx in sorted(self.selected_indexes):
-                        new_pdf.insert_pdf(pdf_document, from_page=idx, to_page=idx)
-                    
-                    # 保存新PDF
-                    new_pdf.save(abs_save_path)
-                    new_pdf.close()
-                    pdf_document.close()
-                    
-                    QMessageBox.information(self, "Success", "PDF exported successfully!")
-                    
-                except Exception as e:
-                    import traceback
-                    error_msg = f"處理PDF時發生錯誤/An error occurred while processing the PDF:\n{str(e)}\n\n{traceback.format_exc()}"
-                    QMessageBox.critical(self, "Error", error_msg)
-                    print(error_msg)
-                    
+            with docsplit_trace.span("split_document", rule=rule.kind):
+                return docsplit_split.split_pdf(pdf_path, rule, out_dir, 'compact', workers, token=job.token,
+                                                progress=job.advance, on_write=job.wrote, stem=stem,
+                                                on_plan=planned)
+        
+        self.submit_export('split', f"✂️ {document.name}", split, out_dir, document.page_count)
+    
+    def submit_export(self, kind, title, func, out_path=None, pages=0):
+        """加入匯出佇列；同一個輸出檔已在匯出時提示並回傳 None"""
+        try:
+            return self.export_queue.submit(kind, title, func, out_path, pages)
+        except ValueError as e:
+            QMessageBox.warning(self, "匯出佇列/Export Queue", str(e))
+            return None
+    
+    def export_finished(self, job):
+        """匯出佇列的工作結束；結果顯示在佇列面板與狀態列，不跳出對話框"""
+        if job.state == docsplit_exports.FAILED:
+            self.statusBar().showMessage(f"{job.title}: 失敗/Failed: {job.error}")
+            return
+        if job.state != docsplit_exports.DONE:
+            self.statusBar().showMessage(f"{job.title}: 已取消/Cancelled", 5000)
+            return
+        if job.kind == 'preview':
+            # 檔案留在列印暫存目錄，檢視器讀取期間不會被刪除
+            if os.name == 'nt':
+                os.startfile(job.result)
             else:
-                # PPT到PDF的處理
-                ppt_app = None
-                presentation = None
-                temp_presentation = None
-                
-                try:
-                    # 使用win32com創建PowerPoint
-                    ppt_app = win32com.client.Dispatch("PowerPoint.Application")
-                    
-                    # 打開原始文件
-                    presentation = ppt_app.Presentations.Open(abs_file_path)
-                    
-                    # 創建臨時投影片
-                    temp_presentation = ppt_app.Presentations.Add()
-                    
-                    # 複製選定的投影片
-                    for idx in sorted(self.selected_indexes):
-                        slide_index = idx + 1
-                        presentation.Slides.Item(slide_index).Copy()
-                        temp_presentation.Slides.Paste()
-                    
-                    # 保存為PDF
-                    temp_presentation.SaveAs(abs_save_path, 32)
-                    
-                    QMessageBox.information(self, "Success", "PDF exported successfully!")
-                    
-                finally:                    
-                    if temp_presentation:
-                        try:
-                            temp_presentation.Close()
-                        except:
-                            pass                            
-                    if presentation:
-                        try:
-                            presentation.Close()
-                        except:
-                            pass                            
-                    if ppt_app:
-                        try:
-                            ppt_app.Quit()
-                        except:
-                            pass
-            
-        except Exception as e:
-            import traceback
-            error_msg = f"An error occurred while processing the PDF:\n{str(e)}\n\n{traceback.format_exc()}"
-            QMessageBox.critical(self, "Error", error_msg)
-            print(error_msg) 
+                subprocess.Popen(['xdg-open', job.result])
+            message = "已開啟 PDF，請在檢視器中使用列印功能/PDF opened, please print from the viewer"
+        elif job.kind == 'print':
+            message = f"已送出 {job.result} 頁到印表機/Sent {job.result} pages to the printer"
+        elif job.kind == 'split':
+            message = (f"已拆分為 {len(job.result.outputs)} 個檔案/Split into {len(job.result.outputs)} files, "
+                       f"{format_bytes(job.result.size)}, {job.elapsed:.1f} s")
+        else:
+            message = (f"已匯出/Exported {job.pages_done} 頁/pages, {format_bytes(job.bytes_written)}, "
+                       f"{job.elapsed:.1f} s")
+            if job.kind == 'pdf' and job.result.images is not None:
+                message += f" · {docsplit_optimize.format_report(job.result.images)}"
+        self.statusBar().showMessage(f"{job.title}: {message}", 10000)
    
-    def convert_word_to_pdf(self, docx_path, pdf_path):
-        try:
-            word = win32com.client.Dispatch("Word.Application")
-            doc = word.Documents.Open(docx_path)
-            doc.SaveAs(pdf_path, FileFormat=17)
-            doc.Close()
-            word.Quit()
-        except Exception as e:
-            import traceback
-            error_msg = f"從Word轉換到PDF時發生錯誤: {str(e)}\n\n{traceback.format_exc()}"
-            QMessageBox.critical(self, "錯誤", error_msg)
-            print(error_msg)
+    def convert_word_to_pdf(self, docx_path):
+        """在背景轉換 Word 文件，完成後以轉出的 PDF 產生縮圖"""
+        generation = self.jobs.generation
+        token = self.jobs.start()
+        
+        progress = QProgressDialog("正在轉換 Word 文件/Converting Word document...",
+                                   "取消/Cancel", 0, 100, self)
+        progress.setWindowTitle("處理中")
+        progress.setWindowModality(Qt.WindowModal)
+        # 快取命中時轉換瞬間完成，不必閃現對話框
+        progress.setMinimumDuration(300)
+        progress.setAutoClose(False)
+        progress.canceled.connect(token.cancel)
+        
+        def update_progress(value, text):
+            if value < 0:
+                progress.setRange(0, 0)
+            else:
+                progress.setRange(0, 100)
+                progress.setValue(value)
+            progress.setLabelText(text)
+        
+        def converted(pdf_path):
+            if self.jobs.is_current(generation) and not token.cancelled:
+                self.start_thumbnail_worker(pdf_path)
+        
+        def failed(message):
+            if self.jobs.is_current(generation):
+                QMessageBox.critical(self, "錯誤", f"從Word轉換到PDF時發生錯誤/Word to PDF conversion failed:\n{message}")
+        
+        def done():
+            self.jobs.finish(token)
+            progress.close()
+        
+        self.conversion_worker = ConversionWorker(docx_path, self.conversion_cache, token)
+        self.conversion_worker.progress.connect(update_progress)
+        self.conversion_worker.converted.connect(converted)
+        self.conversion_worker.failed.connect(failed)
+        self.conversion_worker.finished.connect(done)
+        self.conversion_worker.start()
 
     def export_to_ppt(self):
-        """將選定頁面匯出為PPT"""
+        """將選定頁面加入匯出佇列，在背景匯出為PPT"""
         if not self.file_path:
             return
                 
-        if not self.selected_indexes:
+        if not self.selection:
             QMessageBox.warning(self, "Warning", "請先選擇要匯出的頁面/Please select pages to export first")
             return
                 
@@ -467,76 +1336,35 @@ class MainWindow(QMainWindow):
         if not save_path:
             return
             
-        try:
-            # 確保副檔名是 .pptx
-            if not save_path.lower().endswith('.pptx'):
-                save_path += '.pptx'
-            
-            ppt_app = None
-            presentation = None
-            new_presentation = None
-            
-            try:
-                ppt_app = win32com.client.Dispatch('PowerPoint.Application')
-                
-                # 根據源文件類型處理
-                is_ppt = self.file_path.lower().endswith(('.ppt', '.pptx'))
-                is_pdf = self.file_path.lower().endswith('.pdf')
-                is_word = self.file_path.lower().endswith(('.doc', '.docx'))
-
-                if is_ppt:
-                    # 使用絕對路徑
-                    abs_file_path = os.path.abspath(self.file_path)
-                    abs_save_path = os.path.abspath(save_path)                    
-                    # 打開原始文件
-                    presentation = ppt_app.Presentations.Open(abs_file_path)                    
-                    # 創建新投影片
-                    new_presentation = ppt_app.Presentations.Add()    
-                    # 複製選取的投影片                
-                    for idx in sorted(self.selected_indexes):
-                        # 使用 Item 方法
-                        slide_index = idx + 1
-                        presentation.Slides.Item(slide_index).Copy()                        
-                        new_presentation.Slides.Paste()
-                    
-                    # 保存
-                    new_presentation.SaveAs(abs_save_path)
-                    
-                    QMessageBox.information(self, "Success", "Exported successfully!")
-                else:
-                    pass
-                    
-            finally:
-              
-                if new_presentation:
-                    try:
-                        new_presentation.Close()
-                    except:
-                        pass
-                        
-                if presentation:
-                    try:
-                        presentation.Close()
-                    except:
-                        pass
-                        
-                if ppt_app:
-                    try:
-                        ppt_app.Quit()
-                    except:
-                        pass
-            
-        except Exception as e:
-            import traceback
-            error_msg = f"無法匯出PPT:\n{str(e)}\n\n{traceback.format_exc()}"
-            QMessageBox.critical(self, "錯誤", error_msg)
-            print(error_msg)  
+        # 確保副檔名是 .pptx
+        if not save_path.lower().endswith('.pptx'):
+            save_path += '.pptx'
+
+        if not self.file_path.lower().endswith(('.ppt', '.pptx')):
+            return
+
+        abs_file_path = os.path.abspath(self.file_path)
+        abs_save_path = os.path.abspath(save_path)
+        indexes = self.selected_indexes
+        
+        def export(job):
+            if abs_file_path.lower().endswith('.pptx'):
+                # 直接從套件移除未選投影片，不需啟動 PowerPoint
+                docsplit_pptx.subset_pptx(abs_file_path, indexes, abs_save_path, job.token)
+            else:
+                # 舊版 .ppt 交給常駐的 PowerPoint 另存後刪除未選投影片
+                docsplit_convert.get_converter().export_subset(
+                    abs_file_path, indexes, abs_save_path, token=job.token)
+            job.advance(len(indexes))
+            job.wrote(os.path.getsize(abs_save_path))
+        
+        self.submit_export('ppt', os.path.basename(abs_save_path), export, abs_save_path, len(indexes))
 
     def export_to_word(self):
         if not self.file_path:
             return
 
-        if not self.selected_indexes:
+        if not self.selection:
             QMessageBox.warning(self, "Warning", "Please select pages to export first")
             return
 
@@ -551,7 +1379,7 @@ class MainWindow(QMainWindow):
         if not self.file_path:
             return
                 
-        if not self.selected_indexes:
+        if not self.selection:
             QMessageBox.warning(self, "警告", "請先選擇要列印的頁面")
             return
         
@@ -562,232 +1390,27 @@ class MainWindow(QMainWindow):
         if result != QDialog.Accepted:
             return
                 
-        slides_per_page = print_dialog.get_slides_per_page()
-        
-        try:
-            # 根據源文件類型處理
-            is_ppt = self.file_path.lower().endswith(('.ppt', '.pptx'))
-            is_pdf = self.file_path.lower().endswith('.pdf')          
-            is_word = self.file_path.lower().endswith(('.doc', '.docx'))
-
-            if is_ppt:
-                # 從PPT列印
-                temp_dir = tempfile.mkdtemp()
-                temp_pdf = os.path.join(temp_dir, "temp_print.pdf")
-                
-                try:
-                    # 使用 PowerPoint 創建 PDF
-                    ppt_app = win32com.client.Dispatch('PowerPoint.Application')                  
-                    presentation = ppt_app.Presentations.Open(os.path.abspath(self.file_path))
-                    new_presentation = ppt_app.Presentations.Add()
-                    
-                    # 複製選定的投影片
-                    for idx in sorted(self.selected_indexes):
-                        presentation.Slides.Item(idx + 1).Copy()
-                        new_presentation.Slides.Paste()
-                    
-                    # 保存為PDF
-                    new_presentation.SaveAs(os.path.abspath(temp_pdf), 32)
-                    
-                    # 關閉投影片
-                    new_presentation.Close()
-                    presentation.Close()
-                    ppt_app.Quit()
-                    
-                    # 現在列印生成的 PDF 文件
-                    # 使用適當的選項設置
-                    pdf_document = fitz.open(temp_pdf)
-                    
-                    # 創建適合列印的新 PDF
-                    print_pdf = os.path.join(temp_dir, "print_ready.pdf")
-                    
-                    if slides_per_page == 1:
-                        # 直接列印，不需要特殊處理
-                        pdf_document.save(print_pdf)
-                    else:
-                        # 使用 PyMuPDF 創建多投影片每頁的版本
-                        doc_out = fitz.open()
-                        page_width, page_height = fitz.paper_size("a4")
-                        
-                        # 根據每頁投影片數量計算布局
-                        if slides_per_page == 2:
-                            # 2張投影片每頁，縱向排列
-                            rows, cols = 2, 1
-                        elif slides_per_page == 4:
-                            # 4張投影片每頁，2x2 網格
-                            rows, cols = 2, 2
-                        elif slides_per_page == 6:
-                            # 6張投影片每頁，3x2 網格
-                            rows, cols = 3, 2
-                        elif slides_per_page == 9:
-                            # 9張投影片每頁，3x3 網格
-                            rows, cols = 3, 3
-                        else:
-                            # 默認使用 1 張投影片每頁
-                            rows, cols = 1, 1
-                        
-                        # 計算每張投影片的尺寸
-                        cell_width = page_width / cols
-                        cell_height = page_height / rows
-                        
-                        # 計算需要多少頁
-                        pages_count = pdf_document.page_count
-                        output_pages = (pages_count + slides_per_page - 1) // slides_per_page
-                        
-                        # 創建輸出頁面
-                        for p in range(output_pages):
-                            page_out = doc_out.new_page(width=page_width, height=page_height)
-                            
-                            # 添加當前頁的投影片
-                            for i in range(slides_per_page):
-                                idx = p * slides_per_page + i
-                                if idx >= pages_count:
-                                    break
-                                
-                                # 計算投影片位置
-                                row = i // cols
-                                col = i % cols
-                                
-                                # 計算目標矩形
-                                target_rect = fitz.Rect(
-                                    col * cell_width,
-                                    row * cell_height,
-                                    (col + 1) * cell_width,
-                                    (row + 1) * cell_height
-                                )
-                                
-                                # 添加投影片到頁面
-                                page_in = pdf_document[idx]
-                                page_out.show_pdf_page(target_rect, pdf_document, idx)
-                        
-                        # 保存文件
-                        doc_out.save(print_pdf)
-                        doc_out.close()
-                    
-                    pdf_document.close()                    
-
-                    # 改為讓使用者自行開啟後列印
-                    if os.name == 'nt':
-                        os.startfile(print_pdf)  
-                    else:
-                        subprocess.call(['xdg-open', print_pdf])
-
-                    QMessageBox.information(self, "預覽列印/Print Preview", "已開啟 PDF/ PDF opened.，請在檢視器中使用列印功能）。")
-                    
-                except Exception as e:
-                    import traceback
-                    error_msg = f"處理列印時出錯/An error occurred while printing: {e}\n{traceback.format_exc()}"
-                    QMessageBox.critical(self, "Error", error_msg)
-                    print(error_msg)
-                finally:
-                    # 刪除臨時文件
-                    try:
-                        import time
-                        time.sleep(1) 
-                        shutil.rmtree(temp_dir, ignore_errors=True)
-                    except:
-                        pass
-            else:
-                # 創建臨時PDF
-                temp_dir = tempfile.mkdtemp()
-                temp_pdf = os.path.join(temp_dir, "temp_print.pdf")
-                
-                try:
-                    pdf_document = fitz.open(self.file_path)
-                    new_pdf = fitz.open()
-                    
-                    for idx in sorted(self.selected_indexes):
-                        new_pdf.insert_pdf(pdf_document, from_page=idx, to_page=idx)
-                    
-                    # 處理每頁多張投影片的設置
-                    if slides_per_page > 1:
-                        # 使用 PyMuPDF 創建多投影片每頁的版本
-                        print_pdf = os.path.join(temp_dir, "print_ready.pdf")
-                        doc_out = fitz.open()
-                        page_width, page_height = fitz.paper_size("a4")
-                        
-                        # 根據每頁投影片數量計算布局
-                        if slides_per_page == 2:
-                            rows, cols = 2, 1
-                        elif slides_per_page == 4:
-                            rows, cols = 2, 2
-                        elif slides_per_page == 6:
-                            rows, cols = 3, 2
-                        elif slides_per_page == 9:
-                            rows, cols = 3, 3
-                        else:
-                            rows, cols = 1, 1
-                        
-                        # 計算每張投影片的尺寸
-                        cell_width = page_width / cols
-                        cell_height = page_height / rows
-                        
-                        # 計算需要多少頁
-                        pages_count = new_pdf.page_count
-                        output_pages = (pages_count + slides_per_page - 1) // slides_per_page
-                        
-                        # 創建輸出頁面
-                        for p in range(output_pages):
-                            page_out = doc_out.new_page(width=page_width, height=page_height)
-                            
-                            # 添加當前頁的投影片
-                            for i in range(slides_per_page):
-                                idx = p * slides_per_page + i
-                                if idx >= pages_count:
-                                    break
-                                
-                                # 計算投影片位置
-                                row = i // cols
-                                col = i % cols
-                                
-                                # 計算目標矩形
-                                target_rect = fitz.Rect(
-                                    col * cell_width,
-                                    row * cell_height,
-                                    (col + 1) * cell_width,
-                                    (row + 1) * cell_height
-                                )
-                                
-                                # 添加投影片到頁面
-                                page_out.show_pdf_page(target_rect, new_pdf, idx)
-                        
-                        # 保存文件
-                        doc_out.save(print_pdf)
-                        doc_out.close()
-                    else:
-                        # 單張投影片每頁
-                        new_pdf.save(temp_pdf)
-                        print_pdf = temp_pdf
-                    
-                    new_pdf.close()
-                    pdf_document.close()
-                    
-                    # 使用系統默認PDF查看器列印
-                    if os.name == 'nt':  # Windows
-                        os.startfile(print_pdf, 'print')
-                    else:
-                        # Linux或Mac
-                        subprocess.call(['xdg-open', print_pdf])
-                    
-                    # 等待用戶完成列印
-                    QMessageBox.information(self, "列印/Print", "文件已發送到列印機。請在完成後點擊確認。The document has been sent to the printer. Please click OK when done.")
-                    
-                except Exception as e:
-                    import traceback
-                    error_msg = f"處理列印時出錯: {e}\n{traceback.format_exc()}"
-                    QMessageBox.critical(self, "錯誤", error_msg)
-                    print(error_msg)
-                finally:
-                    # 刪除臨時文件
-                    try:
-                        shutil.rmtree(temp_dir, ignore_errors=True)
-                    except:
-                        pass
+        layout = print_dialog.get_layout()
+        printer = None
+        if print_dialog.print_directly():
+            printer = QPrinter(QPrinter.HighResolution)
+            if QPrintDialog(printer, self).exec() != QDialog.Accepted:
+                return
         
-        except Exception as e:
-            QMessageBox.critical(self, "錯誤", f"無法列印: {e}")
+        # 工作區的 PDF（Word 為預覽時已轉出的 PDF）依序組成列印文件
+        if self.workspace:
+            parts = self.workspace.parts(self.selected_indexes)
+        else:
+            parts = [(self.file_path, self.selected_indexes)]
+        task = PrintTask(parts, layout, printer, print_dialog.get_dpi(), self.documents)
+        if printer is None:
+            self.submit_export('preview', "預覽列印/Print Preview", task)
+        else:
+            self.submit_export('print', "列印/Print", task)
 
 if __name__ == "__main__":
+    # 打包成執行檔時，渲染、轉檔、匯出與拆分的子行程由此進入，不可再開啟視窗
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
 
     # ✨ 在這裡加上美化樣式
@@ -0,0 +1,79 @@
+"""轉換器基準測試：每次請求啟動後端（舊做法）與常駐行程池的比較。
+
+以 FakeBackend 模擬 Office 的啟動與操作耗時，可在沒有 Office 的環境執行：
+
+    python benchmarks/bench_convert.py --startup 1.5 --requests 10
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+from functools import partial
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import docsplit_convert
+
+
+def per_request(factory, jobs):
+    """重構前的做法：每次操作都建立後端（Dispatch）再結束（Quit）"""
+    for path, out_path in jobs:
+        backend = factory()
+        try:
+            backend.to_pdf(path, out_path, [0, 1])
+        finally:
+            backend.shutdown()
+
+
+def pooled(converter, jobs):
+    for path, out_path in jobs:
+        converter.to_pdf(path, out_path, [0, 1])
+
+
+def measure(startup, delay, requests):
+    """回傳 [{'case', 'seconds'}]：每次請求啟動、常駐行程池（冷啟動與已啟動）"""
+    factory = partial(docsplit_convert.FakeBackend, pages=20,
+                      startup_delay=startup, delay=delay)
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        jobs = [(os.path.join(temp_dir, f"deck{i}.pptx"), os.path.join(temp_dir, f"out{i}.pdf"))
+                for i in range(requests)]
+
+        start = perf_counter()
+        per_request(factory, jobs)
+        results.append({'case': 'per-request', 'seconds': round(perf_counter() - start, 3)})
+
+        pool = docsplit_convert.ConverterPool(factory)
+        try:
+            start = perf_counter()
+            pooled(pool, jobs)
+            results.append({'case': 'pool (cold)', 'seconds': round(perf_counter() - start, 3)})
+            start = perf_counter()
+            pooled(pool, jobs)
+            results.append({'case': 'pool (warm)', 'seconds': round(perf_counter() - start, 3)})
+        finally:
+            pool.close()
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--startup', type=float, default=1.5, help="模擬的 Office 啟動秒數")
+    parser.add_argument('--delay', type=float, default=0.05, help="模擬的每次操作秒數")
+    parser.add_argument('--requests', type=int, default=10)
+    parser.add_argument('--json', help="將結果寫入 JSON 檔")
+    args = parser.parse_args(argv)
+
+    results = measure(args.startup, args.delay, args.requests)
+    for result in results:
+        print(f"{result['case']:<12} {args.requests} requests  {result['seconds']:7.2f}s")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'requests': args.requests, 'startup': args.startup, 'results': results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""N-up 拼版基準測試：1 張/頁與 9 張/頁（含舊版逐格 show_pdf_page 對照）。
+
+    python benchmarks/bench_impose.py --pages 5000
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz
+
+import docsplit_core
+import docsplit_impose
+
+
+def make_handout(path, pages):
+    """產生 16:9 投影片講義（文字、向量與共用字型）"""
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page(width=960, height=540)
+        page.insert_text((60, 80), f"Slide {i + 1}", fontsize=40)
+        page.insert_text((60, 140), "Quarterly review " * 4, fontsize=18)
+        page.draw_rect(fitz.Rect(60, 180, 900, 480), color=(0, 0, 1), fill=(0.85, 0.88, 1))
+    doc.save(path)
+    doc.close()
+
+
+def legacy_nup(src, rows, cols):
+    """重構前 print_document 的做法：A4 直式、每格一次 show_pdf_page"""
+    out = fitz.open()
+    width, height = fitz.paper_size("a4")
+    per_sheet = rows * cols
+    for start in range(0, src.page_count, per_sheet):
+        page = out.new_page(width=width, height=height)
+        for i in range(min(per_sheet, src.page_count - start)):
+            row, col = divmod(i, cols)
+            rect = fitz.Rect(col * width / cols, row * height / rows,
+                             (col + 1) * width / cols, (row + 1) * height / rows)
+            page.show_pdf_page(rect, src, start + i)
+    return out
+
+
+def timed(label, build, path, results):
+    start = perf_counter()
+    doc = build()
+    built = perf_counter() - start
+    start = perf_counter()
+    docsplit_core.save_pdf(doc, path, prune=True)
+    saved = perf_counter() - start
+    results.append({'case': label, 'sheets': doc.page_count, 'build_s': round(built, 3),
+                    'save_s': round(saved, 3), 'bytes': os.path.getsize(path)})
+    doc.close()
+    print(f"{label:<12} {results[-1]['sheets']:>6} sheets  build {built:7.2f}s  "
+          f"save {saved:6.2f}s  {results[-1]['bytes'] / 1024:9.0f} KB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=5000)
+    parser.add_argument('--json', help="將結果寫入 JSON 檔")
+    parser.add_argument('--skip-legacy', action='store_true')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        handout = os.path.join(temp_dir, "handout.pdf")
+        make_handout(handout, args.pages)
+        src = fitz.open(handout)
+        results = []
+        everything = range(src.page_count)
+        timed("1-up", lambda: docsplit_core.build_pdf(src, everything, method='auto'),
+              os.path.join(temp_dir, "1up.pdf"), results)
+        timed("1-up impose", lambda: docsplit_impose.impose(src, docsplit_impose.ImpositionLayout.for_count(1)),
+              os.path.join(temp_dir, "1up_impose.pdf"), results)
+        timed("9-up", lambda: docsplit_impose.impose(src, docsplit_impose.ImpositionLayout.for_count(9)),
+              os.path.join(temp_dir, "9up.pdf"), results)
+        if not args.skip_legacy:
+            timed("9-up legacy", lambda: legacy_nup(src, 3, 3),
+                  os.path.join(temp_dir, "9up_legacy.pdf"), results)
+        src.close()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'pages': args.pages, 'results': results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
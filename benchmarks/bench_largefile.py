@@ -0,0 +1,150 @@
+"""大型掃描檔基準測試：數 GB 的 PDF 開檔到第一張縮圖的時間與常駐記憶體。
+
+產生每頁一張不可壓縮點陣影像、分多次增量存檔的掃描檔（與掃描封存檔相同，
+交互參照表分散在檔案各處），在全新的直譯器中測量開檔、頁數、頁面大小、
+內容雜湊與第一張縮圖的時間，再每隔幾頁渲染一張縮圖並記錄峰值常駐記憶體。
+第一張縮圖超過預算時結束碼為 1：
+
+    python benchmarks/bench_largefile.py --size-gb 2 --budget-s 1
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synth
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 第一張縮圖的時間上限（秒），與檔案大小無關
+FIRST_THUMBNAIL_BUDGET = 1.0
+# 每頁影像的邊長（像素）；隨機 RGB 約 1 MB/頁
+SCAN_SIDE = 600
+# 每次增量存檔加入的頁數
+PAGES_PER_SAVE = 200
+# 記錄峰值記憶體時每隔幾頁渲染一張
+RENDER_STRIDE = 5
+
+_CHILD = """
+import sys, json
+from time import perf_counter
+sys.path.insert(0, {root!r})
+import docsplit_cache
+import docsplit_render
+
+def peak_rss():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+
+report = {{}}
+start = perf_counter()
+renderer = docsplit_render.PageRenderer({path!r}, workers=1)
+report['page_count'] = renderer.page_count
+report['open_s'] = perf_counter() - start
+mark = perf_counter()
+report['pages_with_size'] = len(renderer.page_sizes())
+report['page_sizes_s'] = perf_counter() - mark
+mark = perf_counter()
+next(iter(renderer.render([0], fit=(200, 150))))
+report['first_thumbnail_s'] = perf_counter() - start
+mark = perf_counter()
+docsplit_cache.file_hash({path!r})
+report['file_hash_s'] = perf_counter() - mark
+mark = perf_counter()
+rendered = 0
+for _page in renderer.render(range(0, report['page_count'], {stride}), fit=(200, 150)):
+    rendered += 1
+report['render_pages'] = rendered
+report['render_s'] = perf_counter() - mark
+report['peak_rss'] = peak_rss()
+renderer.close()
+print(json.dumps(report))
+"""
+
+
+def make_scan(path, pages, seed=0):
+    """產生 pages 頁的掃描檔，每 PAGES_PER_SAVE 頁增量存檔一次；約 1 MB/頁"""
+    import random
+    import fitz
+    rng = random.Random(seed)
+    doc = fitz.open()
+    doc.new_page(width=612, height=792)
+    doc.save(path)
+    doc.close()
+    for start in range(0, pages, PAGES_PER_SAVE):
+        doc = fitz.open(path)
+        for i in range(start, min(pages, start + PAGES_PER_SAVE)):
+            # 每 7 頁一張橫式頁面，頁面大小不一
+            landscape = i % 7 == 0
+            page = doc.new_page(width=792 if landscape else 612, height=612 if landscape else 792)
+            samples = rng.randbytes(SCAN_SIDE * SCAN_SIDE * 3)
+            page.insert_image(page.rect, pixmap=fitz.Pixmap(fitz.csRGB, SCAN_SIDE, SCAN_SIDE, samples, False))
+            page.insert_text((40, 60), f"Scan {i + 1}", fontsize=30, color=(1, 0, 0))
+        doc.saveIncr()
+        doc.close()
+    doc = fitz.open(path)
+    doc.delete_page(0)
+    doc.saveIncr()
+    doc.close()
+
+
+def scan_file(size_gb, data_dir=None):
+    """回傳約 size_gb GB 的掃描檔路徑，已產生過時直接使用"""
+    data_dir = data_dir or synth.default_data_dir()
+    os.makedirs(data_dir, exist_ok=True)
+    pages = max(1, round(size_gb * 1024 ** 3 / (SCAN_SIDE * SCAN_SIDE * 3)))
+    path = os.path.join(data_dir, f"scan-{pages}-v{synth.GENERATOR_VERSION}.pdf")
+    if not os.path.exists(path):
+        partial = path + ".part"
+        make_scan(partial, pages)
+        os.replace(partial, path)
+    return path
+
+
+def measure(path, stride=RENDER_STRIDE):
+    """在新的直譯器中開啟 path 並測量，回傳各階段秒數、頁數與峰值記憶體"""
+    code = _CHILD.format(root=ROOT, path=path, stride=stride)
+    proc = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, timeout=3600)
+    if proc.returncode != 0:
+        raise RuntimeError(f"測量失敗/Measurement failed:\n{proc.stderr[-2000:]}")
+    report = json.loads(proc.stdout.strip().splitlines()[-1])
+    report['bytes'] = os.path.getsize(path)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size-gb', type=float, default=2.0, help="掃描檔大小（GB）")
+    parser.add_argument('--file', help="改用現有的 PDF")
+    parser.add_argument('--budget-s', type=float, default=FIRST_THUMBNAIL_BUDGET,
+                        help="第一張縮圖的時間上限（秒）")
+    parser.add_argument('--stride', type=int, default=RENDER_STRIDE, help="記錄峰值記憶體時每隔幾頁渲染一張")
+    parser.add_argument('--json', help="將結果寫入 JSON 檔")
+    args = parser.parse_args(argv)
+
+    path = args.file or scan_file(args.size_gb)
+    report = measure(path, args.stride)
+    print(f"{os.path.basename(path)}: {report['bytes'] / 1024 ** 3:.2f} GB, {report['page_count']} pages")
+    for key in ('open_s', 'page_sizes_s', 'first_thumbnail_s', 'file_hash_s', 'render_s'):
+        print(f"{key:<18} {report[key] * 1000:10.1f} ms")
+    if report['peak_rss']:
+        print(f"{'peak_rss':<18} {report['peak_rss'] / 1024 ** 2:10.1f} MB ({report['render_pages']} thumbnails)")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'budget_s': args.budget_s, 'path': path, 'results': report}, f, indent=2)
+    if report['first_thumbnail_s'] > args.budget_s:
+        print(f"FAIL: first thumbnail {report['first_thumbnail_s']:.2f} s > {args.budget_s} s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
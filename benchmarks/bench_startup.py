@@ -0,0 +1,109 @@
+"""啟動時間基準測試：匯入 DocSplit 與顯示第一個視窗所需的時間。
+
+每次在全新的直譯器中以 -X importtime 匯入 DocSplit，檢查匯入耗時是否超過
+預算，並確認 PyMuPDF、NumPy、python-pptx、PIL 與 Office 自動化模組都沒有在
+開檔前被載入。超過預算或載入了這些模組時結束碼為 1：
+
+    python benchmarks/bench_startup.py --repeat 5 --budget-ms 300
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+from time import perf_counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# import DocSplit 的累計耗時上限（毫秒），大部分為 PySide6 本身
+IMPORT_BUDGET_MS = 300
+# 第一次開檔前不應載入的模組
+DEFERRED_MODULES = ('fitz', 'pymupdf', 'numpy', 'pptx', 'PIL', 'win32com', 'comtypes', 'pythoncom')
+
+_CHILD = """
+import sys, json
+from time import perf_counter
+start = perf_counter()
+sys.path.insert(0, {root!r})
+import DocSplit
+imported = perf_counter()
+from PySide6.QtWidgets import QApplication
+app = QApplication([])
+window = DocSplit.MainWindow()
+window.show()
+app.processEvents()
+shown = perf_counter()
+print(json.dumps({{'import': imported - start, 'window': shown - start,
+                  'loaded': [m for m in {deferred!r} if m in sys.modules]}}))
+"""
+
+
+def importtime_total(stderr, module='DocSplit'):
+    """由 -X importtime 的輸出取得 module 的累計匯入秒數"""
+    for line in stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1e6
+    return None
+
+
+def launch():
+    """在新的直譯器中匯入 DocSplit 並顯示主視窗，回傳各階段秒數與提早載入的模組"""
+    env = dict(os.environ)
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    code = _CHILD.format(root=ROOT, deferred=DEFERRED_MODULES)
+    start = perf_counter()
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], env=env,
+                          capture_output=True, text=True, timeout=120)
+    elapsed = perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"DocSplit 啟動失敗/DocSplit failed to start:\n{proc.stderr[-2000:]}")
+    report = json.loads(proc.stdout.strip().splitlines()[-1])
+    report['importtime'] = importtime_total(proc.stderr)
+    report['process'] = elapsed
+    return report
+
+
+def measure(repeat=3):
+    """回傳 [{'case', 'seconds', 'loaded'}]，各項取最短時間"""
+    runs = [launch() for _ in range(repeat)]
+    loaded = sorted({m for run in runs for m in run['loaded']})
+    cases = (('import DocSplit', 'importtime'), ('first window', 'window'), ('process to window', 'process'))
+    return [{'case': case, 'seconds': min(run[key] for run in runs), 'loaded': loaded}
+            for case, key in cases]
+
+
+def violations(results, budget_ms=IMPORT_BUDGET_MS):
+    """回傳違反啟動預算的說明列表"""
+    problems = []
+    for result in results:
+        if result['case'] == 'import DocSplit' and result['seconds'] * 1000 > budget_ms:
+            problems.append(f"import DocSplit {result['seconds'] * 1000:.0f} ms > {budget_ms} ms")
+    loaded = results[0]['loaded'] if results else []
+    if loaded:
+        problems.append(f"loaded before opening a file: {', '.join(loaded)}")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help="啟動次數，取最短時間")
+    parser.add_argument('--budget-ms', type=float, default=IMPORT_BUDGET_MS,
+                        help="import DocSplit 的累計耗時上限（毫秒）")
+    parser.add_argument('--json', help="將結果寫入 JSON 檔")
+    args = parser.parse_args(argv)
+
+    results = measure(args.repeat)
+    for result in results:
+        print(f"{result['case']:<20} {result['seconds'] * 1000:8.1f} ms")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'budget_ms': args.budget_ms, 'results': results}, f, indent=2)
+    problems = violations(results, args.budget_ms)
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
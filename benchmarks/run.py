@@ -0,0 +1,378 @@
+"""DocSplit 基準測試套件。
+
+以合成文件（10、1k、10k 頁；文字、影像、向量三種）測量各熱點路徑：
+ThumbnailWorker 縮圖渲染、選取操作、匯出 PDF（export_to_pdf 使用的
+rebuild_document）、依規則拆分為多個檔案、列印的 N-up 與直接列印路徑、PPTX 子集匯出、
+Office 轉換器與程式啟動時間。不需要顯示器（Qt 使用 offscreen 平台），結果輸出為 JSON，
+可用 --compare 與其他版本的結果比較。
+
+    python benchmarks/run.py --sizes 10,1000 --json results.json
+    python benchmarks/run.py --suites render,export --compare baseline.json
+"""
+import os
+import sys
+import json
+import random
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+from time import perf_counter
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fitz
+
+import synth
+import bench_convert
+import bench_impose
+import bench_startup
+
+
+SUITES = ('render', 'select', 'export', 'split', 'nup', 'print', 'pptx', 'convert', 'startup')
+DEFAULT_SIZES = (10, 1000, 10000)
+# 逐頁點陣化到印表機很慢，直接列印只測前幾頁
+PRINT_PAGES = 50
+PRINT_DPI = 150
+NUP_COUNTS = (1, 4, 9)
+
+
+def best_of(repeat, func):
+    """執行 repeat 次，回傳 (最短秒數, 最後一次的回傳值)"""
+    best = None
+    value = None
+    for _ in range(repeat):
+        start = perf_counter()
+        value = func()
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, value
+
+
+def render_thumbnails(path, workers, cache=None):
+    """以 ThumbnailWorker 渲染所有頁面（在目前執行緒同步執行），回傳縮圖數"""
+    import DocSplit
+    import docsplit_dedupe
+
+    hashes = docsplit_dedupe.PageHashes()
+    worker = DocSplit.ThumbnailWorker(path, None, cache=cache, workers=workers, hashes=hashes,
+                                      exit_when_idle=True)
+    state = {'done': 0}
+
+    def thumbnail_ready(index, thumbnail):
+        state['done'] += 1
+
+    worker.thumbnail_ready.connect(thumbnail_ready)
+    worker.run()
+    return state['done']
+
+
+def suite_render(path, args, temp_dir):
+    import docsplit_cache
+
+    results = []
+    seconds, count = best_of(args.repeat, lambda: render_thumbnails(path, args.render_workers))
+    results.append({'case': 'thumbnails', 'seconds': seconds, 'items': count})
+
+    cache = docsplit_cache.ThumbnailCache(os.path.join(temp_dir, 'cache'))
+    seconds, _ = best_of(1, lambda: render_thumbnails(path, args.render_workers, cache))
+    results.append({'case': 'thumbnails+cache-write', 'seconds': seconds})
+    seconds, _ = best_of(args.repeat, lambda: render_thumbnails(path, args.render_workers, cache))
+    results.append({'case': 'thumbnails-cached', 'seconds': seconds})
+    return results
+
+
+def suite_select(pages, args):
+    import numpy as np
+    import docsplit_selection
+    import docsplit_dedupe
+
+    selection = docsplit_selection.PageSelection(pages)
+    rng = random.Random(0)
+    clicks = [rng.randrange(pages) for _ in range(1000)]
+    spec = f"1-{max(1, pages // 2)},{pages // 2 + 2}-" if pages > 2 else "1-"
+
+    def clicking():
+        for index in clicks:
+            selection.click(index)
+        return len(selection)
+
+    hashes = np.random.default_rng(0).integers(0, 2 ** 63, pages, dtype=np.uint64)
+    cases = [
+        ('select-all', selection.select_all),
+        ('invert', selection.invert),
+        ('range-expression', lambda: selection.select_expression(spec)),
+        ('1000-clicks', clicking),
+        ('indexes', selection.indexes),
+        ('clear', selection.clear),
+        ('select-unique', lambda: docsplit_dedupe.unique_pages(docsplit_dedupe.duplicate_of(hashes))),
+    ]
+    results = []
+    for case, func in cases:
+        seconds, _ = best_of(args.repeat, func)
+        results.append({'case': case, 'seconds': seconds})
+    return results
+
+
+def suite_export(path, pages, args, temp_dir):
+    import docsplit_core
+    import docsplit_optimize
+
+    out_path = os.path.join(temp_dir, 'export.pdf')
+    selections = {
+        'every-other': range(0, pages, 2),
+        'first-tenth': range(max(1, pages // 10)),
+    }
+    results = []
+    for name, indexes in selections.items():
+        for preset in ('fast', 'compact'):
+            seconds, result = best_of(args.repeat, lambda: docsplit_core.rebuild_document(
+                path, indexes, out_path, preset=preset))
+            results.append({'case': f'{name}/{preset}', 'seconds': seconds,
+                            'method': result.method, 'bytes': result.size})
+    # 匯出時縮小並重新壓縮影像（email 預設）
+    images = docsplit_optimize.IMAGE_PRESETS['email']._replace(workers=args.render_workers)
+    seconds, result = best_of(args.repeat, lambda: docsplit_core.rebuild_document(
+        path, selections['every-other'], out_path, preset='compact', images=images))
+    results.append({'case': 'every-other/compact+email', 'seconds': seconds, 'method': result.method,
+                    'bytes': result.size, 'image_bytes_saved': result.images.bytes_before - result.images.bytes_after})
+    return results
+
+
+def suite_split(path, pages, args, temp_dir):
+    """每 2 頁拆分為一個檔案（例如逐客戶對帳單），所有輸出共用一份已解析的來源"""
+    import shutil
+    import docsplit_split
+
+    out_dir = os.path.join(temp_dir, 'split')
+    results = []
+    for workers in sorted({1, args.render_workers}):
+        def split():
+            shutil.rmtree(out_dir, ignore_errors=True)
+            return docsplit_split.split_pdf(path, docsplit_split.SplitRule(docsplit_split.EVERY, 2),
+                                            out_dir, workers=workers)
+
+        seconds, result = best_of(args.repeat, split)
+        results.append({'case': f'every-2/workers={workers}', 'seconds': seconds,
+                        'files': len(result.outputs), 'bytes': result.size})
+    return results
+
+
+def suite_nup(path, pages, args):
+    """print_document 交給檢視器的路徑：在記憶體中組成列印文件並序列化"""
+    import docsplit_core
+    import docsplit_impose
+    import docsplit_print
+
+    results = []
+    with fitz.open(path) as src:
+        indexes = range(src.page_count)
+        for count in NUP_COUNTS:
+            layout = None if count == 1 else docsplit_impose.ImpositionLayout.for_count(count)
+
+            def build():
+                doc = docsplit_print.build_print_document(src, indexes, layout)
+                try:
+                    return docsplit_core.pdf_bytes(doc, prune=True)[0]
+                finally:
+                    doc.close()
+
+            seconds, data = best_of(args.repeat, build)
+            results.append({'case': f'{count}-up', 'seconds': seconds, 'bytes': len(data)})
+
+        if args.legacy:
+            seconds, _ = best_of(1, lambda: bench_impose.legacy_nup(src, 3, 3).close())
+            results.append({'case': '9-up-legacy', 'seconds': seconds})
+    return results
+
+
+def suite_print(path, args, temp_dir):
+    """print_document 直接列印的路徑：逐頁點陣化後畫到 QPrinter（輸出成 PDF 檔）"""
+    from PySide6.QtPrintSupport import QPrinter
+    import docsplit_print
+
+    results = []
+    with fitz.open(path) as src:
+        pages = min(PRINT_PAGES, src.page_count)
+        for count in (1, 4):
+            layout = None
+            if count > 1:
+                import docsplit_impose
+                layout = docsplit_impose.ImpositionLayout.for_count(count)
+
+            def run():
+                printer = QPrinter(QPrinter.HighResolution)
+                printer.setOutputFormat(QPrinter.PdfFormat)
+                printer.setOutputFileName(os.path.join(temp_dir, 'printed.pdf'))
+                doc = docsplit_print.build_print_document(src, range(pages), layout)
+                try:
+                    return docsplit_print.print_pages(doc, printer, PRINT_DPI)
+                finally:
+                    doc.close()
+
+            seconds, sheets = best_of(args.repeat, run)
+            results.append({'case': f'{count}-up@{PRINT_DPI}dpi', 'seconds': seconds,
+                            'source_pages': pages, 'sheets': sheets})
+    return results
+
+
+def suite_pptx(path, pages, args, temp_dir):
+    import docsplit_pptx
+
+    out_path = os.path.join(temp_dir, 'subset.pptx')
+    results = []
+    seconds, _ = best_of(args.repeat, lambda: docsplit_pptx.slide_count(path))
+    results.append({'case': 'slide-count', 'seconds': seconds})
+    for name, indexes in (('every-other', range(0, pages, 2)), ('first-tenth', range(max(1, pages // 10)))):
+        seconds, _ = best_of(args.repeat, lambda: docsplit_pptx.subset_pptx(path, indexes, out_path))
+        results.append({'case': f'subset/{name}', 'seconds': seconds,
+                        'bytes': os.path.getsize(out_path)})
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment(args):
+    import PySide6
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'pymupdf': fitz.VersionBind,
+        'pyside6': PySide6.__version__,
+        'render_workers': args.render_workers,
+        'repeat': args.repeat,
+    }
+
+
+def result_key(result):
+    return (result['suite'], result['case'], result.get('kind'), result.get('pages'))
+
+
+def compare(results, baseline_path, max_ratio):
+    """與基準結果比較，回傳超過 max_ratio 倍的項目數"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {result_key(r): r for r in json.load(f)['results']}
+    regressions = 0
+    print(f"\n{'suite/case':<44} {'kind':<7} {'pages':>6} {'base':>9} {'now':>9} {'ratio':>6}")
+    for result in results:
+        old = baseline.get(result_key(result))
+        if not old or not old['seconds']:
+            continue
+        ratio = result['seconds'] / old['seconds']
+        flag = ''
+        # 極短的項目受計時誤差影響，不列入退步
+        if ratio > max_ratio and result['seconds'] > 0.005:
+            regressions += 1
+            flag = '  REGRESSION'
+        print(f"{result['suite'] + '/' + result['case']:<44} {result.get('kind') or '-':<7} "
+              f"{result.get('pages') or '-':>6} {old['seconds']:9.4f} {result['seconds']:9.4f} "
+              f"{ratio:6.2f}{flag}")
+    return regressions
+
+
+def run(args):
+    results = []
+
+    def record(suite, items, **labels):
+        for item in items:
+            item = {'suite': suite, **labels, **item}
+            item['seconds'] = round(item['seconds'], 6)
+            results.append(item)
+            label = f"{suite}/{item['case']}"
+            print(f"{label:<44} {labels.get('kind') or '-':<7} {labels.get('pages') or '-':>6} "
+                  f"{item['seconds']:10.4f}s", flush=True)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for pages in args.sizes:
+            if 'select' in args.suites:
+                record('select', suite_select(pages, args), pages=pages)
+            for kind in args.kinds:
+                pdf_suites = {'render', 'export', 'split', 'nup', 'print'} & set(args.suites)
+                if pdf_suites:
+                    path = synth.synthetic(kind, pages, 'pdf', args.data_dir)
+                    if 'render' in args.suites:
+                        record('render', suite_render(path, args, temp_dir), kind=kind, pages=pages)
+                    if 'export' in args.suites:
+                        record('export', suite_export(path, pages, args, temp_dir), kind=kind, pages=pages)
+                    if 'split' in args.suites:
+                        record('split', suite_split(path, pages, args, temp_dir), kind=kind, pages=pages)
+                    if 'nup' in args.suites:
+                        record('nup', suite_nup(path, pages, args), kind=kind, pages=pages)
+                    if 'print' in args.suites:
+                        record('print', suite_print(path, args, temp_dir), kind=kind, pages=pages)
+                if 'pptx' in args.suites and pages <= args.max_pptx_slides:
+                    path = synth.synthetic(kind, pages, 'pptx', args.data_dir)
+                    record('pptx', suite_pptx(path, pages, args, temp_dir), kind=kind, pages=pages)
+
+        if 'convert' in args.suites:
+            record('convert', bench_convert.measure(args.convert_startup, 0.05, 10))
+        if 'startup' in args.suites:
+            record('startup', bench_startup.measure(args.repeat))
+    return results
+
+
+def parse_list(value, convert=str):
+    return tuple(convert(item) for item in value.split(',') if item)
+
+
+def main(argv=None):
+    import docsplit_render
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=lambda v: parse_list(v, int), default=DEFAULT_SIZES,
+                        help="頁數，以逗號分隔（預設 10,1000,10000）")
+    parser.add_argument('--kinds', type=parse_list, default=synth.KINDS,
+                        help="文件種類：text,image,vector")
+    parser.add_argument('--suites', type=parse_list, default=SUITES,
+                        help=f"要執行的項目：{','.join(SUITES)}")
+    parser.add_argument('--repeat', type=int, default=3, help="每項執行次數，取最短時間")
+    parser.add_argument('--render-workers', type=int, default=docsplit_render.default_workers())
+    parser.add_argument('--max-pptx-slides', type=int, default=1000,
+                        help="PPTX 以 python-pptx 產生，超過此張數時略過")
+    parser.add_argument('--convert-startup', type=float, default=0.5, help="模擬的 Office 啟動秒數")
+    parser.add_argument('--legacy', action='store_true', help="同時測量重構前的 9-up 做法")
+    parser.add_argument('--startup-budget-ms', type=float, default=bench_startup.IMPORT_BUDGET_MS,
+                        help="import DocSplit 的累計耗時上限（毫秒），超過時回傳非零結束碼")
+    parser.add_argument('--data-dir', help="合成文件的保存目錄（重複使用）")
+    parser.add_argument('--json', help="將結果寫入 JSON 檔")
+    parser.add_argument('--compare', help="與先前輸出的 JSON 比較")
+    parser.add_argument('--max-ratio', type=float, default=1.25,
+                        help="--compare 時，比基準慢超過此倍數即回傳非零結束碼")
+    args = parser.parse_args(argv)
+    unknown = set(args.suites) - set(SUITES) or set(args.kinds) - set(synth.KINDS)
+    if unknown:
+        parser.error(f"未知的項目/Unknown item: {', '.join(sorted(unknown))}")
+
+    from PySide6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+
+    results = run(args)
+    report = {'environment': environment(args), 'results': results}
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    status = 0
+    startup = [r for r in results if r['suite'] == 'startup']
+    for problem in bench_startup.violations(startup, args.startup_budget_ms) if startup else []:
+        print(f"FAIL: {problem}")
+        status = 1
+    if args.compare and compare(results, args.compare, args.max_ratio):
+        status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
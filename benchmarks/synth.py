@@ -0,0 +1,161 @@
+"""基準測試用的合成文件。
+
+產生固定內容（固定亂數種子）的 PDF 與 PPTX，分為三種：
+text（每頁大量文字）、image（每頁數張點陣影像）、vector（每頁大量向量路徑）。
+產生過的檔案依種類、頁數與產生器版本保存在資料目錄中重複使用。
+
+    python benchmarks/synth.py --pages 1000 --kind image
+"""
+import io
+import os
+import random
+import argparse
+import tempfile
+
+import fitz
+
+
+KINDS = ('text', 'image', 'vector')
+# 產生內容改變時遞增，避免重複使用舊的檔案
+GENERATOR_VERSION = 1
+SLIDE_SIZE = (960, 540)
+# 影像種類共用的不同影像數；每頁引用其中幾張
+IMAGE_VARIANTS = 16
+
+_WORDS = ("quarterly revenue forecast budget review summary appendix figure table "
+          "營收 報告 季度 合約 預算 會議 紀錄").split()
+
+
+def default_data_dir():
+    return os.path.join(tempfile.gettempdir(), 'docsplit-bench')
+
+
+def _lines(rng, count, words=12):
+    return [" ".join(rng.choice(_WORDS) for _ in range(words)) for _ in range(count)]
+
+
+def _noise_images(rng, count, size=(320, 180)):
+    """產生 count 張不同的 PNG（漸層加雜訊，不易壓縮）"""
+    images = []
+    for n in range(count):
+        samples = bytearray(size[0] * size[1] * 3)
+        base = rng.randrange(256)
+        for i in range(0, len(samples), 3):
+            value = (base + i // 3 % size[0] + rng.randrange(48)) & 0xFF
+            samples[i] = value
+            samples[i + 1] = (value * 3 + n * 17) & 0xFF
+            samples[i + 2] = (255 - value) & 0xFF
+        pix = fitz.Pixmap(fitz.csRGB, size[0], size[1], bytes(samples), False)
+        images.append(pix.tobytes("png"))
+    return images
+
+
+def _draw_text(page, rng, number):
+    page.insert_text((40, 50), f"Page {number + 1}", fontsize=28)
+    page.insert_text((40, 80), _lines(rng, 26), fontsize=9, lineheight=1.6)
+
+
+def _draw_vector(page, rng, number):
+    page.insert_text((40, 50), f"Page {number + 1}", fontsize=28)
+    shape = page.new_shape()
+    width, height = page.rect.width, page.rect.height
+    for _ in range(120):
+        points = [fitz.Point(rng.uniform(0, width), rng.uniform(60, height)) for _ in range(4)]
+        shape.draw_bezier(*points)
+        shape.finish(color=(rng.random(), rng.random(), rng.random()), width=0.6)
+    for _ in range(40):
+        x, y = rng.uniform(0, width - 80), rng.uniform(60, height - 60)
+        shape.draw_rect(fitz.Rect(x, y, x + rng.uniform(10, 80), y + rng.uniform(10, 60)))
+        shape.finish(fill=(rng.random(), rng.random(), rng.random()), fill_opacity=0.5)
+    shape.commit()
+
+
+def make_pdf(path, pages, kind='text', seed=0):
+    """產生 pages 頁的 16:9 合成 PDF"""
+    if kind not in KINDS:
+        raise ValueError(f"未知的種類/Unknown kind: {kind}")
+    rng = random.Random(seed)
+    doc = fitz.open()
+    images = _noise_images(rng, IMAGE_VARIANTS) if kind == 'image' else None
+    image_xrefs = {}
+    for number in range(pages):
+        page = doc.new_page(width=SLIDE_SIZE[0], height=SLIDE_SIZE[1])
+        if kind == 'text':
+            _draw_text(page, rng, number)
+        elif kind == 'vector':
+            _draw_vector(page, rng, number)
+        else:
+            page.insert_text((40, 50), f"Page {number + 1}", fontsize=28)
+            for slot in range(4):
+                variant = (number * 4 + slot) % IMAGE_VARIANTS
+                rect = fitz.Rect(40 + slot % 2 * 450, 70 + slot // 2 * 230, 0, 0)
+                rect.x1, rect.y1 = rect.x0 + 420, rect.y0 + 220
+                # 同一張影像只嵌入一次，之後以 xref 引用
+                if variant in image_xrefs:
+                    page.insert_image(rect, xref=image_xrefs[variant])
+                else:
+                    image_xrefs[variant] = page.insert_image(rect, stream=images[variant])
+    doc.save(path, garbage=1, deflate=True)
+    doc.close()
+    return path
+
+
+def make_pptx(path, slides, kind='text', seed=0):
+    """以 python-pptx 產生 slides 張投影片的合成 PPTX"""
+    from pptx import Presentation
+    from pptx.util import Emu, Pt
+    from pptx.enum.shapes import MSO_SHAPE
+
+    rng = random.Random(seed)
+    prs = Presentation()
+    prs.slide_width, prs.slide_height = Emu(12192000), Emu(6858000)
+    layout = prs.slide_layouts[6]
+    images = _noise_images(rng, IMAGE_VARIANTS) if kind == 'image' else None
+    for number in range(slides):
+        slide = prs.slides.add_slide(layout)
+        title = slide.shapes.add_textbox(Emu(500000), Emu(300000), Emu(11000000), Emu(700000))
+        title.text_frame.text = f"Slide {number + 1}"
+        title.text_frame.paragraphs[0].runs[0].font.size = Pt(32)
+        if kind == 'text':
+            body = slide.shapes.add_textbox(Emu(500000), Emu(1100000), Emu(11000000), Emu(5200000))
+            body.text_frame.text = "\n".join(_lines(rng, 14))
+        elif kind == 'vector':
+            for _ in range(40):
+                shape = slide.shapes.add_shape(
+                    MSO_SHAPE.OVAL, Emu(rng.randrange(0, 11000000)), Emu(rng.randrange(1000000, 6000000)),
+                    Emu(rng.randrange(100000, 1200000)), Emu(rng.randrange(100000, 800000)))
+                shape.line.width = Pt(0.5)
+        else:
+            for slot in range(2):
+                variant = (number * 2 + slot) % IMAGE_VARIANTS
+                slide.shapes.add_picture(io.BytesIO(images[variant]), Emu(500000 + slot * 5700000),
+                                         Emu(1400000), width=Emu(5400000))
+        slide.notes_slide.notes_text_frame.text = f"Notes for slide {number + 1}"
+    prs.save(path)
+    return path
+
+
+def synthetic(kind, pages, fmt='pdf', data_dir=None):
+    """回傳合成文件路徑；尚未產生時才產生"""
+    data_dir = data_dir or default_data_dir()
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"{kind}_{pages}_v{GENERATOR_VERSION}.{fmt}")
+    if not os.path.exists(path):
+        temp_path = f"{path}.{os.getpid()}.tmp.{fmt}"
+        (make_pdf if fmt == 'pdf' else make_pptx)(temp_path, pages, kind)
+        os.replace(temp_path, path)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=1000)
+    parser.add_argument('--kind', choices=KINDS, default='text')
+    parser.add_argument('--format', choices=('pdf', 'pptx'), default='pdf')
+    parser.add_argument('--data-dir', help="合成文件的保存目錄")
+    args = parser.parse_args(argv)
+    print(synthetic(args.kind, args.pages, args.format, args.data_dir))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""縮圖與轉檔結果的永久磁碟快取。
+
+以檔案內容雜湊、頁碼與渲染規格（縮放比例或目標尺寸字串）為鍵，縮圖存為 PNG；
+Word 等 Office 文件轉出的 PDF 以來源內容雜湊為鍵保存。總容量超過上限時，
+依最近使用時間（檔案 mtime）淘汰最舊的項目。本模組不依賴 Qt。
+"""
+import os
+import json
+import hashlib
+import threading
+
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_CONVERSION_MAX_BYTES = 1024 * 1024 * 1024
+# 淘汰時清到上限的比例，避免每次寫入都觸發掃描
+EVICT_TARGET_RATIO = 0.9
+HASH_CHUNK_SIZE = 1024 * 1024
+# 超過此大小的檔案（數 GB 的掃描封存等）只讀取檔頭、檔尾與均勻分布的取樣區塊，
+# 完整讀取需要數秒到數十秒，第一張縮圖必須等它完成
+SAMPLED_HASH_MIN_BYTES = 256 * 1024 * 1024
+HASH_SAMPLES = 64
+HASH_SAMPLE_SIZE = 256 * 1024
+
+_hash_memo = {}
+_hash_lock = threading.Lock()
+
+
+def default_cache_dir():
+    """Windows 使用 %LOCALAPPDATA%，其他平台使用 XDG 快取目錄"""
+    base = os.environ.get('LOCALAPPDATA') if os.name == 'nt' else os.environ.get('XDG_CACHE_HOME')
+    if not base:
+        base = os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'DocSplit')
+
+
+def _sample_offsets(size):
+    """取樣雜湊讀取的 (位移, 長度)：檔頭、均勻分布的區塊與檔尾"""
+    spans = [(0, HASH_CHUNK_SIZE)]
+    step = (size - 2 * HASH_CHUNK_SIZE) // (HASH_SAMPLES + 1)
+    spans += [(HASH_CHUNK_SIZE + step * (n + 1), HASH_SAMPLE_SIZE) for n in range(HASH_SAMPLES)]
+    spans.append((size - HASH_CHUNK_SIZE, HASH_CHUNK_SIZE))
+    return spans
+
+
+def file_hash(path, progress=None):
+    """計算檔案內容雜湊；同一行程內以 (路徑, 大小, mtime) 記憶結果。
+
+    超過 SAMPLED_HASH_MIN_BYTES 的檔案以大小、修改時間（st_mtime_ns）與取樣區塊
+    計算。取樣無法察覺未讀到的位置被原地改寫（例如工具直接修補影像串流而大小
+    不變），因此加入修改時間：檔案被寫入後雜湊即改變，代價是只被複製或 touch
+    的檔案也會重新產生縮圖與索引。progress(已讀位元組, 總位元組) 在每讀完一個
+    區塊後呼叫。
+    """
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    with _hash_lock:
+        cached = _hash_memo.get(memo_key)
+    if cached:
+        return cached
+
+    h = hashlib.blake2b(digest_size=20)
+    done = 0
+    with open(path, 'rb') as f:
+        if st.st_size >= SAMPLED_HASH_MIN_BYTES:
+            h.update(b"sampled:%d:%d" % (st.st_size, st.st_mtime_ns))
+            spans = _sample_offsets(st.st_size)
+            total = sum(length for _, length in spans)
+            for offset, length in spans:
+                f.seek(offset)
+                h.update(f.read(length))
+                if progress:
+                    done += length
+                    progress(done, total)
+        else:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                h.update(chunk)
+                if progress:
+                    done += len(chunk)
+                    progress(done, st.st_size)
+    digest = h.hexdigest()
+
+    with _hash_lock:
+        _hash_memo[memo_key] = digest
+    return digest
+
+
+class _DiskCache:
+    """具容量上限的快取目錄：原子寫入，並依最近使用時間淘汰"""
+
+    subdir = None
+    # 計入容量並參與淘汰的檔案副檔名（可為 tuple）
+    suffix = None
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = os.path.join(cache_dir or default_cache_dir(), self.subdir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = None
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _touch(self, path):
+        # 更新 mtime 作為最近使用時間
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _added(self, size):
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_size()
+            else:
+                self._total_bytes += size
+            over_limit = self._total_bytes > self.max_bytes
+        if over_limit:
+            self.evict()
+
+    def _temp_path(self, path):
+        return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    def _replace(self, temp_path, path):
+        """將暫存檔搬到 path，回傳總容量的增加量（覆寫既有項目時扣除舊檔大小）"""
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        size = os.path.getsize(temp_path)
+        os.replace(temp_path, path)
+        return size - replaced
+
+    def _write_atomic(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = self._temp_path(path)
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        return self._replace(temp_path, path)
+
+    def _entries(self):
+        for sub in os.scandir(self.cache_dir):
+            if not sub.is_dir():
+                continue
+            for entry in os.scandir(sub.path):
+                if entry.name.endswith(self.suffix):
+                    yield entry
+
+    def _scan_size(self):
+        return sum(entry.stat().st_size for entry in self._entries())
+
+    def evict(self):
+        """刪除最久未使用的項目，直到總容量低於上限的 90%"""
+        with self._lock:
+            entries = []
+            for entry in self._entries():
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+            entries.sort()
+
+            total = sum(size for _, size, _ in entries)
+            target = self.max_bytes * EVICT_TARGET_RATIO
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+            self._total_bytes = total
+
+    def clear(self):
+        with self._lock:
+            for entry in list(self._entries()):
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+            self._total_bytes = 0
+
+
+class ThumbnailCache(_DiskCache):
+    """以內容雜湊為鍵、具容量上限與 LRU 淘汰的縮圖快取"""
+
+    subdir = 'thumbnails'
+    # 文件層級資料（<雜湊>.json）與縮圖一起計入容量、依最近使用時間淘汰
+    suffix = ('.png', '.json')
+
+    def _entry_path(self, content_hash, page_index, scale):
+        variant = f"{scale:g}" if isinstance(scale, (int, float)) else str(scale)
+        return os.path.join(self.cache_dir, content_hash[:2], f"{content_hash}_{page_index}_{variant}.png")
+
+    def _meta_path(self, content_hash):
+        return os.path.join(self.cache_dir, content_hash[:2], f"{content_hash}.json")
+
+    def get(self, content_hash, page_index, scale):
+        """回傳 PNG 位元組，未命中回傳 None"""
+        path = self._entry_path(content_hash, page_index, scale)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        self._touch(path)
+        return data
+
+    def put(self, content_hash, page_index, scale, data):
+        path = self._entry_path(content_hash, page_index, scale)
+        self._added(self._write_atomic(path, data))
+
+    def get_meta(self, content_hash):
+        """取得文件層級資料（例如頁數），未命中回傳 None"""
+        path = self._meta_path(content_hash)
+        try:
+            with open(path, encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self._touch(path)
+        return meta
+
+    def put_meta(self, content_hash, meta):
+        data = json.dumps(meta).encode('utf-8')
+        self._added(self._write_atomic(self._meta_path(content_hash), data))
+
+    def has_pages(self, content_hash, page_count, scale):
+        """檢查文件所有頁面是否都已在快取中"""
+        return all(
+            os.path.exists(self._entry_path(content_hash, i, scale))
+            for i in range(page_count)
+        )
+
+
+class ConversionCache(_DiskCache):
+    """Office 文件轉出的 PDF 快取。
+
+    以來源內容雜湊為鍵：重新開啟未修改的文件直接使用上次的 PDF；雜湊依
+    (路徑, 大小, mtime) 記憶，未修改的檔案不必重新讀取。
+    """
+
+    subdir = 'converted'
+    suffix = '.pdf'
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_CONVERSION_MAX_BYTES):
+        super().__init__(cache_dir, max_bytes)
+
+    def _entry_path(self, content_hash):
+        return os.path.join(self.cache_dir, content_hash[:2], f"{content_hash}.pdf")
+
+    def get(self, content_hash):
+        """回傳快取的 PDF 路徑，未命中回傳 None"""
+        path = self._entry_path(content_hash)
+        if not os.path.exists(path):
+            return None
+        self._touch(path)
+        return path
+
+    def convert(self, src_path, convert, token=None, progress=None):
+        """回傳 src_path 轉出的 PDF 路徑；未命中時以 convert(來源, 輸出, token) 轉檔。
+
+        轉檔寫入此行程、執行緒專用的暫存檔再原子搬移，多個視窗同時轉換
+        同一份文件也不會互相覆寫。
+        """
+        content_hash = file_hash(src_path, progress)
+        path = self.get(content_hash)
+        if path:
+            return path
+
+        os.makedirs(os.path.dirname(self._entry_path(content_hash)), exist_ok=True)
+        path = self._entry_path(content_hash)
+        temp_path = self._temp_path(path) + '.pdf'
+        try:
+            convert(src_path, temp_path, token)
+            # 其他視窗可能已轉好同一份文件，覆寫時只計入大小差
+            size = self._replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        self._added(size)
+        return path
+
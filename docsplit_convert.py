@@ -0,0 +1,625 @@
+"""Office 轉換後端與常駐的轉換行程池。
+
+ConverterBackend 定義文件轉換的介面（開啟、渲染單頁、匯出子集、轉 PDF）：
+OfficeBackend 透過 COM 操作 Word/PowerPoint，並讓應用程式與開啟的文件常駐，
+不必每次操作都啟動再結束 Office；FakeBackend 以 PyMuPDF 產生內容固定的頁面，
+讓整個流程可以在 Linux 上測試與量測。
+
+ConverterPool 在常駐的子行程中執行後端，多次請求共用同一個 Office；子行程
+當掉、失去回應或逾時時會自動重新啟動。本模組不依賴 Qt。
+"""
+import os
+import time
+import queue
+import shutil
+import tempfile
+import threading
+import multiprocessing
+import multiprocessing.util
+from collections import OrderedDict
+
+from docsplit_jobs import CancelledError, check
+
+
+PPT_EXTS = ('.ppt', '.pptx')
+WORD_EXTS = ('.doc', '.docx')
+
+# PowerPoint / Word SaveAs 的格式代碼
+PP_SAVE_AS_PRESENTATION = 1
+PP_SAVE_AS_PPTX = 24
+PP_SAVE_AS_PDF = 32
+WD_FORMAT_PDF = 17
+
+# 後端同時保持開啟的文件數
+MAX_OPEN_DOCUMENTS = 4
+
+DEFAULT_CALL_TIMEOUT = 300
+DEFAULT_START_TIMEOUT = 120
+# 閒置超過此秒數的子行程在下次使用前先確認仍有回應
+PING_AFTER_IDLE = 30
+PING_TIMEOUT = 10
+
+# 設為 fake 時使用 FakeBackend（例如在 Linux 上測試）
+BACKEND_ENV = "DOCSPLIT_CONVERTER"
+
+
+class ConverterError(Exception):
+    """轉換失敗，或轉換行程當掉、逾時"""
+
+
+def _is_ppt(path):
+    return path.lower().endswith(PPT_EXTS)
+
+
+class ConverterBackend:
+    """轉換後端介面；頁碼皆為 0 起算"""
+
+    def open(self, path):
+        """開啟文件（後端可保持開啟供後續請求使用），回傳頁數"""
+        raise NotImplementedError
+
+    def render_page(self, path, index, width, height):
+        """將單頁渲染為指定大小的 PNG，回傳位元組"""
+        raise NotImplementedError
+
+    def export_subset(self, path, indexes, out_path):
+        """將選定頁面另存為同格式的新文件"""
+        raise NotImplementedError
+
+    def to_pdf(self, path, out_path, indexes=None):
+        """將文件（或選定頁面）轉為 PDF"""
+        raise NotImplementedError
+
+    def close(self, path):
+        """關閉已開啟的文件"""
+
+    def ping(self):
+        """健康檢查；後端失去回應時引發例外"""
+        return True
+
+    def shutdown(self):
+        """釋放後端資源"""
+
+
+class OfficeBackend(ConverterBackend):
+    """透過 COM 的 Word/PowerPoint 後端；應用程式在第一次需要時啟動並常駐"""
+
+    def __init__(self, max_open=MAX_OPEN_DOCUMENTS):
+        import pythoncom
+        import win32com.client
+
+        pythoncom.CoInitialize()
+        self._client = win32com.client
+        self._word = None
+        self._powerpoint = None
+        self._documents = OrderedDict()
+        self.max_open = max_open
+        self.temp_dir = tempfile.mkdtemp(prefix="docsplit_office_")
+
+    def _app(self, path):
+        if _is_ppt(path):
+            if self._powerpoint is None:
+                self._powerpoint = self._client.DispatchEx('PowerPoint.Application')
+            return self._powerpoint
+        if self._word is None:
+            self._word = self._client.DispatchEx('Word.Application')
+            self._word.Visible = False
+            self._word.DisplayAlerts = 0
+        return self._word
+
+    def _document(self, path):
+        """取得已開啟的文件；檔案在開啟後被修改時重新開啟"""
+        path = os.path.abspath(path)
+        mtime = os.path.getmtime(path)
+        entry = self._documents.get(path)
+        if entry is not None:
+            if entry[0] == mtime:
+                self._documents.move_to_end(path)
+                return entry[1]
+            self.close(path)
+
+        app = self._app(path)
+        if _is_ppt(path):
+            document = app.Presentations.Open(path, ReadOnly=True, Untitled=False, WithWindow=False)
+        else:
+            document = app.Documents.Open(path, ReadOnly=True, AddToRecentFiles=False, Visible=False)
+        self._documents[path] = (mtime, document)
+        while len(self._documents) > self.max_open:
+            self.close(next(iter(self._documents)))
+        return document
+
+    def open(self, path):
+        document = self._document(path)
+        if _is_ppt(path):
+            return document.Slides.Count
+        return document.ComputeStatistics(2)  # wdStatisticPages
+
+    def render_page(self, path, index, width, height):
+        if not _is_ppt(path):
+            raise ConverterError("Word 文件請先轉為 PDF 再渲染/Convert Word documents to PDF first")
+        temp_path = os.path.join(self.temp_dir, f"slide_{index}.png")
+        self._document(path).Slides.Item(index + 1).Export(temp_path, "PNG", width, height)
+        try:
+            with open(temp_path, 'rb') as f:
+                return f.read()
+        finally:
+            os.remove(temp_path)
+
+    def _subset_copy(self, path, indexes, copy_path):
+        """另存投影片副本並刪除未選的投影片，回傳已開啟的副本"""
+        fmt = PP_SAVE_AS_PPTX if copy_path.lower().endswith('.pptx') else PP_SAVE_AS_PRESENTATION
+        self._document(path).SaveCopyAs(copy_path, fmt)
+        copy = self._powerpoint.Presentations.Open(copy_path, ReadOnly=False, Untitled=False, WithWindow=False)
+        keep = set(indexes)
+        # 由後往前刪除，前面投影片的編號不受影響
+        for index in range(copy.Slides.Count - 1, -1, -1):
+            if index not in keep:
+                copy.Slides.Item(index + 1).Delete()
+        return copy
+
+    def export_subset(self, path, indexes, out_path):
+        if not _is_ppt(path):
+            raise ConverterError("只支援 PowerPoint 文件/Only PowerPoint documents are supported")
+        out_path = os.path.abspath(out_path)
+        copy = self._subset_copy(path, indexes, out_path)
+        try:
+            copy.Save()
+        finally:
+            copy.Close()
+
+    def to_pdf(self, path, out_path, indexes=None):
+        out_path = os.path.abspath(out_path)
+        if not _is_ppt(path):
+            self._document(path).SaveAs(out_path, FileFormat=WD_FORMAT_PDF)
+            return
+        if indexes is None:
+            self._document(path).SaveAs(out_path, PP_SAVE_AS_PDF)
+            return
+        copy_path = os.path.join(self.temp_dir, "subset" + os.path.splitext(path)[1])
+        copy = self._subset_copy(path, indexes, copy_path)
+        try:
+            copy.SaveAs(out_path, PP_SAVE_AS_PDF)
+        finally:
+            copy.Close()
+            os.remove(copy_path)
+
+    def close(self, path):
+        entry = self._documents.pop(os.path.abspath(path), None)
+        if entry is not None:
+            try:
+                entry[1].Close()
+            except Exception:
+                pass
+
+    def ping(self):
+        # 呼叫任一屬性確認 COM 伺服器仍有回應
+        for app in (self._word, self._powerpoint):
+            if app is not None:
+                app.Version
+        return True
+
+    def shutdown(self):
+        for path in list(self._documents):
+            self.close(path)
+        for app in (self._word, self._powerpoint):
+            if app is not None:
+                try:
+                    app.Quit()
+                except Exception:
+                    pass
+        self._word = self._powerpoint = None
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+class FakeBackend(ConverterBackend):
+    """不需 Office 的可重現替身：以 PyMuPDF 產生標示檔名與頁碼的頁面。
+
+    pages 指定所有文件的頁數；未指定時 PPTX 讀取實際投影片數，其他文件為 3 頁。
+    startup_delay 與 delay 模擬 Office 啟動與每次操作的耗時，供基準測試使用。
+    """
+
+    SLIDE_SIZE = (960, 540)
+    PAGE_SIZE = (595, 842)
+
+    def __init__(self, pages=None, startup_delay=0.0, delay=0.0):
+        self.pages = pages
+        self.delay = delay
+        self.calls = 0
+        time.sleep(startup_delay)
+
+    def _tick(self):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+
+    def open(self, path):
+        self._tick()
+        if self.pages is not None:
+            return self.pages
+        if path.lower().endswith('.pptx'):
+            import docsplit_pptx
+            return docsplit_pptx.slide_count(path)
+        return 3
+
+    def _make_pdf(self, path, indexes):
+        import fitz
+
+        width, height = self.SLIDE_SIZE if _is_ppt(path) else self.PAGE_SIZE
+        doc = fitz.open()
+        name = os.path.basename(path)
+        for index in indexes:
+            page = doc.new_page(width=width, height=height)
+            page.insert_text((40, 80), f"{name}", fontsize=24)
+            page.insert_text((40, 130), f"{index + 1}", fontsize=48)
+        return doc
+
+    def render_page(self, path, index, width, height):
+        import fitz
+
+        self._tick()
+        doc = self._make_pdf(path, [index])
+        try:
+            page = doc[0]
+            scale = min(width / page.rect.width, height / page.rect.height)
+            return page.get_pixmap(matrix=fitz.Matrix(scale, scale)).tobytes("png")
+        finally:
+            doc.close()
+
+    def export_subset(self, path, indexes, out_path):
+        self._tick()
+        if not path.lower().endswith('.pptx'):
+            raise ConverterError("替身後端只支援 PPTX/The fake backend only supports PPTX")
+        import docsplit_pptx
+        docsplit_pptx.subset_pptx(path, indexes, out_path)
+
+    def to_pdf(self, path, out_path, indexes=None):
+        self._tick()
+        if indexes is None:
+            indexes = range(self.open(path))
+        doc = self._make_pdf(path, sorted(indexes))
+        try:
+            doc.save(out_path)
+        finally:
+            doc.close()
+
+
+def _worker_main(conn, backend_factory):
+    """轉換子行程：建立一次後端，之後依序處理請求直到收到 None"""
+    try:
+        backend = backend_factory()
+    except Exception as e:
+        conn.send(('error', f"{type(e).__name__}: {e}"))
+        return
+    conn.send(('ok', os.getpid()))
+    try:
+        while True:
+            try:
+                request = conn.recv()
+            except EOFError:
+                break
+            if request is None:
+                break
+            method, args, kwargs = request
+            try:
+                conn.send(('ok', getattr(backend, method)(*args, **kwargs)))
+            except ConverterError as e:
+                conn.send(('error', str(e)))
+            except Exception as e:
+                conn.send(('error', f"{type(e).__name__}: {e}"))
+    finally:
+        backend.shutdown()
+
+
+class _Worker:
+    """一個常駐的轉換子行程與其連線"""
+
+    def __init__(self, backend_factory, context, start_timeout):
+        self.backend_factory = backend_factory
+        self.context = context
+        self.start_timeout = start_timeout
+        self.process = None
+        self.conn = None
+        self.last_used = 0.0
+        self.start()
+
+    def start(self):
+        parent_conn, child_conn = self.context.Pipe()
+        self.process = self.context.Process(target=_worker_main, args=(child_conn, self.backend_factory),
+                                            daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        status, value = self._receive(self.start_timeout, None)
+        if status != 'ok':
+            self.kill()
+            raise ConverterError(f"轉換行程無法啟動/Converter failed to start: {value}")
+        self.last_used = time.monotonic()
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def _receive(self, timeout, token):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if token is not None and token.cancelled:
+                raise CancelledError()
+            try:
+                if self.conn.poll(0.05):
+                    return self.conn.recv()
+            except (EOFError, OSError):
+                raise ConverterError("轉換行程已結束/Converter process exited")
+            if not self.process.is_alive() and not self.conn.poll(0):
+                raise ConverterError("轉換行程已結束/Converter process exited")
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError()
+
+    def request(self, method, args, kwargs, timeout, token):
+        try:
+            self.conn.send((method, args, kwargs))
+        except (BrokenPipeError, OSError):
+            raise ConverterError("轉換行程已結束/Converter process exited")
+        try:
+            return self._receive(timeout, token)
+        finally:
+            self.last_used = time.monotonic()
+
+    def drain(self, timeout):
+        """讀掉已取消請求的回覆，讓子行程可以再次使用"""
+        try:
+            self._receive(timeout, None)
+            return True
+        except (ConverterError, TimeoutError):
+            return False
+
+    def stop(self, timeout=5):
+        if self.alive:
+            try:
+                self.conn.send(None)
+            except OSError:
+                pass
+            self.process.join(timeout)
+        self.kill()
+
+    def kill(self):
+        if self.alive:
+            self.process.kill()
+            self.process.join()
+        if self.conn is not None:
+            self.conn.close()
+
+
+class Converter:
+    """轉換器共同介面：以 call() 呼叫後端方法，並提供各方法的包裝"""
+
+    def call(self, method, *args, token=None, timeout=None, **kwargs):
+        raise NotImplementedError
+
+    def warm_up(self):
+        pass
+
+    def health_check(self):
+        return 0
+
+    def close(self):
+        pass
+
+    def open(self, path, token=None):
+        return self.call('open', path, token=token)
+
+    def render_page(self, path, index, width, height, token=None):
+        return self.call('render_page', path, index, width, height, token=token)
+
+    def export_subset(self, path, indexes, out_path, token=None):
+        return self.call('export_subset', path, list(indexes), out_path, token=token)
+
+    def to_pdf(self, path, out_path, indexes=None, token=None):
+        return self.call('to_pdf', path, out_path, None if indexes is None else list(indexes), token=token)
+
+    def close_document(self, path):
+        return self.call('close', path)
+
+
+class ConverterPool(Converter):
+    """常駐轉換子行程池；第一次使用時才啟動，之後跨請求重複使用"""
+
+    def __init__(self, backend_factory, workers=1, call_timeout=DEFAULT_CALL_TIMEOUT,
+                 start_timeout=DEFAULT_START_TIMEOUT):
+        self.backend_factory = backend_factory
+        self.size = workers
+        self.call_timeout = call_timeout
+        self.start_timeout = start_timeout
+        # Windows 只支援 spawn；其他平台也用 spawn，避免在子行程中複製 Qt 狀態
+        self._context = multiprocessing.get_context("spawn")
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._workers = []
+        self._closed = False
+        self.restarts = 0
+
+    def _acquire(self):
+        with self._lock:
+            if self._closed:
+                raise ConverterError("轉換行程池已關閉/Converter pool is closed")
+            if self._idle.empty() and len(self._workers) < self.size:
+                # 先佔位，啟動子行程不必持有鎖
+                self._workers.append(None)
+                slot = len(self._workers) - 1
+            else:
+                slot = None
+        if slot is not None:
+            try:
+                worker = _Worker(self.backend_factory, self._context, self.start_timeout)
+            except BaseException:
+                with self._lock:
+                    self._workers.pop(slot)
+                raise
+            with self._lock:
+                self._workers[slot] = worker
+            return worker
+        worker = self._idle.get()
+        try:
+            return self._ensure_healthy(worker)
+        except BaseException:
+            # 重新啟動失敗時仍歸還，下次取用會再嘗試
+            self._release(worker)
+            raise
+
+    def _release(self, worker):
+        self._idle.put(worker)
+
+    def _restart(self, worker):
+        worker.kill()
+        self.restarts += 1
+        worker.start()
+        return worker
+
+    def _recover(self, worker):
+        """請求失敗後嘗試重新啟動並歸還子行程"""
+        try:
+            self._restart(worker)
+        except ConverterError:
+            pass
+        self._release(worker)
+
+    def _ensure_healthy(self, worker):
+        """已結束或閒置太久且沒有回應的子行程重新啟動"""
+        if not worker.alive:
+            return self._restart(worker)
+        if time.monotonic() - worker.last_used > PING_AFTER_IDLE:
+            try:
+                status, _ = worker.request('ping', (), {}, PING_TIMEOUT, None)
+                if status != 'ok':
+                    raise ConverterError()
+            except (ConverterError, TimeoutError):
+                return self._restart(worker)
+        return worker
+
+    def warm_up(self):
+        """在背景啟動子行程（例如開啟需要 Office 的文件時），之後的請求不必等待啟動"""
+        def start():
+            try:
+                self._release(self._acquire())
+            except Exception:
+                pass
+        threading.Thread(target=start, daemon=True).start()
+
+    def health_check(self):
+        """確認閒置的子行程都有回應，回傳重新啟動的數量"""
+        restarted = self.restarts
+        workers = []
+        while True:
+            try:
+                workers.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        for worker in workers:
+            worker.last_used = 0.0
+            try:
+                worker = self._ensure_healthy(worker)
+            except ConverterError:
+                pass
+            self._release(worker)
+        return self.restarts - restarted
+
+    def call(self, method, *args, token=None, timeout=None, **kwargs):
+        """在子行程中呼叫後端方法；子行程當掉時重新啟動並重試一次"""
+        timeout = self.call_timeout if timeout is None else timeout
+        for attempt in (1, 2):
+            check(token)
+            worker = self._acquire()
+            try:
+                status, value = worker.request(method, args, kwargs, timeout, token)
+            except CancelledError:
+                # 子行程仍在處理，於背景讀掉回覆後再歸還
+                threading.Thread(target=self._drain, args=(worker, timeout), daemon=True).start()
+                raise
+            except TimeoutError:
+                self._recover(worker)
+                raise ConverterError(f"轉換逾時/Conversion timed out after {timeout}s")
+            except ConverterError:
+                self._recover(worker)
+                if attempt == 2:
+                    raise
+                continue
+            self._release(worker)
+            if status == 'error':
+                raise ConverterError(value)
+            return value
+
+    def _drain(self, worker, timeout):
+        if worker.drain(timeout):
+            self._release(worker)
+        else:
+            self._recover(worker)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            workers = [worker for worker in self._workers if worker is not None]
+            self._workers = []
+        for worker in workers:
+            worker.stop()
+
+
+class InProcessConverter(Converter):
+    """在呼叫端執行緒直接使用後端（例如 FakeBackend），介面與 ConverterPool 相同"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.restarts = 0
+
+    def health_check(self):
+        self.backend.ping()
+        return 0
+
+    def call(self, method, *args, token=None, timeout=None, **kwargs):
+        check(token)
+        with self._lock:
+            try:
+                return getattr(self.backend, method)(*args, **kwargs)
+            except (ConverterError, NotImplementedError):
+                raise
+            except Exception as e:
+                raise ConverterError(f"{type(e).__name__}: {e}") from e
+
+    def close(self):
+        self.backend.shutdown()
+
+
+_converter = None
+_converter_lock = threading.Lock()
+
+
+def default_converter():
+    """依環境建立轉換器：DOCSPLIT_CONVERTER=fake 時使用替身，否則為 Office 行程池"""
+    if os.environ.get(BACKEND_ENV, "").lower() == "fake":
+        return InProcessConverter(FakeBackend())
+    return ConverterPool(OfficeBackend)
+
+
+def get_converter():
+    """行程共用的轉換器，第一次使用時建立"""
+    global _converter
+    with _converter_lock:
+        if _converter is None:
+            _converter = default_converter()
+            # 行程結束時先關閉轉換器（讓 Office 正常結束），再終止子行程；
+            # multiprocessing 的子行程不會執行 atexit，因此使用其 Finalize
+            multiprocessing.util.Finalize(None, shutdown, exitpriority=10)
+        return _converter
+
+
+def set_converter(converter):
+    """替換行程共用的轉換器（例如測試時改用 FakeBackend），回傳原本的轉換器"""
+    global _converter
+    with _converter_lock:
+        previous, _converter = _converter, converter
+    return previous
+
+
+def shutdown():
+    converter = set_converter(None)
+    if converter is not None:
+        converter.close()
@@ -0,0 +1,592 @@
+"""DocSplit 核心：不依賴 Qt 的選頁與重組引擎，以及批次命令列介面。
+
+匯入本模組不會載入 PySide6 或 win32com；Office 轉換經由 docsplit_convert 的常駐轉換器。
+
+範例：
+    python docsplit_core.py handout.pdf --pages 1-3,5,10- -o out
+    python docsplit_core.py reports/*.pdf --pages 1-2 --workers 8 -o out
+    python docsplit_core.py --list jobs.txt -o out
+"""
+import os
+import sys
+import glob
+import shutil
+import tempfile
+import argparse
+import multiprocessing
+from time import perf_counter
+from functools import partial
+from collections import namedtuple, Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import fitz
+
+import docsplit_convert
+import docsplit_optimize
+import docsplit_trace
+from docsplit_jobs import check
+
+
+PDF_EXTS = ('.pdf',)
+PPT_EXTS = ('.ppt', '.pptx')
+WORD_EXTS = ('.doc', '.docx')
+
+def _supports_linear():
+    """目前的 MuPDF 是否能寫出線性化 PDF；1.24 之後的版本已移除此功能"""
+    doc = fitz.open()
+    try:
+        doc.new_page()
+        doc.tobytes(linear=True)
+        return True
+    except Exception:
+        return False
+    finally:
+        doc.close()
+
+
+# PDF 存檔選項：fast 直接寫出；compact 清除未使用與重複的物件（字型、
+# 影像等）並壓縮串流；linear 另外產生線性化（快速網頁檢視）檔案，
+# 只在 MuPDF 支援時提供
+SAVE_PRESETS = {
+    'fast': {},
+    'compact': {'garbage': 3, 'deflate': True, 'deflate_images': True,
+                'deflate_fonts': True, 'use_objstms': 1},
+}
+if _supports_linear():
+    SAVE_PRESETS['linear'] = {'garbage': 3, 'deflate': True, 'deflate_images': True,
+                              'deflate_fonts': True, 'linear': True}
+DEFAULT_PRESET = 'fast'
+
+# 選取頁數超過來源的這個比例時，複製整份文件再刪除未選頁面較快
+SELECT_IN_PLACE_RATIO = 0.5
+
+# images 為影像最佳化的 docsplit_optimize.OptimizeReport，未最佳化時為 None
+ExportResult = namedtuple('ExportResult', 'pages method preset size timings notes images', defaults=(None,))
+
+
+def file_type(path):
+    """回傳 'pdf'、'ppt' 或 'word'，不支援的格式回傳 None"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in PDF_EXTS:
+        return 'pdf'
+    if ext in PPT_EXTS:
+        return 'ppt'
+    if ext in WORD_EXTS:
+        return 'word'
+    return None
+
+
+def parse_page_ranges(spec, page_count=None):
+    """解析頁碼範圍字串（1 起算），例如 "1-50,75,100-"。
+
+    範圍也可寫成 "3..7" 或 "3:7"；開頭的開放區間寫成 "..5" 或 ":5" 時，命令列
+    不會把它當成選項。回傳排序且不重複的 0 起算索引列表。開放區間（"100-"、
+    "-5"）與 "all" 需要 page_count；無效或超出頁數的頁碼會引發 ValueError。
+    """
+    indexes = set()
+    for part in spec.replace(' ', '').split(','):
+        if not part:
+            continue
+        text, part = part, part.replace('..', '-').replace(':', '-')
+        if part.lower() in ('all', '*'):
+            if page_count is None:
+                raise ValueError(f"'{part}' 需要已知頁數/requires a known page count")
+            indexes.update(range(page_count))
+            continue
+
+        if '-' in part:
+            start_text, end_text = part.split('-', 1)
+            if not end_text and page_count is None:
+                raise ValueError(f"開放區間 '{text}' 需要已知頁數/open range requires a known page count")
+        else:
+            start_text = end_text = part
+        try:
+            start = int(start_text) if start_text else 1
+            end = int(end_text) if end_text else page_count
+        except ValueError:
+            raise ValueError(f"無效的頁碼範圍/Invalid page range: '{text}'") from None
+
+        if start < 1 or end < start:
+            raise ValueError(f"無效的頁碼範圍/Invalid page range: '{text}'")
+        if page_count is not None and end > page_count:
+            raise ValueError(f"頁碼超出範圍/Page out of range: '{text}' (共 {page_count} 頁)")
+        indexes.update(range(start - 1, end))
+
+    return sorted(indexes)
+
+
+def coalesce_runs(indexes):
+    """將頁碼合併為連續區段，例如 [1, 2, 3, 7, 8] -> [(1, 3), (7, 8)]"""
+    runs = []
+    for idx in sorted(indexes):
+        if runs and idx == runs[-1][1] + 1:
+            runs[-1][1] = idx
+        elif not runs or idx > runs[-1][1]:
+            runs.append([idx, idx])
+    return [tuple(run) for run in runs]
+
+
+def choose_method(page_count, selected_count):
+    return 'select' if selected_count > page_count * SELECT_IN_PLACE_RATIO else 'runs'
+
+
+def build_pdf(pdf_document, indexes, token=None, method='runs', progress=None):
+    """從已開啟的 PDF 複製選定頁面，回傳新的 fitz.Document。
+
+    method 為 'runs' 時以連續區段呼叫 insert_pdf（各區段共用的資源只複製一次）；
+    'select' 時開啟來源的副本並就地刪除未選頁面；'auto' 依選取比例決定。
+    progress(頁數) 在每完成一段後呼叫。
+    """
+    indexes = sorted(set(indexes))
+    if method == 'auto':
+        method = choose_method(pdf_document.page_count, len(indexes))
+
+    if method == 'select':
+        check(token)
+        if pdf_document.name and os.path.exists(pdf_document.name):
+            new_pdf = fitz.open(pdf_document.name)
+        else:
+            new_pdf = fitz.open("pdf", pdf_document.tobytes())
+        try:
+            check(token)
+            new_pdf.select(indexes)
+        except BaseException:
+            new_pdf.close()
+            raise
+        if progress is not None:
+            progress(len(indexes))
+        return new_pdf
+
+    new_pdf = fitz.open()
+    try:
+        _insert_runs(new_pdf, pdf_document, indexes, token, progress)
+    except BaseException:
+        new_pdf.close()
+        raise
+    return new_pdf
+
+
+def _insert_runs(new_pdf, src, indexes, token, progress):
+    # 保留同一來源的 graft map 到最後一段：否則每段各自複製一份共用的影像與字型，
+    # 隔頁選取時輸出會是來源的數百倍大
+    runs = coalesce_runs(indexes)
+    for n, (start, end) in enumerate(runs, 1):
+        check(token)
+        new_pdf.insert_pdf(src, from_page=start, to_page=end, final=(n == len(runs)))
+        if progress is not None:
+            progress(end - start + 1)
+
+
+def _write_with_preset(write, preset, prune):
+    options = dict(SAVE_PRESETS[preset])
+    if prune:
+        options.setdefault('garbage', 1)
+    notes = []
+    try:
+        result = write(**options)
+    except Exception as e:
+        if not options.pop('linear', False):
+            raise
+        # 新版 MuPDF 已移除線性化，退回 compact
+        notes.append(f"linearization unavailable, saved as compact: {e}")
+        result = write(**options)
+    return result, notes
+
+
+class _CountingWriter:
+    """包裝輸出檔，回報已寫出的位元組數；權杖取消時中止存檔"""
+
+    def __init__(self, f, token, on_write):
+        self.f = f
+        self.token = token
+        self.on_write = on_write
+        self.count = 0
+
+    def write(self, data):
+        # 在 MuPDF 的回呼中引發例外會中止存檔，之後轉回 CancelledError
+        check(self.token)
+        self.f.write(data)
+        self.count += len(data)
+        self.on_write(self.count)
+
+    def seek(self, *args):
+        return self.f.seek(*args)
+
+    def tell(self):
+        return self.f.tell()
+
+    def truncate(self, *args):
+        return self.f.truncate(*args)
+
+
+def partial_path(out_path):
+    """邊寫邊回報進度時使用的暫存檔"""
+    return f"{out_path}.part"
+
+
+def _stream_save(pdf_document, out_path, preset, prune, token, on_write):
+    """寫到同資料夾的暫存檔，完成後才取代 out_path；取消或失敗時不留下不完整的檔案"""
+    temp_path = partial_path(out_path)
+    try:
+        with open(temp_path, 'wb') as f:
+            writer = _CountingWriter(f, token, on_write)
+
+            def write(**options):
+                # 退回其他選項重寫時從頭開始
+                f.seek(0)
+                f.truncate()
+                writer.count = 0
+                return pdf_document.save(writer, **options)
+
+            try:
+                _, notes = _write_with_preset(write, preset, prune)
+            except Exception:
+                check(token)
+                raise
+        os.replace(temp_path, out_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return notes
+
+
+def save_pdf(pdf_document, out_path, preset=DEFAULT_PRESET, prune=False, token=None, on_write=None):
+    """依存檔選項寫出 PDF，回傳附註列表（例如線性化不受支援時的退回）。
+
+    prune 為 True 時至少清除未使用的物件（就地刪頁後需要）。提供 on_write(已寫出位元組)
+    時邊寫邊回報，並可在寫出途中以權杖取消。
+    """
+    if on_write is not None:
+        return _stream_save(pdf_document, out_path, preset, prune, token, on_write)
+    _, notes = _write_with_preset(partial(pdf_document.save, out_path), preset, prune)
+    return notes
+
+
+def pdf_bytes(pdf_document, preset=DEFAULT_PRESET, prune=False):
+    """與 save_pdf 相同的選項，但在記憶體中序列化，回傳 (位元組, 附註列表)"""
+    return _write_with_preset(pdf_document.tobytes, preset, prune)
+
+
+def export_pdf(pdf_document, indexes, out_path, preset=DEFAULT_PRESET, method='auto', token=None,
+               progress=None, on_write=None, images=None):
+    """將已開啟 PDF 的選定頁面存成新檔，回傳含各階段耗時的 ExportResult。
+
+    images 為 docsplit_optimize.ImageOptions 時，存檔前縮小並重新壓縮影像。
+    """
+    timings = {}
+    new_pdf, method = _assemble(pdf_document, indexes, method, token, progress, timings)
+    return _save_assembled(new_pdf, out_path, method, preset, token, on_write, timings, images)
+
+
+def _assemble(pdf_document, indexes, method, token, progress, timings):
+    if method == 'auto':
+        method = choose_method(pdf_document.page_count, len(set(indexes)))
+    start = perf_counter()
+    with docsplit_trace.span("export.assemble", method=method, pages=len(indexes)):
+        new_pdf = build_pdf(pdf_document, indexes, token, method, progress)
+    timings['assemble'] = perf_counter() - start
+    return new_pdf, method
+
+
+def _save_assembled(new_pdf, out_path, method, preset, token, on_write, timings, images=None):
+    """（最佳化影像後）存檔並關閉組好的文件，回傳 ExportResult"""
+    report = None
+    try:
+        if images is not None:
+            check(token)
+            with docsplit_trace.span("export.images", max_dpi=images.max_dpi, mode=images.mode):
+                report = docsplit_optimize.optimize_images(new_pdf, images, token)
+            timings['images'] = report.seconds
+        check(token)
+        start = perf_counter()
+        with docsplit_trace.span("export.save", preset=preset):
+            # 被取代與合併的影像須在存檔時清除
+            notes = save_pdf(new_pdf, out_path, preset, prune=(method == 'select' or report is not None),
+                             token=token, on_write=on_write)
+        timings['save'] = perf_counter() - start
+        pages = new_pdf.page_count
+    finally:
+        new_pdf.close()
+    return ExportResult(pages, method, preset, os.path.getsize(out_path), timings, notes, report)
+
+
+def rebuild_pdf(src_path, indexes, out_path, token=None, preset=DEFAULT_PRESET, method='auto', images=None):
+    """將 PDF 的選定頁面存成新檔，回傳 ExportResult"""
+    start = perf_counter()
+    with docsplit_trace.span("export.open"):
+        pdf_document = fitz.open(src_path)
+    opened = perf_counter() - start
+    try:
+        result = export_pdf(pdf_document, indexes, out_path, preset, method, token, images=images)
+    finally:
+        pdf_document.close()
+    result.timings['open'] = opened
+    return result
+
+
+def compose_pdf(documents, parts, token=None, progress=None):
+    """依序將 [(PDF 路徑, 頁碼列表)] 的頁面組成新的 fitz.Document。
+
+    documents 為 docsplit_workspace.DocumentPool，來源文件只解析一次。
+    """
+    new_pdf = fitz.open()
+    try:
+        for path, indexes in parts:
+            with documents.document(path) as src:
+                _insert_runs(new_pdf, src, indexes, token, progress)
+    except BaseException:
+        new_pdf.close()
+        raise
+    return new_pdf
+
+
+def export_parts(documents, parts, out_path, preset=DEFAULT_PRESET, token=None, progress=None,
+                 on_write=None, images=None):
+    """將一或多份文件的頁面 [(PDF 路徑, 頁碼列表)] 存成一份 PDF，回傳 ExportResult。
+
+    只在組頁時占用文件池中的來源文件，存檔期間其他工作與縮圖渲染仍可使用。
+    """
+    timings = {}
+    if len(parts) == 1:
+        path, indexes = parts[0]
+        with documents.document(path) as pdf_document:
+            new_pdf, method = _assemble(pdf_document, indexes, 'auto', token, progress, timings)
+    else:
+        method = 'compose'
+        start = perf_counter()
+        with docsplit_trace.span("export.compose", documents=len(parts)):
+            new_pdf = compose_pdf(documents, parts, token, progress)
+        timings['assemble'] = perf_counter() - start
+    return _save_assembled(new_pdf, out_path, method, preset, token, on_write, timings, images)
+
+
+def convert_word_to_pdf(docx_path, pdf_path, token=None):
+    """透過轉換器（預設為常駐的 Word）將整份文件轉為 PDF"""
+    docsplit_convert.get_converter().to_pdf(os.path.abspath(docx_path), os.path.abspath(pdf_path),
+                                            token=token)
+
+
+def convert_ppt_to_pdf(ppt_path, indexes, pdf_path, token=None):
+    """透過轉換器（預設為常駐的 PowerPoint）將選定投影片存成 PDF"""
+    docsplit_convert.get_converter().to_pdf(os.path.abspath(ppt_path), os.path.abspath(pdf_path),
+                                            sorted(indexes), token=token)
+
+
+def page_count(path):
+    """回傳 PDF 頁數；Office 文件無法在不啟動 COM 的情況下得知，回傳 None"""
+    if file_type(path) != 'pdf':
+        return None
+    with fitz.open(path) as doc:
+        return doc.page_count
+
+
+def rebuild_document(src_path, indexes, out_path, token=None, preset=DEFAULT_PRESET, images=None):
+    """依來源格式將選定頁面重組為 PDF，回傳 ExportResult；權杖被取消時引發 CancelledError"""
+    kind = file_type(src_path)
+    if kind == 'pdf':
+        return rebuild_pdf(src_path, indexes, out_path, token, preset, images=images)
+    elif kind == 'ppt':
+        start = perf_counter()
+        convert_ppt_to_pdf(src_path, indexes, out_path, token)
+        return ExportResult(len(set(indexes)), 'converter', None, os.path.getsize(out_path),
+                            {'convert': perf_counter() - start}, [])
+    elif kind == 'word':
+        temp_dir = tempfile.mkdtemp()
+        try:
+            temp_pdf = os.path.join(temp_dir, "word.pdf")
+            start = perf_counter()
+            convert_word_to_pdf(src_path, temp_pdf, token)
+            converted = perf_counter() - start
+            result = rebuild_pdf(temp_pdf, indexes, out_path, token, preset, images=images)
+            result.timings['convert'] = converted
+            return result
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    else:
+        raise ValueError(f"不支援的檔案格式/Unsupported file type: {src_path}")
+
+
+def run_job(src_path, spec, out_path, preset=DEFAULT_PRESET, images=None):
+    """批次工作單元：解析頁碼並重組，回傳 (src_path, out_path, ExportResult)"""
+    if file_type(src_path) == 'word':
+        # Word 需先轉檔才知道頁數，開放區間在轉檔後解析
+        temp_dir = tempfile.mkdtemp()
+        try:
+            temp_pdf = os.path.join(temp_dir, "word.pdf")
+            convert_word_to_pdf(src_path, temp_pdf)
+            indexes = parse_page_ranges(spec, page_count(temp_pdf))
+            result = rebuild_pdf(temp_pdf, indexes, out_path, preset=preset, images=images)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    else:
+        indexes = parse_page_ranges(spec, page_count(src_path))
+        result = rebuild_document(src_path, indexes, out_path, preset=preset, images=images)
+    return src_path, out_path, result
+
+
+def rebuild_many(jobs, workers=None, preset=DEFAULT_PRESET, images=None):
+    """以行程池平行處理 (src_path, spec, out_path) 工作。
+
+    依完成順序產生 (src_path, out_path, ExportResult 或 None, 錯誤訊息或 None)。
+    images 為 ImageOptions 時，多個檔案已平行處理，各檔案的影像在各自的行程中依序最佳化。
+    """
+    jobs = list(jobs)
+    if not jobs:
+        return
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) == 1:
+        for src_path, spec, out_path in jobs:
+            try:
+                yield run_job(src_path, spec, out_path, preset, images) + (None,)
+            except Exception as e:
+                yield src_path, out_path, None, str(e)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        single = images._replace(workers=1) if images is not None else None
+        futures = {pool.submit(run_job, *job, preset, single): job for job in jobs}
+        for future in as_completed(futures):
+            src_path, _, out_path = futures[future]
+            try:
+                yield future.result() + (None,)
+            except Exception as e:
+                yield src_path, out_path, None, str(e)
+
+
+def format_timings(result):
+    parts = [f"{name}={seconds * 1000:.1f}ms" for name, seconds in result.timings.items()]
+    parts.append(f"size={result.size / 1024:.1f}KB")
+    if result.method:
+        parts.append(f"method={result.method}")
+    if result.images is not None:
+        saved = result.images.bytes_before - result.images.bytes_after
+        parts.append(f"images={result.images.images} saved={saved / 1024:.1f}KB")
+    return ' '.join(parts)
+
+
+def _output_paths(src_paths, output_dir, suffix):
+    """每個來源的輸出路徑。
+
+    不同資料夾中的同名檔案（a/x.pdf、b/x.pdf）加上上層資料夾名稱，仍重複時
+    （例如同一個檔案列了兩次）再加上序號，平行處理時不會互相覆寫。
+    """
+    stems = [os.path.splitext(os.path.basename(path))[0] for path in src_paths]
+    counts = Counter(os.path.normcase(stem) for stem in stems)
+    used = set()
+    paths = []
+    for src_path, stem in zip(src_paths, stems):
+        if counts[os.path.normcase(stem)] > 1:
+            parent = os.path.basename(os.path.dirname(os.path.abspath(src_path)))
+            stem = f"{parent}_{stem}" if parent else stem
+        name, number = stem, 1
+        while os.path.normcase(name) in used:
+            number += 1
+            name = f"{stem}_{number}"
+        used.add(os.path.normcase(name))
+        paths.append(os.path.join(output_dir, f"{name}{suffix}.pdf"))
+    return paths
+
+
+def _read_job_list(list_path):
+    """讀取工作清單，每行為「路徑 頁碼範圍」，以最後一個空白分隔，# 開頭為註解"""
+    entries = []
+    with open(list_path, encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            parts = line.rsplit(None, 1)
+            if len(parts) != 2:
+                raise ValueError(f"{list_path}:{line_no}: 需要「路徑 頁碼範圍」/expected 'path spec'")
+            entries.append((parts[0], parts[1]))
+    return entries
+
+
+def _expand_inputs(patterns):
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern))
+        paths.extend(matches if matches else [pattern])
+    return paths
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        prog="docsplit",
+        description="依頁碼範圍批次重組文件為 PDF/Rebuild selected pages of documents into PDFs",
+    )
+    parser.add_argument('inputs', nargs='*', help="來源檔案或萬用字元/Input files or glob patterns")
+    parser.add_argument('-p', '--pages',
+                        help="頁碼範圍，例如 1-3,5,10-；開頭的開放區間寫成 ..5 或 --pages=-5"
+                             "/Page ranges, e.g. 1-3,5,10-; write a leading open range as ..5 or --pages=-5")
+    parser.add_argument('-l', '--list', dest='job_list',
+                        help="工作清單檔，每行「路徑 頁碼範圍」/Job list file with 'path spec' per line")
+    parser.add_argument('-o', '--output-dir', default='.', help="輸出資料夾/Output directory")
+    parser.add_argument('--suffix', default='_selected', help="輸出檔名後綴/Output file name suffix")
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="平行行程數，預設為 CPU 數/Worker processes (default: CPU count)")
+    parser.add_argument('--preset', choices=sorted(SAVE_PRESETS), default=DEFAULT_PRESET,
+                        help=f"PDF 存檔選項/PDF save preset ({', '.join(SAVE_PRESETS)})")
+    parser.add_argument('--images', choices=sorted(docsplit_optimize.IMAGE_PRESETS),
+                        help="影像最佳化：email（150 DPI JPEG）、print（300 DPI JPEG）、lossless（300 DPI Flate）"
+                             "/Downsample and recompress images")
+    parser.add_argument('--max-dpi', type=int, help="影像解析度上限，覆寫 --images 的設定/Maximum image DPI")
+    parser.add_argument('--jpeg-quality', type=int, help="JPEG 品質 1-100/JPEG quality")
+    parser.add_argument('--timings', action='store_true',
+                        help="顯示各階段耗時與輸出大小/Print per-stage timings and output size")
+    return parser
+
+
+def image_options(args):
+    """由命令列參數組成 ImageOptions；未要求影像最佳化時回傳 None"""
+    if not (args.images or args.max_dpi or args.jpeg_quality):
+        return None
+    options = docsplit_optimize.IMAGE_PRESETS[args.images or 'print']
+    if args.max_dpi:
+        options = options._replace(max_dpi=args.max_dpi)
+    if args.jpeg_quality:
+        options = options._replace(mode=docsplit_optimize.JPEG, quality=args.jpeg_quality)
+    return options
+
+
+def main(argv=None):
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+
+    entries = []
+    if args.job_list:
+        entries.extend(_read_job_list(args.job_list))
+    if args.inputs:
+        if not args.pages:
+            parser.error("使用輸入檔時需要 --pages/--pages is required with input files")
+        entries.extend((path, args.pages) for path in _expand_inputs(args.inputs))
+    if not entries:
+        parser.error("沒有要處理的檔案/No input files")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    out_paths = _output_paths([src for src, _ in entries], args.output_dir, args.suffix)
+    jobs = [(src, spec, out_path) for (src, spec), out_path in zip(entries, out_paths)]
+
+    failures = 0
+    images = image_options(args)
+    for src_path, out_path, result, error in rebuild_many(jobs, args.workers, args.preset, images):
+        if error:
+            failures += 1
+            print(f"FAIL {src_path}: {error}", file=sys.stderr)
+            continue
+        print(f"OK   {src_path} -> {out_path} ({result.pages} pages)")
+        if args.timings:
+            print(f"     {format_timings(result)}")
+        if result.images is not None:
+            print(f"     {docsplit_optimize.format_report(result.images)}")
+        for note in result.notes:
+            print(f"     note: {note}", file=sys.stderr)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    # 打包成執行檔時，行程池的子行程由此進入
+    multiprocessing.freeze_support()
+    sys.exit(main())
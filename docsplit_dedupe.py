@@ -0,0 +1,121 @@
+"""近似重複頁面偵測。
+
+以縮圖計算 64 位元 dHash（灰階縮成 9x8，比較左右相鄰像素），存成 NumPy
+陣列；所有頁面兩兩之間的漢明距離以分塊的向量運算求得，不需要 Python
+雙層迴圈。本模組不依賴 Qt。
+"""
+import numpy as np
+
+
+HASH_WIDTH = 8
+HASH_HEIGHT = 8
+# 漢明距離不超過此值視為重複頁面（64 位元中）
+DEFAULT_THRESHOLD = 5
+# 每次比較的列數；每塊暫存 BLOCK_ROWS x 頁數 個 uint64
+BLOCK_ROWS = 512
+
+if hasattr(np, 'bitwise_count'):
+    _popcount = np.bitwise_count
+else:
+    _POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def _popcount(values):
+        return _POPCOUNT_TABLE[values.view(np.uint8)].reshape(values.shape + (8,)).sum(axis=-1)
+
+
+def _area_resize(gray, width, height):
+    """以區塊平均縮小灰階影像（不需 PIL/Qt）"""
+    rows = np.linspace(0, gray.shape[0], height + 1).astype(int)[:-1]
+    cols = np.linspace(0, gray.shape[1], width + 1).astype(int)[:-1]
+    sums = np.add.reduceat(np.add.reduceat(gray.astype(np.uint32), rows, axis=0), cols, axis=1)
+    counts = np.outer(np.diff(np.append(rows, gray.shape[0])), np.diff(np.append(cols, gray.shape[1])))
+    return sums / counts
+
+
+def dhash(gray):
+    """二維 uint8 灰階陣列的 dHash，回傳 int"""
+    gray = np.asarray(gray)
+    if gray.shape[0] < HASH_HEIGHT or gray.shape[1] < HASH_WIDTH + 1:
+        gray = np.repeat(np.repeat(gray, HASH_HEIGHT, axis=0), HASH_WIDTH + 1, axis=1)
+    small = _area_resize(gray, HASH_WIDTH + 1, HASH_HEIGHT)
+    bits = small[:, 1:] > small[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+class PageHashes:
+    """每頁一個 dHash；縮圖執行緒寫入，介面執行緒讀取"""
+
+    def __init__(self, page_count=0):
+        self.values = np.zeros(page_count, dtype=np.uint64)
+        self.known = np.zeros(page_count, dtype=bool)
+
+    def __len__(self):
+        return len(self.values)
+
+    def resize(self, page_count):
+        if page_count <= len(self.values):
+            return
+        extra = page_count - len(self.values)
+        self.values = np.concatenate([self.values, np.zeros(extra, dtype=np.uint64)])
+        self.known = np.concatenate([self.known, np.zeros(extra, dtype=bool)])
+
+    def set(self, index, value):
+        if index >= len(self.values):
+            self.resize(index + 1)
+        self.values[index] = value
+        self.known[index] = True
+
+    @property
+    def known_count(self):
+        return int(self.known.sum())
+
+
+def duplicate_of(hashes, known=None, threshold=DEFAULT_THRESHOLD):
+    """回傳每頁最早的相似頁頁碼（無則為 -1）；未計算雜湊的頁面不參與比較"""
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    count = len(hashes)
+    result = np.full(count, -1, dtype=np.int64)
+    if known is None:
+        known = np.ones(count, dtype=bool)
+    positions = np.flatnonzero(known)
+    values = hashes[positions]
+
+    for start in range(0, len(values), BLOCK_ROWS):
+        end = min(start + BLOCK_ROWS, len(values))
+        # 只需與較早的頁面比較：第 i 列取前 i 欄
+        distances = _popcount(values[start:end, None] ^ values[None, :end])
+        similar = distances <= threshold
+        similar &= np.arange(end)[None, :] < np.arange(start, end)[:, None]
+        has_match = similar.any(axis=1)
+        first = similar.argmax(axis=1)
+        rows = positions[start:end][has_match]
+        result[rows] = positions[first[has_match]]
+    return result
+
+
+def unique_pages(duplicates):
+    """保留每組重複頁面的第一頁；未計算雜湊的頁面視為不重複"""
+    return np.flatnonzero(duplicates < 0).tolist()
+
+
+def duplicate_groups(duplicates):
+    """回傳每頁所屬重複組的代表頁（組內最早的頁面），不屬於任何重複組為 -1"""
+    groups = np.full(len(duplicates), -1, dtype=np.int64)
+    copies = np.flatnonzero(duplicates >= 0)
+    # 代表頁可能本身也是更早頁面的複本，沿鏈結找到最早的頁面
+    roots = duplicates[copies]
+    while True:
+        parents = duplicates[roots]
+        chained = parents >= 0
+        if not chained.any():
+            break
+        roots = np.where(chained, parents, roots)
+    groups[copies] = roots
+    groups[roots] = roots
+    return groups
+
+
+def dhash_gray_buffer(buffer, width, height, stride):
+    """以灰階像素緩衝區（每列 stride 位元組）計算 dHash"""
+    gray = np.frombuffer(buffer, dtype=np.uint8, count=stride * height).reshape(height, stride)
+    return dhash(gray[:, :width])
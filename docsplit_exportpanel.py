@@ -0,0 +1,126 @@
+"""匯出佇列面板。
+
+縮圖檢視下方的工作列表，每個匯出或列印工作一列：名稱、進度條、
+每秒頁數與已寫出大小，以及取消按鈕。工作執行緒透過 job_changed 訊號
+回報（Qt 自動轉到介面執行緒），工作結束時發出 job_finished。
+沒有工作時面板隱藏。
+"""
+from PySide6.QtCore import Signal
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QProgressBar
+
+import docsplit_exports
+from docsplit_overlay import format_bytes
+
+
+STATE_TEXT = {
+    docsplit_exports.QUEUED: "等待中/Queued",
+    docsplit_exports.RUNNING: "進行中/Running",
+    docsplit_exports.DONE: "完成/Done",
+    docsplit_exports.FAILED: "失敗/Failed",
+    docsplit_exports.CANCELLED: "已取消/Cancelled",
+}
+
+
+def describe(job):
+    """工作的進度說明，例如「1200/3000 頁 · 850.0 頁/s · 12 MB」"""
+    parts = [STATE_TEXT[job.state]]
+    if job.total_pages:
+        parts.append(f"{job.pages_done}/{job.total_pages} 頁/pages")
+    if job.state == docsplit_exports.RUNNING:
+        # 組頁時顯示每秒頁數，存檔時顯示寫出速度
+        if job.total_pages and 0 < job.pages_done < job.total_pages:
+            parts.append(f"{job.pages_per_second:.1f} 頁/s")
+        elif job.bytes_written:
+            parts.append(f"{format_bytes(job.bytes_per_second)}/s")
+    elif job.state == docsplit_exports.DONE and job.pages_done:
+        parts.append(f"{job.pages_per_second:.1f} 頁/s")
+    if job.bytes_written:
+        parts.append(format_bytes(job.bytes_written))
+    if job.state in docsplit_exports.FINISHED_STATES and job.started is not None:
+        parts.append(f"{job.elapsed:.1f} s")
+    if job.error:
+        parts.append(job.error)
+    return " · ".join(parts)
+
+
+class _JobRow(QWidget):
+    def __init__(self, job, parent=None):
+        super().__init__(parent)
+        self.job = job
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.title = QLabel(job.title)
+        self.progress = QProgressBar()
+        self.progress.setTextVisible(False)
+        self.progress.setMaximumHeight(12)
+        self.status = QLabel()
+        self.cancel_button = QPushButton("取消/Cancel")
+        self.cancel_button.clicked.connect(job.cancel)
+        layout.addWidget(self.title)
+        layout.addWidget(self.progress, 1)
+        layout.addWidget(self.status, 2)
+        layout.addWidget(self.cancel_button)
+
+    def refresh(self):
+        job = self.job
+        if job.state in docsplit_exports.FINISHED_STATES:
+            self.progress.setRange(0, 1)
+            self.progress.setValue(1 if job.state == docsplit_exports.DONE else 0)
+            self.cancel_button.setEnabled(False)
+        elif job.state == docsplit_exports.RUNNING and job.total_pages and job.pages_done < job.total_pages:
+            self.progress.setRange(0, job.total_pages)
+            self.progress.setValue(job.pages_done)
+        else:
+            # 等待中或存檔階段（最終大小未知）顯示忙碌
+            self.progress.setRange(0, 0)
+        self.status.setText(describe(job))
+        if job.state == docsplit_exports.FAILED:
+            self.status.setStyleSheet("color: #c0392b;")
+            self.status.setToolTip(job.details or job.error)
+
+
+class ExportPanel(QWidget):
+    # 由任何執行緒發出（docsplit_exports.ExportQueue 的 on_change）
+    job_changed = Signal(object)
+    job_finished = Signal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = {}
+        # 已清除的工作；之後才送達的訊號不再建立列
+        self.cleared = set()
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        header = QHBoxLayout()
+        header.addWidget(QLabel("匯出佇列/Export Queue"))
+        header.addStretch(1)
+        self.clear_button = QPushButton("清除已完成/Clear Finished")
+        self.clear_button.clicked.connect(self.clear_finished)
+        header.addWidget(self.clear_button)
+        layout.addLayout(header)
+        self.rows_layout = QVBoxLayout()
+        layout.addLayout(self.rows_layout)
+        self.job_changed.connect(self.update_job)
+        self.hide()
+
+    def update_job(self, job):
+        row = self.rows.get(job.id)
+        if row is None:
+            if job.id in self.cleared:
+                return
+            row = self.rows[job.id] = _JobRow(job, self)
+            self.rows_layout.addWidget(row)
+            self.show()
+        finished = job.state in docsplit_exports.FINISHED_STATES and row.cancel_button.isEnabled()
+        row.refresh()
+        if finished:
+            self.job_finished.emit(job)
+
+    def clear_finished(self):
+        for job_id, row in list(self.rows.items()):
+            if row.job.state in docsplit_exports.FINISHED_STATES:
+                del self.rows[job_id]
+                self.cleared.add(job_id)
+                row.deleteLater()
+        if not self.rows:
+            self.hide()
@@ -0,0 +1,309 @@
+"""背景匯出佇列。
+
+匯出 PDF/PPT 與列印都交給有限數量的工作執行緒，介面執行緒不等待存檔完成，
+匯出期間仍可繼續選取頁面。每個工作有自己的取消權杖與進度（已處理頁數、
+已寫出位元組、每秒頁數）；寫到同一個輸出檔的工作不能同時進行，不同輸出
+可以並行。工作狀態改變時呼叫 on_change(job)（在工作執行緒中呼叫，Qt 端以
+訊號轉回介面執行緒）。本模組不依賴 Qt。
+
+PyMuPDF 在組頁與存檔（尤其是清除重複物件）期間持有 GIL，大型匯出若在
+本行程的執行緒中進行，介面仍會停頓數秒；因此超過 PROCESS_MIN_PAGES 頁的
+PDF 匯出與影像最佳化交給子行程（run_in_process），工作執行緒只轉送進度與取消。
+"""
+import os
+import time
+import itertools
+import threading
+import traceback
+import multiprocessing
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor
+
+import docsplit_jobs
+
+
+# 同時進行的匯出工作數
+DEFAULT_EXPORT_WORKERS = 2
+# 進度通知的最短間隔（秒），避免每次寫出都觸發介面更新
+PROGRESS_INTERVAL = 0.1
+# 超過此頁數的 PDF 匯出在子行程中進行；較小的匯出直接使用介面的文件池
+PROCESS_MIN_PAGES = 100
+# 取消後等待子行程自行結束的秒數，之後強制結束
+CANCEL_GRACE = 2.0
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+
+class ExportJob:
+    """佇列中的一個工作；進度欄位由工作執行緒更新，介面只讀取"""
+
+    def __init__(self, job_id, kind, title, out_path, total_pages, on_change):
+        self.id = job_id
+        self.kind = kind
+        self.title = title
+        self.out_path = out_path
+        self.total_pages = total_pages
+        self.token = docsplit_jobs.CancelToken()
+        self.state = QUEUED
+        self.pages_done = 0
+        self.bytes_written = 0
+        self.result = None
+        self.error = None
+        # 失敗時的完整追蹤訊息；視窗程式沒有主控台，由佇列面板以提示顯示
+        self.details = None
+        self.started = None
+        self.finished = None
+        self._on_change = on_change
+        self._notified = 0.0
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or perf_counter()) - self.started
+
+    @property
+    def pages_per_second(self):
+        elapsed = self.elapsed
+        return self.pages_done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def bytes_per_second(self):
+        elapsed = self.elapsed
+        return self.bytes_written / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def finished_ok(self):
+        return self.state == DONE
+
+    def cancel(self):
+        self.token.cancel()
+        if self.state == QUEUED:
+            # 尚未開始的工作直接結束，不必等到輪到它
+            self._finish(CANCELLED)
+
+    def advance(self, pages):
+        """工作執行緒回報又完成 pages 頁"""
+        self.pages_done += pages
+        self._notify()
+
+    def wrote(self, total_bytes):
+        """工作執行緒回報目前已寫出的位元組數"""
+        self.bytes_written = total_bytes
+        self._notify()
+
+    def _notify(self, force=False):
+        now = perf_counter()
+        if force or now - self._notified >= PROGRESS_INTERVAL:
+            self._notified = now
+            if self._on_change is not None:
+                self._on_change(self)
+
+    def _start(self):
+        self.state = RUNNING
+        self.started = perf_counter()
+        self._notify(force=True)
+
+    def _finish(self, state, error=None, details=None):
+        if self.state in FINISHED_STATES:
+            return
+        self.state = state
+        self.error = error
+        self.details = details
+        self.finished = perf_counter()
+        self._notify(force=True)
+
+
+class _EventToken:
+    """子行程中的取消權杖，由父行程設定 multiprocessing.Event"""
+
+    def __init__(self, event):
+        self._event = event
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise docsplit_jobs.CancelledError()
+
+
+def _process_main(conn, cancel_event, func, args):
+    """匯出子行程：執行 func(*args, token, progress, on_write)，以 conn 回報進度與結果"""
+    last_sent = [0.0]
+    # 最後一次寫出的位元組數；節流時可能未送出，結束前補送
+    pending = [None]
+
+    def progress(pages):
+        conn.send(('pages', pages))
+
+    def on_write(total_bytes):
+        now = time.monotonic()
+        pending[0] = total_bytes
+        if now - last_sent[0] >= PROGRESS_INTERVAL:
+            last_sent[0] = now
+            pending[0] = None
+            conn.send(('bytes', total_bytes))
+
+    try:
+        result = func(*args, token=_EventToken(cancel_event), progress=progress, on_write=on_write)
+    except docsplit_jobs.CancelledError:
+        conn.send(('cancelled', None))
+    except Exception as e:
+        conn.send(('error', f"{type(e).__name__}: {e}"))
+    else:
+        if pending[0] is not None:
+            conn.send(('bytes', pending[0]))
+        conn.send(('ok', result))
+    finally:
+        conn.close()
+
+
+def run_in_process(job, func, *args, partial_path=None):
+    """在新的子行程中執行模組層級的 func(*args, token=, progress=, on_write=)，回傳其結果。
+
+    進度轉回 job；job 被取消時通知子行程，超過 CANCEL_GRACE 秒仍未結束則強制
+    結束並刪除 partial_path（未完成的輸出）。
+    """
+    # 與轉換行程相同使用 spawn，避免在子行程中複製 Qt 狀態
+    context = multiprocessing.get_context("spawn")
+    parent_conn, child_conn = context.Pipe(duplex=False)
+    cancel_event = context.Event()
+    # 非 daemon：匯出行程可再建立影像最佳化的行程池；介面結束時由 shutdown 取消並等待
+    process = context.Process(target=_process_main, args=(child_conn, cancel_event, func, args))
+    process.start()
+    child_conn.close()
+    job.token.on_cancel(cancel_event.set)
+    cancelled_at = None
+    try:
+        while True:
+            try:
+                message = parent_conn.recv() if parent_conn.poll(0.05) else None
+            except EOFError:
+                # 子行程沒有回報結果就結束（例如當掉）
+                process.join()
+                job.token.raise_if_cancelled()
+                raise RuntimeError("匯出行程已結束/Export process exited")
+            if message is not None:
+                status, value = message
+                if status == 'pages':
+                    job.advance(value)
+                elif status == 'bytes':
+                    job.wrote(value)
+                elif status == 'ok':
+                    return value
+                elif status == 'cancelled':
+                    raise docsplit_jobs.CancelledError()
+                else:
+                    raise RuntimeError(value)
+            if job.token.cancelled:
+                cancelled_at = cancelled_at or time.monotonic()
+                if time.monotonic() - cancelled_at > CANCEL_GRACE:
+                    process.kill()
+                    process.join()
+                    if partial_path and os.path.exists(partial_path):
+                        os.remove(partial_path)
+                    raise docsplit_jobs.CancelledError()
+    finally:
+        parent_conn.close()
+        process.join()
+
+
+def export_pdf_parts(parts, out_path, preset, images=None, token=None, progress=None, on_write=None):
+    """子行程入口：開啟 [(PDF 路徑, 頁碼列表)] 並匯出為一份 PDF；images 見 docsplit_core.export_parts"""
+    import docsplit_core
+    import docsplit_workspace
+    documents = docsplit_workspace.DocumentPool()
+    try:
+        return docsplit_core.export_parts(documents, parts, out_path, preset, token, progress, on_write,
+                                          images)
+    finally:
+        documents.close()
+
+
+class ExportQueue:
+    """以執行緒池執行匯出工作；可由介面執行緒提交與取消"""
+
+    def __init__(self, workers=DEFAULT_EXPORT_WORKERS, on_change=None):
+        self.workers = workers
+        self.on_change = on_change
+        self._executor = None
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.jobs = []
+
+    @staticmethod
+    def _key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def busy_output(self, out_path):
+        """回傳正在寫出 out_path 的未完成工作，沒有時回傳 None"""
+        key = self._key(out_path)
+        with self._lock:
+            for job in self.jobs:
+                if job.out_path and job.state not in FINISHED_STATES and self._key(job.out_path) == key:
+                    return job
+        return None
+
+    def submit(self, kind, title, func, out_path=None, total_pages=0):
+        """提交工作並回傳 ExportJob；func(job) 在工作執行緒中執行，回傳值存入 job.result。
+
+        out_path 已有未完成的工作時引發 ValueError。
+        """
+        if out_path and self.busy_output(out_path):
+            raise ValueError(f"已有工作正在寫出此檔案/Already exporting to {out_path}")
+        with self._lock:
+            job = ExportJob(next(self._ids), kind, title, out_path, total_pages, self.on_change)
+            self.jobs.append(job)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="export")
+            self._executor.submit(self._run, job, func)
+        job._notify(force=True)
+        return job
+
+    def _run(self, job, func):
+        if job.state != QUEUED:
+            return
+        job._start()
+        try:
+            job.token.raise_if_cancelled()
+            job.result = func(job)
+        except docsplit_jobs.CancelledError:
+            job._finish(CANCELLED)
+        except Exception as e:
+            job._finish(FAILED, str(e), traceback.format_exc())
+        else:
+            job._finish(CANCELLED if job.token.cancelled else DONE)
+
+    def active(self):
+        with self._lock:
+            return [job for job in self.jobs if job.state not in FINISHED_STATES]
+
+    def remove_finished(self):
+        with self._lock:
+            self.jobs = [job for job in self.jobs if job.state not in FINISHED_STATES]
+
+    def stats(self):
+        """{'running', 'queued', 'pages_per_second', 'bytes_per_second'}，速率為進行中工作的總和"""
+        with self._lock:
+            running = [job for job in self.jobs if job.state == RUNNING]
+            queued = sum(1 for job in self.jobs if job.state == QUEUED)
+        return {'running': len(running), 'queued': queued,
+                'pages_per_second': sum(job.pages_per_second for job in running),
+                'bytes_per_second': sum(job.bytes_per_second for job in running)}
+
+    def shutdown(self, cancel=True):
+        """取消（或等待）所有工作並結束執行緒池"""
+        if cancel:
+            for job in self.active():
+                job.cancel()
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
@@ -0,0 +1,291 @@
+"""虛擬化縮圖格狀檢視。
+
+以 QListView + 模型/委派取代每頁一組 QFrame/QLabel 的做法：只有可見的格子
+會被繪製，捲動時才透過 visible_range_changed 要求渲染對應頁面。
+"""
+from PySide6.QtCore import (
+    Qt, QAbstractListModel, QModelIndex, QRect, QSize, QTimer, Signal
+)
+from PySide6.QtGui import QColor, QPainter, QPen
+from PySide6.QtWidgets import QListView, QStyledItemDelegate, QAbstractItemView
+
+from docsplit_pixstore import PixmapStore
+from docsplit_selection import PageSelection
+
+
+COLUMNS = 4
+CELL_PADDING = 10
+LABEL_HEIGHT = 28
+GRID_SPACING = 15
+
+SELECTED_COLOR = QColor("#e0e0ff")
+CELL_COLOR = QColor("white")
+BORDER_COLOR = QColor("#d0d7e4")
+PLACEHOLDER_COLOR = QColor("#eef1f6")
+DUPLICATE_COLOR = QColor("#f0a030")
+
+SelectedRole = Qt.UserRole + 1
+# 重複組的代表頁頁碼（組內最早的頁面），不屬於任何重複組為 None
+DuplicateRole = Qt.UserRole + 2
+# 頁面寬高比，尚未得知為 None；縮圖渲染前以此比例繪製佔位
+AspectRole = Qt.UserRole + 3
+
+
+class ThumbnailModel(QAbstractListModel):
+    """每列一頁；縮圖存放在有記憶體預算的 PixmapStore"""
+
+    def __init__(self, parent=None, store=None, selection=None):
+        super().__init__(parent)
+        self.page_count = 0
+        self.store = store or PixmapStore()
+        self.selection = selection if selection is not None else PageSelection()
+        # 每頁所屬重複組的代表頁（-1 為不重複），None 表示不標示
+        self.duplicate_groups = None
+        # page_labels(列) -> 頁面標籤，例如多文件工作區的「檔名 · 頁碼」；None 為「頁 N」
+        self.page_labels = None
+        # 每頁的寬高比（0 為未知），渲染前由頁面大小先行填入
+        self.page_aspects = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.page_count
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        if role == Qt.DisplayRole:
+            if self.page_labels is not None:
+                return self.page_labels(row)
+            return f"頁 {row + 1}"
+        if role == Qt.DecorationRole:
+            return self.store.get(row)
+        if role == SelectedRole:
+            return row in self.selection
+        if role == DuplicateRole:
+            if self.duplicate_groups is None or row >= len(self.duplicate_groups):
+                return None
+            group = int(self.duplicate_groups[row])
+            return group if group >= 0 else None
+        if role == AspectRole:
+            if row < len(self.page_aspects) and self.page_aspects[row] > 0:
+                return self.page_aspects[row]
+            return None
+        return None
+
+    def clear(self):
+        self.beginResetModel()
+        self.page_count = 0
+        self.duplicate_groups = None
+        self.page_aspects = []
+        self.store.clear()
+        self.selection.resize(0)
+        self.selection.take_dirty()
+        self.endResetModel()
+
+    def set_page_count(self, count):
+        if count == self.page_count:
+            return
+        if self.page_count and count > self.page_count:
+            # 工作區加入文件時在後面插入列，保留捲動位置
+            self.beginInsertRows(QModelIndex(), self.page_count, count - 1)
+            self.page_count = count
+            self.selection.resize(count)
+            self.endInsertRows()
+            return
+        self.beginResetModel()
+        self.page_count = count
+        self.selection.resize(count)
+        self.endResetModel()
+
+    def set_pixmap(self, row, pixmap):
+        if row >= self.page_count:
+            # PPT 頁數可能晚於縮圖得知，依需要擴充
+            self.beginInsertRows(QModelIndex(), self.page_count, row)
+            self.page_count = row + 1
+            self.selection.resize(self.page_count)
+            self.endInsertRows()
+        self.store.put(row, pixmap)
+        idx = self.index(row)
+        self.dataChanged.emit(idx, idx, [Qt.DecorationRole])
+
+    def has_pixmap(self, row):
+        return row in self.store
+
+    def evicted_rows(self, first, last):
+        """範圍內曾渲染但已被淘汰、需要重新渲染的頁面"""
+        return [row for row in range(first, last + 1) if self.store.was_evicted(row)]
+
+    def set_page_sizes(self, first, sizes):
+        """由第 first 列起填入頁面大小 [(寬, 高)]，佔位改以頁面比例繪製"""
+        if not sizes:
+            return
+        end = first + len(sizes)
+        if len(self.page_aspects) < end:
+            self.page_aspects.extend([0.0] * (end - len(self.page_aspects)))
+        self.page_aspects[first:end] = [width / height if height > 0 else 0.0 for width, height in sizes]
+        last = min(end, self.page_count) - 1
+        if first <= last:
+            self.dataChanged.emit(self.index(first), self.index(last), [AspectRole])
+
+    def set_duplicate_groups(self, groups):
+        """標示重複頁面；groups 為每頁的代表頁陣列，None 取消標示"""
+        self.duplicate_groups = groups
+        if self.page_count:
+            self.dataChanged.emit(self.index(0), self.index(self.page_count - 1),
+                                  [DuplicateRole, Qt.DisplayRole])
+
+    def refresh_selection(self):
+        """將累積的選取變動以單一 dataChanged 通知檢視"""
+        dirty = self.selection.take_dirty()
+        if dirty and self.page_count:
+            first, last = dirty[0], min(dirty[1], self.page_count - 1)
+            self.dataChanged.emit(self.index(first), self.index(last), [SelectedRole])
+
+
+class ThumbnailDelegate(QStyledItemDelegate):
+    """繪製縮圖格：外框、縮圖（置中）與頁碼"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.thumbnail_size = QSize(200, 150)
+
+    def sizeHint(self, option, index):
+        return QSize(self.thumbnail_size.width() + CELL_PADDING * 2,
+                     self.thumbnail_size.height() + LABEL_HEIGHT + CELL_PADDING * 2)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+
+        cell = option.rect.adjusted(2, 2, -2, -2)
+        background = SELECTED_COLOR if index.data(SelectedRole) else CELL_COLOR
+        group = index.data(DuplicateRole)
+        if group is None:
+            painter.setPen(QPen(BORDER_COLOR, 1))
+        else:
+            painter.setPen(QPen(DUPLICATE_COLOR, 3))
+        painter.setBrush(background)
+        painter.drawRoundedRect(cell, 6, 6)
+
+        thumb_rect = QRect(cell.left() + CELL_PADDING, cell.top() + CELL_PADDING,
+                           cell.width() - CELL_PADDING * 2,
+                           cell.height() - LABEL_HEIGHT - CELL_PADDING * 2)
+        pixmap = index.data(Qt.DecorationRole)
+        if pixmap is not None:
+            size = pixmap.deviceIndependentSize().toSize().scaled(thumb_rect.size(), Qt.KeepAspectRatio)
+            target = QRect(0, 0, size.width(), size.height())
+            target.moveCenter(thumb_rect.center())
+            painter.drawPixmap(target, pixmap)
+        else:
+            # 尚未渲染的頁面顯示佔位，已知頁面大小時依頁面比例繪製，縮圖出現時版面不跳動
+            target = thumb_rect
+            aspect = index.data(AspectRole)
+            if aspect:
+                size = QSize(round(1000 * aspect), 1000).scaled(thumb_rect.size(), Qt.KeepAspectRatio)
+                target = QRect(0, 0, size.width(), size.height())
+                target.moveCenter(thumb_rect.center())
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(PLACEHOLDER_COLOR)
+            painter.drawRect(target)
+
+        painter.setPen(option.palette.text().color())
+        label_rect = QRect(cell.left(), thumb_rect.bottom() + 1, cell.width(), LABEL_HEIGHT)
+        label = index.data(Qt.DisplayRole)
+        if group is not None and group != index.row():
+            label = f"{label} ≈ {group + 1}"
+        label = painter.fontMetrics().elidedText(label, Qt.ElideMiddle, label_rect.width() - CELL_PADDING)
+        painter.drawText(label_rect, Qt.AlignCenter, label)
+        painter.restore()
+
+
+class ThumbnailView(QListView):
+    """固定 4 欄的虛擬化縮圖檢視"""
+
+    # (頁碼, 是否按住 Shift)
+    page_clicked = Signal(int, bool)
+    visible_range_changed = Signal(int, int)
+
+    def __init__(self, parent=None, selection=None):
+        super().__init__(parent)
+        self.thumbnail_model = ThumbnailModel(self, selection=selection)
+        self.delegate = ThumbnailDelegate(self)
+        self.setModel(self.thumbnail_model)
+        self.setItemDelegate(self.delegate)
+
+        self.setViewMode(QListView.IconMode)
+        self.setFlow(QListView.LeftToRight)
+        self.setWrapping(True)
+        self.setMovement(QListView.Static)
+        self.setResizeMode(QListView.Adjust)
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QListView.Batched)
+        self.setBatchSize(200)
+        self.setSelectionMode(QAbstractItemView.NoSelection)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setMouseTracking(False)
+
+        # 捲動時合併多次事件，再回報可見範圍
+        self._range_timer = QTimer(self)
+        self._range_timer.setSingleShot(True)
+        self._range_timer.setInterval(30)
+        self._range_timer.timeout.connect(self.emit_visible_range)
+        self.verticalScrollBar().valueChanged.connect(self.schedule_visible_range)
+        self.thumbnail_model.modelReset.connect(self.schedule_visible_range)
+        self.thumbnail_model.rowsInserted.connect(self.schedule_visible_range)
+
+        # 同一輪事件中的多次選取變動只重繪一次
+        self._selection_timer = QTimer(self)
+        self._selection_timer.setSingleShot(True)
+        self._selection_timer.setInterval(0)
+        self._selection_timer.timeout.connect(self.thumbnail_model.refresh_selection)
+
+        self.update_grid_size()
+
+    def set_thumbnail_size(self, size):
+        self.delegate.thumbnail_size = size
+        self.update_grid_size()
+
+    def cell_size(self):
+        return self.delegate.sizeHint(None, QModelIndex())
+
+    def update_grid_size(self):
+        cell = self.cell_size()
+        width = max(cell.width() + GRID_SPACING, self.viewport().width() // COLUMNS)
+        self.setGridSize(QSize(width, cell.height() + GRID_SPACING))
+        self.schedule_visible_range()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_grid_size()
+
+    def mousePressEvent(self, event):
+        index = self.indexAt(event.position().toPoint())
+        if index.isValid() and event.button() == Qt.LeftButton:
+            self.page_clicked.emit(index.row(), bool(event.modifiers() & Qt.ShiftModifier))
+        super().mousePressEvent(event)
+
+    def visible_range(self):
+        """回傳目前可見的 (第一頁, 最後一頁)；沒有頁面時回傳 None"""
+        count = self.thumbnail_model.rowCount()
+        if count == 0:
+            return None
+        grid = self.gridSize()
+        cols = max(1, self.viewport().width() // grid.width())
+        first_row = max(0, self.verticalScrollBar().value() // grid.height())
+        visible_rows = self.viewport().height() // grid.height() + 2
+        first = min(count - 1, first_row * cols)
+        last = min(count - 1, (first_row + visible_rows) * cols - 1)
+        return first, last
+
+    def schedule_selection_refresh(self):
+        self._selection_timer.start()
+
+    def schedule_visible_range(self, *args):
+        # 訊號參數（捲軸位置等）不可傳給 QTimer.start，否則會被當成間隔
+        self._range_timer.start()
+
+    def emit_visible_range(self):
+        visible = self.visible_range()
+        if visible:
+            self.visible_range_changed.emit(*visible)
@@ -0,0 +1,233 @@
+"""N-up 拼版引擎。
+
+來源頁面以 insert_pdf 一次匯入輸出文件（共用字型、影像只複製一份），
+每頁轉成一個 Form XObject，之後每個格子只需在內容串流寫一行
+"q <矩陣> cm /Pn Do Q"。同一來源頁面出現多次時重複使用同一個 XObject。
+支援任意行列、紙張大小、邊界、間距與方向，並保持頁面比例。本模組不依賴 Qt。
+"""
+import math
+
+import fitz
+
+import docsplit_trace
+from docsplit_core import coalesce_runs
+from docsplit_jobs import check
+
+
+PAPER_SIZES = ('a4', 'a3', 'a5', 'b5', 'letter', 'legal')
+ORIENTATIONS = ('auto', 'portrait', 'landscape')
+
+# 單位為 pt（1/72 英吋）
+DEFAULT_MARGIN = 18
+DEFAULT_GUTTER = 6
+
+# 講義常用的每張頁數與直式紙張上的 (列, 欄)
+COMMON_GRIDS = {1: (1, 1), 2: (2, 1), 4: (2, 2), 6: (3, 2), 8: (4, 2), 9: (3, 3), 16: (4, 4)}
+
+
+def grid_for(count):
+    """每張 count 頁時直式紙張的 (列, 欄)"""
+    if count in COMMON_GRIDS:
+        return COMMON_GRIDS[count]
+    cols = max(1, math.ceil(math.sqrt(count)))
+    return math.ceil(count / cols), cols
+
+
+class ImpositionLayout:
+    """拼版設定；rows/cols 以直式紙張為準，橫式時自動對調"""
+
+    def __init__(self, rows=1, cols=1, paper='a4', orientation='auto',
+                 margin=DEFAULT_MARGIN, gutter=DEFAULT_GUTTER, keep_aspect=True):
+        if rows < 1 or cols < 1:
+            raise ValueError(f"無效的版面/Invalid grid: {rows}x{cols}")
+        if orientation not in ORIENTATIONS:
+            raise ValueError(f"無效的方向/Invalid orientation: {orientation}")
+        self.rows = rows
+        self.cols = cols
+        self.paper = paper
+        self.orientation = orientation
+        self.margin = margin
+        self.gutter = gutter
+        self.keep_aspect = keep_aspect
+
+    @classmethod
+    def for_count(cls, count, **kwargs):
+        rows, cols = grid_for(count)
+        return cls(rows, cols, **kwargs)
+
+    @property
+    def per_sheet(self):
+        return self.rows * self.cols
+
+    def _cell_scale(self, width, height, rows, cols, src_width, src_height):
+        cell_w = (width - 2 * self.margin - (cols - 1) * self.gutter) / cols
+        cell_h = (height - 2 * self.margin - (rows - 1) * self.gutter) / rows
+        return min(cell_w / src_width, cell_h / src_height)
+
+    def resolve(self, src_width=1, src_height=1):
+        """依來源頁面比例決定方向，回傳 (紙寬, 紙高, 列, 欄)"""
+        width, height = fitz.paper_size(self.paper)
+        if width < 0:
+            raise ValueError(f"未知的紙張大小/Unknown paper size: {self.paper}")
+        portrait = (width, height, self.rows, self.cols)
+        landscape = (height, width, self.cols, self.rows)
+        if self.orientation == 'portrait':
+            return portrait
+        if self.orientation == 'landscape':
+            return landscape
+        if (self._cell_scale(*landscape, src_width, src_height)
+                > self._cell_scale(*portrait, src_width, src_height)):
+            return landscape
+        return portrait
+
+    def cells(self, width, height, rows, cols):
+        """由左到右、由上到下的格子矩形（fitz 座標）"""
+        cell_w = (width - 2 * self.margin - (cols - 1) * self.gutter) / cols
+        cell_h = (height - 2 * self.margin - (rows - 1) * self.gutter) / rows
+        if cell_w <= 0 or cell_h <= 0:
+            raise ValueError("邊界或間距過大/Margins and gutters leave no room for pages")
+        rects = []
+        for row in range(rows):
+            for col in range(cols):
+                x0 = self.margin + col * (cell_w + self.gutter)
+                y0 = self.margin + row * (cell_h + self.gutter)
+                rects.append(fitz.Rect(x0, y0, x0 + cell_w, y0 + cell_h))
+        return rects
+
+
+def _place_matrix(src_rect, rotation, target, keep_aspect):
+    """將來源（PDF 座標）置中縮放、依 /Rotate 順時針旋轉到目標矩形的矩陣"""
+    m = fitz.Matrix(1, 0, 0, 1, -(src_rect.x0 + src_rect.x1) / 2, -(src_rect.y0 + src_rect.y1) / 2)
+    m *= fitz.Matrix(-rotation)
+    src_w, src_h = src_rect.width, src_rect.height
+    if rotation % 180:
+        src_w, src_h = src_h, src_w
+    fw, fh = target.width / src_w, target.height / src_h
+    if keep_aspect:
+        fw = fh = min(fw, fh)
+    m *= fitz.Matrix(fw, fh)
+    m *= fitz.Matrix(1, 0, 0, 1, (target.x0 + target.x1) / 2, (target.y0 + target.y1) / 2)
+    return m
+
+
+def _box(doc, xref, key):
+    kind, value = doc.xref_get_key(xref, key)
+    if kind != 'array':
+        return None
+    return fitz.Rect([float(v) for v in value.strip('[]').split()]).normalize()
+
+
+def _page_xrefs(doc):
+    """依頁序列出匯入頁面的 xref；直接讀取頁面樹，避免逐頁查找"""
+    xrefs = []
+    root = doc.xref_get_key(doc.pdf_catalog(), "Pages")[1]
+    stack = [int(root.split()[0])]
+    while stack:
+        xref = stack.pop()
+        if doc.xref_get_key(xref, "Type")[1] == '/Page':
+            xrefs.append(xref)
+            continue
+        kids = doc.xref_get_key(xref, "Kids")[1].strip('[]').split()
+        stack.extend(int(kid) for kid in reversed(kids[0::3]))
+    return xrefs
+
+
+def _make_form(doc, page_xref, used_streams):
+    """將匯入的頁面物件轉成 Form XObject，回傳 (xref, 可見範圍, 旋轉角度)"""
+    kind, rotate = doc.xref_get_key(page_xref, "Rotate")
+    rotation = int(float(rotate)) % 360 if kind == 'int' or kind == 'float' else 0
+    mediabox = _box(doc, page_xref, "MediaBox") or fitz.Rect(fitz.paper_rect('a4'))
+    cropbox = _box(doc, page_xref, "CropBox")
+    # 可見範圍（裁切框）的 PDF 座標
+    src_rect = mediabox & cropbox if cropbox else mediabox
+
+    kind, contents = doc.xref_get_key(page_xref, "Contents")
+    streams = [int(x) for x in contents.strip('[]').split()[0::3]] if kind in ('xref', 'array') else []
+    data = b"\n".join(doc.xref_stream(x) or b"" for x in streams)
+    if len(streams) == 1 and streams[0] not in used_streams:
+        # 單一內容串流直接改寫為 Form，不另建物件
+        xref = streams[0]
+    else:
+        xref = doc.get_new_xref()
+    used_streams.add(xref)
+
+    kind, resources = doc.xref_get_key(page_xref, "Resources")
+    if kind == 'null':
+        resources = "<<>>"
+    # 整個字典一次改寫比逐鍵設定快；改寫會捨棄串流，因此隨後寫回
+    doc.update_object(xref, (
+        f"<</Type/XObject/Subtype/Form"
+        f"/BBox[{src_rect.x0:g} {src_rect.y0:g} {src_rect.x1:g} {src_rect.y1:g}]"
+        f"/Resources {resources}>>"))
+    doc.update_stream(xref, data)
+    return xref, src_rect, rotation
+
+
+@docsplit_trace.traced("impose")
+def impose(src_document, layout, indexes=None, token=None):
+    """依版面將來源頁面（預設全部，依給定順序）拼到新文件，回傳 fitz.Document"""
+    if indexes is None:
+        indexes = range(src_document.page_count)
+    indexes = list(indexes)
+    unique = sorted(set(indexes))
+
+    doc = fitz.open()
+    try:
+        # 以連續區段匯入來源頁面，共用資源只複製一次
+        for start, end in coalesce_runs(unique):
+            check(token)
+            doc.insert_pdf(src_document, from_page=start, to_page=end)
+
+        page_xrefs = _page_xrefs(doc)
+        forms = {}
+        used_streams = set()
+        for position, page_xref in enumerate(page_xrefs):
+            if position % 64 == 0:
+                check(token)
+            forms[unique[position]] = _make_form(doc, page_xref, used_streams)
+
+        if unique:
+            first_rect, first_rotation = forms[indexes[0]][1], forms[indexes[0]][2]
+            src_w, src_h = first_rect.width, first_rect.height
+            if first_rotation % 180:
+                src_w, src_h = src_h, src_w
+        else:
+            src_w, src_h = 1, 1
+        width, height, rows, cols = layout.resolve(src_w, src_h)
+        cells = layout.cells(width, height, rows, cols)
+        # 輸出頁面為 fitz 座標，PDF 座標的 y 軸向上
+        flip = fitz.Matrix(1, 0, 0, -1, 0, height)
+        pdf_cells = [cell * flip for cell in cells]
+
+        per_sheet = len(cells)
+        sheets = math.ceil(len(indexes) / per_sheet)
+        # 內容已轉為 XObject 的匯入頁面物件直接改寫為輸出頁面，
+        # 省去逐頁新增與刪除；重複頁面使張數超過匯入頁數時才新增
+        while len(page_xrefs) < sheets:
+            page_xrefs.append(doc.new_page(-1, width=width, height=height).xref)
+        if len(page_xrefs) > sheets:
+            doc.select(range(sheets))
+
+        for sheet, page_xref in enumerate(page_xrefs[:sheets]):
+            if sheet % 64 == 0:
+                check(token)
+            names = []
+            stream = []
+            sheet_indexes = indexes[sheet * per_sheet:(sheet + 1) * per_sheet]
+            for slot, index in enumerate(sheet_indexes):
+                xref, src_rect, rotation = forms[index]
+                m = _place_matrix(src_rect, rotation, pdf_cells[slot], layout.keep_aspect)
+                names.append(f"/P{slot} {xref} 0 R")
+                stream.append(f"q {m.a:.5f} {m.b:.5f} {m.c:.5f} {m.d:.5f} {m.e:.3f} {m.f:.3f} cm /P{slot} Do Q")
+
+            contents = doc.get_new_xref()
+            doc.update_object(contents, "<<>>")
+            doc.update_stream(contents, "\n".join(stream).encode())
+            parent = doc.xref_get_key(page_xref, "Parent")[1]
+            doc.update_object(page_xref, (
+                f"<</Type/Page/Parent {parent}/MediaBox[0 0 {width:g} {height:g}]"
+                f"/Contents {contents} 0 R/Resources<</XObject<<{''.join(names)}>>>>>>"))
+    except BaseException:
+        doc.close()
+        raise
+    return doc
@@ -0,0 +1,178 @@
+"""頁面全文索引。
+
+以 fitz 擷取每頁文字，存入與縮圖快取同目錄的 SQLite FTS5 資料庫，
+依來源文件路徑分組。每頁記錄內容串流的摘要：文件修改後只重新擷取摘要
+改變的頁面；內容雜湊未變時完全不必開啟文件。索引使用 trigram 分詞，
+中文等不以空白分詞的文字也能以子字串搜尋。本模組不依賴 Qt。
+"""
+import os
+import sqlite3
+import hashlib
+
+import fitz
+
+import docsplit_cache
+from docsplit_jobs import check
+
+
+INDEX_FILE = 'pages.sqlite'
+# 每擷取這麼多頁提交一次，中斷後下次可從已提交的頁面繼續
+COMMIT_EVERY = 200
+# trigram 分詞無法比對少於三個字元的詞，改以 LIKE 逐頁比對
+MIN_TRIGRAM_CHARS = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    content_hash TEXT,
+    page_count INTEGER
+);
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    doc_id INTEGER NOT NULL,
+    page INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    UNIQUE (doc_id, page)
+);
+"""
+
+
+def default_index_path():
+    return os.path.join(docsplit_cache.default_cache_dir(), INDEX_FILE)
+
+
+def page_digest(page):
+    """頁面內容串流的摘要，用來判斷頁面是否需要重新擷取文字"""
+    return hashlib.blake2b(page.read_contents(), digest_size=16).hexdigest()
+
+
+def _like_pattern(term):
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+
+class PageIndex:
+    """單一 SQLite 連線；背景擷取與介面查詢各自建立實例"""
+
+    def __init__(self, path=None):
+        self.path = path or default_index_path()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.db = sqlite3.connect(self.path, timeout=30)
+        # WAL 讓介面查詢不會被背景寫入阻擋
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_SCHEMA)
+        try:
+            self.db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS page_text "
+                            "USING fts5(text, tokenize='trigram')")
+        except sqlite3.OperationalError:
+            # SQLite 3.34 之前沒有 trigram 分詞
+            self.db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS page_text USING fts5(text)")
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _document(self, key):
+        row = self.db.execute("SELECT id, content_hash, page_count FROM documents WHERE path = ?",
+                              (key,)).fetchone()
+        if row:
+            return row
+        cursor = self.db.execute("INSERT INTO documents (path) VALUES (?)", (key,))
+        return cursor.lastrowid, None, None
+
+    def is_current(self, key, content_hash):
+        row = self.db.execute("SELECT content_hash FROM documents WHERE path = ?", (key,)).fetchone()
+        return row is not None and row[0] == content_hash
+
+    def update(self, key, pdf_path, content_hash, token=None, progress=None):
+        """將 pdf_path 的文字索引到 key（通常是來源文件路徑）下，回傳重新擷取的頁數。
+
+        progress(已處理, 總頁數) 每處理一頁呼叫一次。
+        """
+        doc_id, indexed_hash, _ = self._document(key)
+        if indexed_hash == content_hash:
+            return 0
+
+        digests = dict(self.db.execute("SELECT page, digest FROM pages WHERE doc_id = ?", (doc_id,)))
+        extracted = 0
+        with fitz.open(pdf_path) as pdf_document:
+            total = pdf_document.page_count
+            for number in range(total):
+                if number % 32 == 0:
+                    check(token)
+                page = pdf_document[number]
+                digest = page_digest(page)
+                if digests.get(number) != digest:
+                    self._put_page(doc_id, number, digest, page.get_text())
+                    extracted += 1
+                    if extracted % COMMIT_EVERY == 0:
+                        self.db.commit()
+                if progress:
+                    progress(number + 1, total)
+
+        # 頁數減少時移除多出的頁面
+        stale = [row[0] for row in self.db.execute(
+            "SELECT id FROM pages WHERE doc_id = ? AND page >= ?", (doc_id, total))]
+        self.db.executemany("DELETE FROM page_text WHERE rowid = ?", [(i,) for i in stale])
+        self.db.executemany("DELETE FROM pages WHERE id = ?", [(i,) for i in stale])
+        self.db.execute("UPDATE documents SET content_hash = ?, page_count = ? WHERE id = ?",
+                        (content_hash, total, doc_id))
+        self.db.commit()
+        return extracted
+
+    def _put_page(self, doc_id, number, digest, text):
+        row = self.db.execute("SELECT id FROM pages WHERE doc_id = ? AND page = ?",
+                              (doc_id, number)).fetchone()
+        if row:
+            page_id = row[0]
+            self.db.execute("UPDATE pages SET digest = ? WHERE id = ?", (digest, page_id))
+            self.db.execute("DELETE FROM page_text WHERE rowid = ?", (page_id,))
+        else:
+            page_id = self.db.execute("INSERT INTO pages (doc_id, page, digest) VALUES (?, ?, ?)",
+                                      (doc_id, number, digest)).lastrowid
+        self.db.execute("INSERT INTO page_text (rowid, text) VALUES (?, ?)", (page_id, text))
+
+    def indexed_pages(self, key):
+        row = self.db.execute(
+            "SELECT COUNT(*) FROM pages JOIN documents ON documents.id = pages.doc_id "
+            "WHERE documents.path = ?", (key,)).fetchone()
+        return row[0]
+
+    def search(self, key, query):
+        """回傳包含查詢中所有詞（以空白分隔，不分大小寫）的頁碼（0 起算，已排序）"""
+        terms = query.split()
+        if not terms:
+            return []
+        long_terms = [t for t in terms if len(t) >= MIN_TRIGRAM_CHARS]
+        short_terms = [t for t in terms if len(t) < MIN_TRIGRAM_CHARS]
+
+        document = self.db.execute("SELECT id FROM documents WHERE path = ?", (key,)).fetchone()
+        if document is None:
+            return []
+
+        conditions = []
+        params = []
+        if long_terms:
+            conditions.append("page_text MATCH ?")
+            params.append(" AND ".join('"%s"' % t.replace('"', '""') for t in long_terms))
+        for term in short_terms:
+            conditions.append("text LIKE ? ESCAPE '\\'")
+            params.append(_like_pattern(term))
+        where = " AND ".join(conditions)
+
+        if long_terms:
+            # 先由全文索引找出候選頁面再篩選文件；若讓 SQLite 逐頁求值 MATCH 會慢上千倍
+            sql = (f"SELECT page FROM pages WHERE doc_id = ? AND id IN "
+                   f"(SELECT rowid FROM page_text WHERE {where}) ORDER BY page")
+        else:
+            sql = (f"SELECT pages.page FROM pages JOIN page_text ON page_text.rowid = pages.id "
+                   f"WHERE pages.doc_id = ? AND {where} ORDER BY pages.page")
+        return [row[0] for row in self.db.execute(sql, [document[0]] + params)]
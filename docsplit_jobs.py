@@ -0,0 +1,97 @@
+"""可取消的工作與文件世代編號。
+
+每次開啟新文件都會進入新的世代，上一世代所有工作的取消權杖會被觸發。
+工作在安全點檢查權杖並提早結束；回到介面的結果若不屬於目前世代就直接
+丟棄。本模組不依賴 Qt。
+"""
+import threading
+
+
+class CancelledError(Exception):
+    """工作已被取消"""
+
+
+class CancelToken:
+    """執行緒安全的取消旗標，可註冊取消時釋放資源的回呼"""
+
+    def __init__(self, generation=0):
+        self.generation = generation
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def on_cancel(self, callback):
+        """取消時呼叫 callback；已取消則立即呼叫"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise CancelledError()
+
+    def wait(self, timeout=None):
+        """等待取消，回傳是否已取消"""
+        return self._event.wait(timeout)
+
+
+def check(token):
+    """可選權杖的安全點檢查"""
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+class JobTracker:
+    """管理文件世代與各世代中進行中的工作"""
+
+    def __init__(self):
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._tokens = set()
+
+    def new_generation(self):
+        """取消目前世代所有工作並進入下一世代"""
+        with self._lock:
+            self.generation += 1
+            tokens, self._tokens = self._tokens, set()
+        for token in tokens:
+            token.cancel()
+        return self.generation
+
+    def start(self):
+        """建立屬於目前世代的取消權杖"""
+        with self._lock:
+            token = CancelToken(self.generation)
+            self._tokens.add(token)
+        return token
+
+    def finish(self, token):
+        with self._lock:
+            self._tokens.discard(token)
+
+    def is_current(self, generation):
+        return generation == self.generation
+
+    def cancel_all(self):
+        with self._lock:
+            tokens, self._tokens = self._tokens, set()
+        for token in tokens:
+            token.cancel()
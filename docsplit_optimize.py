@@ -0,0 +1,293 @@
+"""匯出時的影像最佳化。
+
+在組好的文件存檔前，將解析度超過目標 DPI 的影像縮小，並重新壓縮為 JPEG
+（指定品質）或無損的 Flate。相同的影像串流（原始位元組與字典皆相同）只處理
+一次，其餘頁面的參照改指向同一個物件，存檔時清除重複的副本。
+
+解碼、縮放與壓縮在行程池中平行進行：主行程只複製原始串流交給工作行程，
+再把結果寫回文件，不在持有 GIL 的情況下解碼影像。縮小後反而變大、或使用
+不支援的色彩空間、遮罩、1 位元影像與 JBIG2 的影像維持原樣。本模組不依賴 Qt。
+"""
+import os
+import re
+import zlib
+import hashlib
+import multiprocessing
+from time import perf_counter
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import fitz
+
+import docsplit_trace
+from docsplit_jobs import check
+
+
+JPEG = 'jpeg'
+FLATE = 'flate'
+
+# max_dpi 為顯示解析度上限（None 為不縮小）；mode 為 JPEG 或 FLATE；quality 為 JPEG 品質；
+# workers 為平行行程數，None 為 CPU 數減一
+ImageOptions = namedtuple('ImageOptions', 'max_dpi mode quality workers', defaults=(None,))
+
+IMAGE_PRESETS = {
+    'email': ImageOptions(150, JPEG, 70),
+    'print': ImageOptions(300, JPEG, 85),
+    'lossless': ImageOptions(300, FLATE, None),
+}
+
+# 解析度超過 max_dpi 的這個倍數才縮小，避免為了些微差距重新取樣
+DOWNSAMPLE_THRESHOLD = 1.1
+# 小於此大小的影像（圖示、標誌）不處理
+MIN_IMAGE_BYTES = 16 * 1024
+# 同時交給行程池的影像數（每個工作行程），限制複製出的原始串流占用的記憶體
+IN_FLIGHT_PER_WORKER = 2
+
+_DEVICE_SPACES = {'/DeviceGray': 1, '/DeviceRGB': 3}
+_SPACE_NAMES = {1: '/DeviceGray', 3: '/DeviceRGB'}
+
+# images 為不同的影像物件數，duplicates 為其中與其他影像相同而合併的數量
+OptimizeReport = namedtuple('OptimizeReport', 'images duplicates downsampled recompressed '
+                                              'bytes_before bytes_after seconds')
+
+
+def default_workers():
+    """保留一個核心給介面執行緒"""
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def format_report(report):
+    """例如「影像 40 張（重複 12）：85.3 MB → 6.1 MB，-93%，1.8 s」"""
+    saved = report.bytes_before - report.bytes_after
+    percent = saved * 100 / report.bytes_before if report.bytes_before else 0
+    return (f"影像/Images {report.images} (重複/duplicates {report.duplicates}, "
+            f"縮小/downsampled {report.downsampled}, 重新壓縮/recompressed {report.recompressed}): "
+            f"{report.bytes_before / 1024 ** 2:.1f} MB → {report.bytes_after / 1024 ** 2:.1f} MB "
+            f"(-{percent:.0f}%), {report.seconds:.1f} s")
+
+
+def _components(doc, xref):
+    """影像的色彩成分數（灰階 1、RGB 3）；其他色彩空間回傳 None"""
+    kind, value = doc.xref_get_key(xref, 'ColorSpace')
+    if kind == 'name':
+        return _DEVICE_SPACES.get(value)
+    if kind == 'xref':
+        value = doc.xref_object(int(value.split()[0]), compressed=True)
+    # ICC 色彩空間依其成分數處理，Indexed、Separation 等維持原樣
+    match = re.fullmatch(r'\s*\[\s*/ICCBased\s+(\d+)\s+0\s+R\s*\]\s*', value)
+    if match is None:
+        return None
+    n = doc.xref_get_key(int(match.group(1)), 'N')[1]
+    return int(n) if n in ('1', '3') else None
+
+
+def _image_info(doc, xref):
+    """回傳工作行程解碼所需的資訊 dict；不支援的影像回傳 None"""
+    def get(key):
+        return doc.xref_get_key(xref, key)[1]
+
+    if get('Subtype') != '/Image' or get('ImageMask') == 'true' or get('BitsPerComponent') != '8':
+        return None
+    if get('Mask') != 'null' or get('Decode') != 'null':
+        return None
+    filters = get('Filter')
+    params = get('DecodeParms')
+    # JBIG2 的全域資料與其他間接參照無法帶到工作行程
+    if 'JBIG2' in filters or ' R' in params or filters.startswith('['):
+        return None
+    n = _components(doc, xref)
+    if n is None:
+        return None
+    return {'width': int(get('Width')), 'height': int(get('Height')), 'n': n,
+            'filter': filters, 'params': params}
+
+
+def _display_dpi(uses, width, height):
+    """影像在各處顯示的最低解析度；沒有顯示位置時回傳 None"""
+    dpi = None
+    for rect in uses:
+        if rect.width <= 0 or rect.height <= 0:
+            continue
+        use = min(width / (rect.width / 72), height / (rect.height / 72))
+        dpi = use if dpi is None else min(dpi, use)
+    return dpi
+
+
+def _recompress(raw, info, scale, options):
+    """工作行程：解碼原始串流，縮放並重新壓縮，回傳 (資料, 寬, 高, 濾鏡) 或 None"""
+    doc = fitz.open()
+    try:
+        xref = doc.get_new_xref()
+        doc.update_object(xref, f"<< /Type /XObject /Subtype /Image /Width {info['width']} "
+                                f"/Height {info['height']} /BitsPerComponent 8 "
+                                f"/ColorSpace {_SPACE_NAMES[info['n']]} >>")
+        doc.update_stream(xref, raw, compress=0)
+        if info['filter'] != 'null':
+            doc.xref_set_key(xref, 'Filter', info['filter'])
+        if info['params'] != 'null':
+            doc.xref_set_key(xref, 'DecodeParms', info['params'])
+        pixmap = fitz.Pixmap(doc, xref)
+    finally:
+        doc.close()
+    if pixmap.alpha:
+        pixmap = fitz.Pixmap(pixmap, 0)
+    if scale < 1:
+        width = max(1, round(pixmap.width * scale))
+        height = max(1, round(pixmap.height * scale))
+        pixmap = fitz.Pixmap(pixmap, width, height, None)
+    if options.mode == JPEG:
+        data, filters = pixmap.tobytes('jpg', jpg_quality=options.quality), '/DCTDecode'
+    else:
+        data, filters = zlib.compress(pixmap.samples), '/FlateDecode'
+    if len(data) >= len(raw):
+        return None
+    return data, pixmap.width, pixmap.height, filters
+
+
+def _content_key(doc, xref, keys, depth=2):
+    """物件內容的雜湊：串流取原始位元組，字典中的間接參照以被參照物件的內容代替，
+    因此來自不同來源、各自帶著一份相同 ICC 色彩空間的影像也視為相同"""
+    if xref in keys:
+        return keys[xref]
+    digest = hashlib.blake2b(digest_size=16)
+    text = re.sub(r'/Length \d+', '', doc.xref_object(xref, compressed=True))
+    if depth > 0:
+        text = re.sub(r'(\d+) 0 R', lambda m: _content_key(doc, int(m.group(1)), keys, depth - 1).hex(), text)
+    digest.update(text.encode())
+    if doc.xref_is_stream(xref):
+        digest.update(doc.xref_stream_raw(xref))
+    keys[xref] = digest.digest()
+    return keys[xref]
+
+
+def _plan(doc, options):
+    """找出所有影像：回傳 (影像 xref 列表, {重複的 xref: 代表 xref}, [(xref, info, 縮放比例)],
+    原始總位元組數)"""
+    uses = {}
+    for page in doc:
+        for item in page.get_images(full=True):
+            xref = item[0]
+            if xref not in uses:
+                uses[xref] = []
+            # get_image_bbox 依資源名稱解析內容串流，不必像 get_image_rects 解碼影像比對
+            try:
+                rect = page.get_image_bbox(item)
+            except (ValueError, RuntimeError):
+                continue
+            if rect.is_valid and not rect.is_infinite:
+                uses[xref].append(rect)
+
+    canonical = {}
+    seen = {}
+    keys = {}
+    tasks = []
+    total = 0
+    for xref, rects in uses.items():
+        raw_size = int(doc.xref_get_key(xref, 'Length')[1] or 0)
+        total += raw_size
+        # 原始串流與字典（不含長度）都相同才視為同一張影像
+        key = _content_key(doc, xref, keys)
+        if key in seen:
+            canonical[xref] = seen[key]
+            continue
+        seen[key] = xref
+        if raw_size < MIN_IMAGE_BYTES:
+            continue
+        info = _image_info(doc, xref)
+        if info is None:
+            continue
+        scale = 1.0
+        dpi = _display_dpi(rects, info['width'], info['height'])
+        if options.max_dpi and dpi and dpi > options.max_dpi * DOWNSAMPLE_THRESHOLD:
+            scale = options.max_dpi / dpi
+        # 已是 JPEG 且不需縮小的影像不再有損壓縮一次
+        if scale == 1.0 and (info['filter'] == '/DCTDecode' or options.mode == FLATE and info['filter'] != 'null'):
+            continue
+        tasks.append((xref, info, scale))
+    return list(uses), canonical, tasks, total
+
+
+def _resource_path(doc, owner, key):
+    """沿著 key 找到存放它的物件：回傳 (物件 xref, 在該物件中的鍵路徑)"""
+    path = ''
+    for part in key.split('/'):
+        path = f"{path}/{part}" if path else part
+        kind, value = doc.xref_get_key(owner, path)
+        if kind == 'xref':
+            owner, path = int(value.split()[0]), ''
+        elif kind == 'null':
+            return None
+    return owner, path
+
+
+def _merge_duplicates(doc, canonical):
+    """將頁面（與表單物件）資源中指向重複影像的參照改為代表影像"""
+    for page in doc:
+        for item in page.get_images(full=True):
+            xref, name, referencer = item[0], item[7], item[9]
+            if xref not in canonical:
+                continue
+            found = _resource_path(doc, referencer or page.xref, "Resources/XObject")
+            if found is None:
+                continue
+            owner, path = found
+            key = f"{path}/{name}" if path else name
+            if doc.xref_get_key(owner, key) == ('xref', f"{xref} 0 R"):
+                doc.xref_set_key(owner, key, f"{canonical[xref]} 0 R")
+
+
+def _apply(doc, xref, result):
+    data, width, height, filters = result
+    doc.update_stream(xref, data, compress=0)
+    doc.xref_set_key(xref, 'Filter', filters)
+    doc.xref_set_key(xref, 'DecodeParms', 'null')
+    doc.xref_set_key(xref, 'Width', str(width))
+    doc.xref_set_key(xref, 'Height', str(height))
+
+
+def optimize_images(doc, options, token=None):
+    """就地最佳化已開啟文件中的影像，回傳 OptimizeReport；存檔時須清除未使用的物件"""
+    start = perf_counter()
+    with docsplit_trace.span("optimize.plan"):
+        xrefs, canonical, tasks, before = _plan(doc, options)
+        _merge_duplicates(doc, canonical)
+    results = {}
+    workers = min(options.workers or default_workers(), len(tasks))
+    with docsplit_trace.span("optimize.images", images=len(tasks), workers=workers):
+        if workers <= 1:
+            for xref, info, scale in tasks:
+                check(token)
+                results[xref] = _recompress(doc.xref_stream_raw(xref), info, scale, options)
+        else:
+            # 與匯出行程相同使用 spawn；只讓有限數量的原始串流同時在途
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                queue = list(reversed(tasks))
+                pending = {}
+                try:
+                    while queue or pending:
+                        while queue and len(pending) < workers * IN_FLIGHT_PER_WORKER:
+                            xref, info, scale = queue.pop()
+                            pending[pool.submit(_recompress, doc.xref_stream_raw(xref), info, scale,
+                                                options)] = xref
+                        done, _ = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                        check(token)
+                        for future in done:
+                            results[pending.pop(future)] = future.result()
+                finally:
+                    for future in pending:
+                        future.cancel()
+
+    downsampled = recompressed = 0
+    for xref, info, scale in tasks:
+        result = results.get(xref)
+        if result is None:
+            continue
+        _apply(doc, xref, result)
+        if scale < 1:
+            downsampled += 1
+        else:
+            recompressed += 1
+    # 合併後的重複影像在存檔時清除，不計入
+    after = sum(int(doc.xref_get_key(xref, 'Length')[1] or 0) for xref in xrefs if xref not in canonical)
+    return OptimizeReport(len(xrefs), len(canonical), downsampled, recompressed, before, after,
+                          perf_counter() - start)
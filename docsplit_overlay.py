@@ -0,0 +1,69 @@
+"""效能面板。
+
+浮在縮圖檢視右上角的半透明標籤，每隔一段時間呼叫 stats() 取得
+(名稱, 數值) 列表並顯示，同時將數值記錄為追蹤計數器。隱藏時停止計時器，
+不產生任何負擔。
+"""
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtWidgets import QLabel
+
+import docsplit_trace
+
+
+REFRESH_MS = 500
+MARGIN = 8
+
+
+def format_bytes(size):
+    if size is None:
+        return "-"
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+class PerfOverlay(QLabel):
+    """stats() 回傳 [(名稱, 顯示文字, 計數器數值或 None), ...]"""
+
+    def __init__(self, parent, stats):
+        super().__init__(parent)
+        self.stats = stats
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.setTextFormat(Qt.PlainText)
+        self.setStyleSheet("QLabel { background: rgba(20, 20, 20, 190); color: #e8ffe8;"
+                           " font-family: monospace; padding: 6px; border-radius: 4px; }")
+        self._timer = QTimer(self)
+        self._timer.setInterval(REFRESH_MS)
+        self._timer.timeout.connect(self.refresh)
+        self.hide()
+        parent.installEventFilter(self)
+
+    def set_active(self, active):
+        if active:
+            self.refresh()
+            self.show()
+            self.raise_()
+            self._timer.start()
+        else:
+            self._timer.stop()
+            self.hide()
+
+    def refresh(self):
+        rows = self.stats()
+        self.setText("\n".join(f"{name}: {text}" for name, text, _ in rows))
+        values = {name: value for name, _, value in rows if value is not None}
+        if values:
+            docsplit_trace.counter("perf", **values)
+        self.adjustSize()
+        self.reposition()
+
+    def reposition(self):
+        parent = self.parentWidget()
+        self.move(max(0, parent.width() - self.width() - MARGIN), MARGIN)
+
+    def eventFilter(self, watched, event):
+        if watched is self.parentWidget() and event.type() == event.Type.Resize and self.isVisible():
+            self.reposition()
+        return False
@@ -0,0 +1,141 @@
+"""有記憶體預算的縮圖儲存區。
+
+最近使用的頁面保留為已解碼的 QPixmap；超過預算時，最久未使用的縮圖降級
+為壓縮後的位元組（JPEG/PNG/WebP）保存在記憶體中；壓縮層也超過預算時
+直接淘汰，需要時再重新渲染（通常會命中磁碟快取）。
+"""
+from collections import OrderedDict
+
+from PySide6.QtCore import QBuffer, QByteArray, QIODevice
+from PySide6.QtGui import QImageWriter, QPixmap
+
+
+DEFAULT_BUDGET_BYTES = 128 * 1024 * 1024
+DEFAULT_COMPRESSED_BUDGET_BYTES = 32 * 1024 * 1024
+DEFAULT_FORMAT = "JPG"
+DEFAULT_QUALITY = 85
+
+
+def pixmap_cost(pixmap):
+    return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+
+def supported_format(fmt):
+    """Qt 缺少對應的影像外掛（例如 WebP）時退回 PNG"""
+    formats = {bytes(f).decode().upper() for f in QImageWriter.supportedImageFormats()}
+    return fmt.upper() if fmt.upper() in formats else "PNG"
+
+
+class PixmapStore:
+    """兩層（解碼 / 壓縮）LRU 縮圖儲存區，並統計命中率"""
+
+    def __init__(self, budget_bytes=DEFAULT_BUDGET_BYTES,
+                 compressed_budget_bytes=DEFAULT_COMPRESSED_BUDGET_BYTES,
+                 fmt=DEFAULT_FORMAT, quality=DEFAULT_QUALITY):
+        self.budget_bytes = budget_bytes
+        self.compressed_budget_bytes = compressed_budget_bytes
+        self.format = supported_format(fmt)
+        self.quality = quality if self.format != "PNG" else -1
+        self.clear()
+
+    def clear(self):
+        self._hot = OrderedDict()
+        self._compressed = OrderedDict()
+        self._evicted = set()
+        self.hot_bytes = 0
+        self.compressed_bytes = 0
+        self.hits = 0
+        self.compressed_hits = 0
+        self.misses = 0
+        self.demotions = 0
+        self.evictions = 0
+
+    def __contains__(self, index):
+        return index in self._hot or index in self._compressed
+
+    def __len__(self):
+        return len(self._hot) + len(self._compressed)
+
+    def was_evicted(self, index):
+        """頁面曾經渲染過但已被淘汰，需要重新渲染"""
+        return index in self._evicted
+
+    def put(self, index, pixmap):
+        self._drop(index)
+        self._evicted.discard(index)
+        self._hot[index] = pixmap
+        self.hot_bytes += pixmap_cost(pixmap)
+        self._enforce_budget()
+
+    def get(self, index):
+        pixmap = self._hot.get(index)
+        if pixmap is not None:
+            self._hot.move_to_end(index)
+            self.hits += 1
+            return pixmap
+
+        entry = self._compressed.pop(index, None)
+        if entry is None:
+            # 只有曾經渲染、後來被淘汰的頁面才算未命中
+            if index in self._evicted:
+                self.misses += 1
+            return None
+
+        # 解壓後升級回解碼層
+        data, dpr = entry
+        self.compressed_bytes -= len(data)
+        pixmap = QPixmap()
+        pixmap.loadFromData(data, self.format)
+        pixmap.setDevicePixelRatio(dpr)
+        self.compressed_hits += 1
+        self._hot[index] = pixmap
+        self.hot_bytes += pixmap_cost(pixmap)
+        self._enforce_budget()
+        return pixmap
+
+    def _drop(self, index):
+        pixmap = self._hot.pop(index, None)
+        if pixmap is not None:
+            self.hot_bytes -= pixmap_cost(pixmap)
+        entry = self._compressed.pop(index, None)
+        if entry is not None:
+            self.compressed_bytes -= len(entry[0])
+
+    def _compress(self, pixmap):
+        data = QByteArray()
+        buffer = QBuffer(data)
+        buffer.open(QIODevice.WriteOnly)
+        pixmap.save(buffer, self.format, self.quality)
+        buffer.close()
+        return data.data()
+
+    def _enforce_budget(self):
+        # 保留最後一張（剛使用的）縮圖，避免預算過小時反覆降級
+        while self.hot_bytes > self.budget_bytes and len(self._hot) > 1:
+            index, pixmap = self._hot.popitem(last=False)
+            self.hot_bytes -= pixmap_cost(pixmap)
+            data = self._compress(pixmap)
+            self._compressed[index] = (data, pixmap.devicePixelRatio())
+            self.compressed_bytes += len(data)
+            self.demotions += 1
+
+        while self.compressed_bytes > self.compressed_budget_bytes and self._compressed:
+            index, (data, _) = self._compressed.popitem(last=False)
+            self.compressed_bytes -= len(data)
+            self._evicted.add(index)
+            self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.compressed_hits + self.misses
+        return {
+            'hits': self.hits,
+            'compressed_hits': self.compressed_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.compressed_hits) / lookups if lookups else 0.0,
+            'demotions': self.demotions,
+            'evictions': self.evictions,
+            'hot_count': len(self._hot),
+            'hot_bytes': self.hot_bytes,
+            'compressed_count': len(self._compressed),
+            'compressed_bytes': self.compressed_bytes,
+        }
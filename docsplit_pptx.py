@@ -0,0 +1,277 @@
+"""不經 PowerPoint 的 PPTX 子集匯出。
+
+PPTX 是 OPC（zip）套件：從 presentation.xml 的 sldIdLst 與對應的關聯移除未選
+投影片後，沿著各部件的 .rels 從根重新走訪，走不到的部件（被移除的投影片、
+其備忘稿、只有它們用到的圖片/圖表/內嵌物件）一併捨棄。未修改的 zip 成員直接
+複製原始壓縮資料（不解壓也不重新壓縮），保留原本的 CRC、大小、壓縮方式、時間、
+屬性與延伸欄位；寫入原始資料需要 zipfile 的內部欄位，缺少時改以公開 API 串流複製。
+本模組不依賴 Office 或 Qt。
+"""
+import os
+import re
+import shutil
+import struct
+import zipfile
+import posixpath
+import xml.etree.ElementTree as ET
+
+from docsplit_jobs import check
+
+
+CONTENT_TYPES = "[Content_Types].xml"
+PACKAGE_RELS = "_rels/.rels"
+REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+OFFICE_DOCUMENT = "/officeDocument"
+
+_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+_EXTRA_HEADER = struct.Struct("<2H")
+# ZIP64 延伸欄位記錄的是來源的大小與位移，寫出時由 zipfile 重新產生
+ZIP64_EXTRA_ID = 0x0001
+COPY_CHUNK_SIZE = 1024 * 1024
+
+_SLD_ID = re.compile(r'<(?:\w+:)?sldId\b[^>]*?/>')
+_CUSTOM_SHOW_SLIDE = re.compile(r'<(?:\w+:)?sld\b[^>]*?/>')
+_RELATIONSHIP = re.compile(r'<Relationship\b[^>]*?/>')
+_OVERRIDE = re.compile(r'<Override\b[^>]*?/>')
+_R_ID = re.compile(r'\b\w+:id="([^"]+)"')
+_ID = re.compile(r'\sid="([^"]+)"')
+_REL_ID = re.compile(r'\sId="([^"]+)"')
+_PART_NAME = re.compile(r'\sPartName="([^"]+)"')
+
+
+def rels_path(part):
+    """部件對應的關聯檔，例如 ppt/slides/slide1.xml -> ppt/slides/_rels/slide1.xml.rels"""
+    directory, name = posixpath.split(part)
+    return posixpath.join(directory, "_rels", name + ".rels")
+
+
+def read_rels(zf, part, names):
+    """回傳 [(Id, Type, 目標部件)]，略過外部連結"""
+    path = PACKAGE_RELS if part == "" else rels_path(part)
+    if path not in names:
+        return []
+    base = posixpath.dirname(part)
+    rels = []
+    for rel in ET.fromstring(zf.read(path)).iter(REL_NS + "Relationship"):
+        if rel.get("TargetMode") == "External":
+            continue
+        target = rel.get("Target")
+        if target.startswith("/"):
+            target = target.lstrip("/")
+        else:
+            target = posixpath.normpath(posixpath.join(base, target))
+        rels.append((rel.get("Id"), rel.get("Type"), target))
+    return rels
+
+
+def slide_rel_ids(presentation_xml):
+    """依簡報順序回傳投影片的 (sldId id, 關聯 Id)"""
+    slides = []
+    for element in _SLD_ID.findall(presentation_xml):
+        r_id = _R_ID.search(element)
+        if r_id:
+            slides.append((_ID.search(element).group(1), r_id.group(1)))
+    return slides
+
+
+def slide_count(path):
+    with zipfile.ZipFile(path) as zf:
+        names = set(zf.namelist())
+        presentation = _main_part(zf, names)
+        return len(slide_rel_ids(zf.read(presentation).decode("utf-8")))
+
+
+def _main_part(zf, names):
+    for _, rel_type, target in read_rels(zf, "", names):
+        if rel_type.endswith(OFFICE_DOCUMENT):
+            return target
+    raise ValueError("不是有效的 PPTX/Not a valid PPTX package")
+
+
+def _without(pattern, text, drop):
+    return pattern.sub(lambda m: "" if drop(m.group(0)) else m.group(0), text)
+
+
+def _reachable(zf, names, presentation, dropped_rel_ids):
+    """從套件根走訪關聯，回傳 (仍被引用的部件, {部件: 指向已移除投影片的關聯 Id})。
+
+    投影片之間的跳頁超連結也是關聯；指向已移除投影片的連結不走訪，
+    否則被移除的投影片會以孤立部件留在套件中。
+    """
+    dropped_slides = {target for rel_id, _, target in read_rels(zf, presentation, names)
+                      if rel_id in dropped_rel_ids}
+    keep = {CONTENT_TYPES, PACKAGE_RELS}
+    dangling = {}
+    stack = [""]
+    seen = {""}
+    while stack:
+        part = stack.pop()
+        if part:
+            keep.add(part)
+            if rels_path(part) in names:
+                keep.add(rels_path(part))
+        for rel_id, _, target in read_rels(zf, part, names):
+            if target in dropped_slides:
+                if part != presentation:
+                    dangling.setdefault(part, set()).add(rel_id)
+                continue
+            if target not in seen and target in names:
+                seen.add(target)
+                stack.append(target)
+    return keep, dangling
+
+
+def _drop_links(part_xml, rel_ids):
+    """移除引用指定關聯的超連結元素（例如 a:hlinkClick）"""
+    for rel_id in rel_ids:
+        part_xml = re.sub(r'<[\w:]+\b[^>]*?\b\w+:id="%s"[^>]*?/>' % re.escape(rel_id), "", part_xml)
+        # 非自閉合的元素保留，只清空關聯
+        part_xml = re.sub(r'(\b\w+:id=")%s(")' % re.escape(rel_id), r"\1\2", part_xml)
+    return part_xml
+
+
+def _without_rels(zf, path, rel_ids):
+    rels_xml = zf.read(path).decode("utf-8")
+    return _without(_RELATIONSHIP, rels_xml,
+                    lambda element: _REL_ID.search(element).group(1) in rel_ids).encode("utf-8")
+
+
+def _portable_extra(extra):
+    """去掉延伸欄位中的 ZIP64 記錄，保留其他記錄（例如時間戳記）"""
+    kept = []
+    while len(extra) >= _EXTRA_HEADER.size:
+        header_id, length = _EXTRA_HEADER.unpack_from(extra)
+        end = _EXTRA_HEADER.size + length
+        if header_id != ZIP64_EXTRA_ID:
+            kept.append(extra[:end])
+        extra = extra[end:]
+    return b"".join(kept)
+
+
+def _member_info(info):
+    copied = zipfile.ZipInfo(info.filename, info.date_time)
+    copied.compress_type = info.compress_type
+    copied.external_attr = info.external_attr
+    copied.create_system = info.create_system
+    copied.extra = _portable_extra(info.extra)
+    return copied
+
+
+def _can_copy_raw(zout):
+    """原始資料複製會用到 zipfile 的內部欄位，未來版本若移除則改走串流複製"""
+    return (hasattr(zipfile.ZipInfo, "FileHeader")
+            and all(hasattr(zout, attr) for attr in ("fp", "filelist", "NameToInfo", "start_dir", "_didModify")))
+
+
+def _copy_raw(source, zout, info):
+    """複製 zip 成員的原始壓縮資料，沿用來源的 CRC 與大小"""
+    source.seek(info.header_offset)
+    header = _LOCAL_HEADER.unpack(source.read(_LOCAL_HEADER.size))
+    if header[0] != LOCAL_HEADER_SIGNATURE:
+        raise zipfile.BadZipFile("Bad local file header: %r" % info.filename)
+    name_length, extra_length = header[-2], header[-1]
+    source.seek(name_length + extra_length, 1)
+
+    copied = _member_info(info)
+    copied.CRC = info.CRC
+    copied.compress_size = info.compress_size
+    copied.file_size = info.file_size
+    copied.header_offset = zout.fp.tell()
+    # 超過 ZIP64 上限的大小由 FileHeader 自動寫成 ZIP64 記錄
+    zout.fp.write(copied.FileHeader())
+    remaining = info.compress_size
+    while remaining:
+        chunk = source.read(min(remaining, COPY_CHUNK_SIZE))
+        if not chunk:
+            raise zipfile.BadZipFile("Truncated member: %r" % info.filename)
+        zout.fp.write(chunk)
+        remaining -= len(chunk)
+    zout.filelist.append(copied)
+    zout.NameToInfo[copied.filename] = copied
+    zout.start_dir = zout.fp.tell()
+    # 直接寫入底層檔案，需標記讓 close() 寫出中央目錄
+    zout._didModify = True
+
+
+def _stream_member(src, zout, info):
+    """以公開 API 串流解壓後用原本的壓縮方式寫出，大型媒體不必整個讀入記憶體"""
+    copied = _member_info(info)
+    # 預先給定大小，超過 ZIP64 上限的成員由 zipfile 自動寫出 ZIP64 標頭
+    copied.file_size = info.file_size
+    with src.open(info) as source, zout.open(copied, "w") as target:
+        shutil.copyfileobj(source, target, COPY_CHUNK_SIZE)
+
+
+def subset_pptx(src_path, indexes, out_path, token=None):
+    """只保留選定投影片（0 起算，維持原順序），回傳輸出的投影片數"""
+    with zipfile.ZipFile(src_path) as zf:
+        names = set(zf.namelist())
+        presentation = _main_part(zf, names)
+        presentation_rels = rels_path(presentation)
+        presentation_xml = zf.read(presentation).decode("utf-8")
+
+        slides = slide_rel_ids(presentation_xml)
+        wanted = {index for index in indexes if 0 <= index < len(slides)}
+        if not wanted:
+            raise ValueError("沒有可匯出的投影片/No slides to export")
+        dropped_ids = {slides[i][0] for i in range(len(slides)) if i not in wanted}
+        dropped_rel_ids = {slides[i][1] for i in range(len(slides)) if i not in wanted}
+
+        keep, dangling = _reachable(zf, names, presentation, dropped_rel_ids)
+        check(token)
+
+        # 主清單以關聯 Id 比對；章節（p14:sectionLst）只有 sldId id
+        def dropped_slide(element):
+            r_id = _R_ID.search(element)
+            if r_id:
+                return r_id.group(1) in dropped_rel_ids
+            slide_id = _ID.search(element)
+            return slide_id is not None and slide_id.group(1) in dropped_ids
+
+        def dropped_show_slide(element):
+            r_id = _R_ID.search(element)
+            return r_id is not None and r_id.group(1) in dropped_rel_ids
+
+        presentation_xml = _without(_SLD_ID, presentation_xml, dropped_slide)
+        # 自訂放映中的投影片
+        presentation_xml = _without(_CUSTOM_SHOW_SLIDE, presentation_xml, dropped_show_slide)
+
+        rewritten = {
+            presentation: presentation_xml.encode("utf-8"),
+            presentation_rels: _without_rels(zf, presentation_rels, dropped_rel_ids),
+        }
+        for part, rel_ids in dangling.items():
+            rewritten[part] = _drop_links(zf.read(part).decode("utf-8"), rel_ids).encode("utf-8")
+            rewritten[rels_path(part)] = _without_rels(zf, rels_path(part), rel_ids)
+
+        content_types = _without(
+            _OVERRIDE, zf.read(CONTENT_TYPES).decode("utf-8"),
+            lambda element: _PART_NAME.search(element).group(1).lstrip("/") not in keep)
+        rewritten[CONTENT_TYPES] = content_types.encode("utf-8")
+
+        temp_path = out_path + ".tmp"
+        try:
+            with open(src_path, "rb") as source, open(temp_path, "wb") as f, \
+                    zipfile.ZipFile(f, "w") as zout:
+                copy_raw = _can_copy_raw(zout)
+                for position, info in enumerate(zf.infolist()):
+                    if position % 64 == 0:
+                        check(token)
+                    name = info.filename
+                    if name not in keep:
+                        continue
+                    if name in rewritten:
+                        zout.writestr(zipfile.ZipInfo(name, info.date_time), rewritten[name],
+                                      compress_type=zipfile.ZIP_DEFLATED)
+                    # 加密成員（旗標位元 0）的原始資料不能換掉標頭直接搬移
+                    elif copy_raw and not info.flag_bits & 0x1:
+                        _copy_raw(source, zout, info)
+                    else:
+                        _stream_member(zf, zout, info)
+            os.replace(temp_path, out_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+    return len(wanted)
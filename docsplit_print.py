@@ -0,0 +1,106 @@
+"""記憶體內的列印流程。
+
+列印用文件（原始頁面或 N-up 拼版）只在記憶體中組成：直接列印時逐頁以
+指定 DPI 點陣化後畫到 QPrinter，整個過程可在背景執行緒進行；交給 PDF
+檢視器時只寫出一個檔案到列印暫存目錄，不在檢視器開啟後立即刪除，
+過期的檔案於下次列印時清理。
+"""
+import os
+import time
+import uuid
+
+import fitz
+from PySide6.QtCore import QRectF
+from PySide6.QtGui import QImage, QPageLayout, QPainter
+
+import docsplit_cache
+import docsplit_core
+import docsplit_impose
+import docsplit_trace
+from docsplit_jobs import check
+
+
+PRINT_DPI_CHOICES = (150, 300, 600)
+DEFAULT_PRINT_DPI = 300
+# 交給檢視器的檔案保留時間；檢視器可能在開啟後很久才讀取或列印
+SPOOL_MAX_AGE = 24 * 60 * 60
+
+
+def build_print_document(src_document, indexes, layout=None, token=None):
+    """在記憶體中組成列印用文件：layout 為 None 時為選定頁面，否則依版面拼版"""
+    if layout is None:
+        return docsplit_core.build_pdf(src_document, indexes, token, method='auto')
+    return docsplit_impose.impose(src_document, layout, indexes, token)
+
+
+def spool_dir():
+    return os.path.join(docsplit_cache.default_cache_dir(), 'print')
+
+
+def clean_spool(max_age=SPOOL_MAX_AGE):
+    """刪除過期的列印暫存檔"""
+    directory = spool_dir()
+    if not os.path.isdir(directory):
+        return
+    cutoff = time.time() - max_age
+    for entry in os.scandir(directory):
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def spool_pdf(print_document, token=None):
+    """將列印用文件寫成單一檔案交給檢視器，回傳路徑"""
+    clean_spool()
+    data, _ = docsplit_core.pdf_bytes(print_document, prune=True)
+    check(token)
+    os.makedirs(spool_dir(), exist_ok=True)
+    path = os.path.join(spool_dir(), f"print_{uuid.uuid4().hex}.pdf")
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+def print_pages(print_document, printer, dpi=DEFAULT_PRINT_DPI, token=None, progress=None):
+    """逐頁點陣化後畫到 printer，回傳列印的頁數。
+
+    QPainter 可在背景執行緒畫到 QPrinter；每頁的像素緩衝區畫完即釋放，
+    記憶體用量只有單頁大小。progress(已完成, 總頁數) 每頁呼叫一次。
+    """
+    total = print_document.page_count
+    if total == 0:
+        return 0
+    first = print_document[0].rect
+    printer.setPageOrientation(QPageLayout.Landscape if first.width > first.height
+                               else QPageLayout.Portrait)
+
+    painter = QPainter()
+    if not painter.begin(printer):
+        raise RuntimeError("無法開始列印/Unable to start printing")
+    try:
+        matrix = fitz.Matrix(dpi / 72, dpi / 72)
+        for number in range(total):
+            if token is not None and token.cancelled:
+                printer.abort()
+                check(token)
+            if number:
+                printer.newPage()
+            with docsplit_trace.span("print_page", page=number, dpi=dpi):
+                pix = print_document[number].get_pixmap(matrix=matrix, alpha=False)
+                image = QImage(pix.samples_mv, pix.width, pix.height, pix.stride, QImage.Format_RGB888)
+
+                # 置中並保持比例縮放到可列印範圍
+                target = QRectF(painter.viewport())
+                scale = min(target.width() / pix.width, target.height() / pix.height)
+                width, height = pix.width * scale, pix.height * scale
+                painter.drawImage(QRectF(target.x() + (target.width() - width) / 2,
+                                         target.y() + (target.height() - height) / 2,
+                                         width, height), image)
+                del image, pix
+            if progress:
+                progress(number + 1, total)
+    finally:
+        painter.end()
+    return total
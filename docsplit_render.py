@@ -0,0 +1,199 @@
+"""多行程 PDF 頁面渲染。
+
+頁面被切成連續的小區段分派給行程池，每個工作行程各自持有一個 fitz.open
+開啟的文件，因此不受 GIL 與 MuPDF 單一文件鎖的限制。結果以原始像素
+緩衝區回傳，可依頁碼順序或完成順序取得。本模組不依賴 Qt。
+
+文件以 MuPDF 的檔案串流開啟，只讀取用到的物件，數 GB 的檔案也能立即得知
+頁數與頁面大小。渲染大型檔案時定期縮小 MuPDF 的資源快取（解碼後的影像），
+掃描檔的影像幾乎不會重複使用，常駐記憶體因此維持在固定範圍內。
+"""
+import os
+from collections import namedtuple
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import fitz
+
+import docsplit_trace
+
+
+# 文件頁數少於此值時直接在目前行程渲染，避免行程啟動成本
+MIN_PARALLEL_PAGES = 32
+# 每個工作行程平均分到的區段數，越多負載越平均
+CHUNKS_PER_WORKER = 4
+MAX_CHUNK_PAGES = 16
+# 超過此大小的檔案視為大型檔案，每渲染 STORE_TRIM_PAGES 頁縮小一次 MuPDF 資源快取，
+# 只保留 STORE_KEEP_PERCENT%
+LARGE_FILE_BYTES = 256 * 1024 * 1024
+STORE_TRIM_PAGES = 16
+STORE_KEEP_PERCENT = 25
+
+# samples 為原始 RGB 像素；在目前行程渲染時為指向 pixmap 的 memoryview（不複製），
+# 此時 pixmap 欄位保存 fitz.Pixmap 以維持緩衝區存活，跨行程時為 None
+RenderedPage = namedtuple('RenderedPage', 'index width height stride samples png pixmap')
+
+# 工作行程內的文件控制代碼
+_worker_doc = None
+
+
+def default_workers():
+    """保留一個核心給介面執行緒"""
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def shard_pages(indexes, workers):
+    """將頁碼列表切成連續區段"""
+    indexes = list(indexes)
+    if not indexes:
+        return []
+    size = -(-len(indexes) // (workers * CHUNKS_PER_WORKER))
+    size = max(1, min(size, MAX_CHUNK_PAGES))
+    return [indexes[i:i + size] for i in range(0, len(indexes), size)]
+
+
+def is_large_file(path):
+    try:
+        return os.path.getsize(path) >= LARGE_FILE_BYTES
+    except OSError:
+        return False
+
+
+def trim_store():
+    """釋放 MuPDF 資源快取中較舊的項目"""
+    fitz.TOOLS.store_shrink(100 - STORE_KEEP_PERCENT)
+
+
+def page_sizes(doc):
+    """不渲染即讀出每頁的顯示大小（已套用 CropBox 與旋轉），回傳 [(寬, 高)]"""
+    sizes = []
+    for number in range(doc.page_count):
+        rect = doc.load_page(number).rect
+        sizes.append((rect.width, rect.height))
+    return sizes
+
+
+def fit_scale(rect, fit):
+    """計算讓頁面剛好放進 fit=(寬, 高) 像素框的縮放比例"""
+    return min(fit[0] / rect.width, fit[1] / rect.height)
+
+
+def render_page(page, scale=0.5, want_png=False, fit=None, copy=True):
+    """渲染單頁；指定 fit 時依目標像素框計算比例，直接產生最終大小的影像"""
+    if fit:
+        scale = fit_scale(page.rect, fit)
+    with docsplit_trace.span("render_page", page=page.number):
+        pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale), alpha=False)
+        png = pix.tobytes("png") if want_png else None
+    if copy:
+        return RenderedPage(page.number, pix.width, pix.height, pix.stride, pix.samples, png, None)
+    return RenderedPage(page.number, pix.width, pix.height, pix.stride, pix.samples_mv, png, pix)
+
+
+def _init_worker(path):
+    global _worker_doc
+    _worker_doc = fitz.open(path)
+
+
+def _render_chunk(indexes, scale, want_png, fit, trim=False):
+    pages = [render_page(_worker_doc.load_page(i), scale, want_png, fit) for i in indexes]
+    if trim:
+        trim_store()
+    return pages
+
+
+class PageRenderer:
+    """持有文件與（需要時才建立的）行程池，可重複渲染多批頁面。
+
+    指定 documents（docsplit_workspace.DocumentPool）時，在目前行程渲染的頁面
+    使用池中的文件，不另外開啟。
+    """
+
+    def __init__(self, path, workers=None, documents=None):
+        self.path = path
+        self.workers = workers or default_workers()
+        self.documents = documents
+        self._doc = None
+        self._pool = None
+        self._page_count = None
+        self.large = is_large_file(path)
+        # 在目前行程渲染的頁數，大型檔案據此定期縮小資源快取
+        self._rendered = 0
+
+    @property
+    def page_count(self):
+        if self._page_count is None:
+            with self._open() as doc:
+                self._page_count = doc.page_count
+        return self._page_count
+
+    def page_sizes(self):
+        with self._open() as doc:
+            return page_sizes(doc)
+
+    def _document(self):
+        if self._doc is None:
+            self._doc = fitz.open(self.path)
+        return self._doc
+
+    @contextmanager
+    def _open(self):
+        if self.documents is not None:
+            with self.documents.document(self.path) as doc:
+                yield doc
+        else:
+            yield self._document()
+
+    def render(self, indexes, scale=0.5, ordered=True, want_png=False, fit=None):
+        """渲染一批頁面，產生 RenderedPage。
+
+        ordered 為 False 時依完成順序產生結果；want_png 為 True 時同時在
+        工作行程內編碼 PNG（供快取使用）；fit 為 (寬, 高) 像素時忽略 scale。
+        在目前行程渲染的頁面不複製像素，samples 直接指向 fitz.Pixmap。
+        """
+        indexes = list(indexes)
+        if self.workers == 1 or len(indexes) < 2 or self.page_count < MIN_PARALLEL_PAGES:
+            with self._open() as doc:
+                for i in indexes:
+                    page = render_page(doc.load_page(i), scale, want_png, fit, copy=False)
+                    self._rendered += 1
+                    if self.large and self._rendered % STORE_TRIM_PAGES == 0:
+                        trim_store()
+                    yield page
+            return
+
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                             initializer=_init_worker, initargs=(self.path,))
+        futures = [self._pool.submit(_render_chunk, chunk, scale, want_png, fit, self.large)
+                   for chunk in shard_pages(indexes, self.workers)]
+        try:
+            if ordered:
+                for future in futures:
+                    yield from future.result()
+            else:
+                for future in as_completed(futures):
+                    yield from future.result()
+        finally:
+            # 呼叫端提前停止時，取消尚未開始的區段
+            for future in futures:
+                future.cancel()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+        if self._doc is not None:
+            self._doc.close()
+            self._doc = None
+
+
+def render_pages(path, indexes=None, scale=0.5, workers=None, ordered=True, want_png=False, fit=None):
+    """渲染指定頁面（預設為全部），產生 RenderedPage；workers 為 None 時使用 CPU 數減一"""
+    renderer = PageRenderer(path, workers)
+    try:
+        if indexes is None:
+            indexes = range(renderer.page_count)
+        yield from renderer.render(indexes, scale, ordered, want_png, fit)
+    finally:
+        renderer.close()
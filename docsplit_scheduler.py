@@ -0,0 +1,138 @@
+"""依捲動位置排序的縮圖渲染排程。
+
+可見頁面最優先，其次是可見範圍前後的預取視窗，其餘頁面以最低優先權
+在背景補齊（可關閉）。可見範圍改變時只重新排序新舊預取視窗內尚未開始的
+工作，背景頁面沿用排入時的距離；關閉背景補齊時，離開預取視窗的工作會被
+丟棄。本模組不依賴 Qt。
+"""
+import heapq
+import threading
+
+
+PRIORITY_VISIBLE = 0
+PRIORITY_PREFETCH = 1
+PRIORITY_BACKGROUND = 2
+
+DEFAULT_PREFETCH_PAGES = 32
+# 堆積中的過期項目超過有效項目加上此數時重建堆積
+COMPACT_SLACK = 1024
+
+
+class RenderScheduler:
+    """執行緒安全的渲染優先佇列"""
+
+    def __init__(self, page_count=0, prefetch_pages=DEFAULT_PREFETCH_PAGES, background=True):
+        self.page_count = 0
+        self.prefetch_pages = prefetch_pages
+        self.background = background
+        self._heap = []
+        # 尚未取出的頁面 -> 目前的排序鍵；堆積中鍵不符的項目已過期，取出時略過
+        self._keys = {}
+        self._taken = set()
+        self._viewport = (0, -1)
+        self._stopped = False
+        self._woken = False
+        self._cond = threading.Condition()
+        self.set_page_count(page_count)
+
+    @property
+    def pending_count(self):
+        with self._cond:
+            return len(self._keys)
+
+    def set_page_count(self, page_count):
+        with self._cond:
+            old, self.page_count = self.page_count, page_count
+            if page_count < old:
+                for index in range(page_count, old):
+                    self._keys.pop(index, None)
+                    self._taken.discard(index)
+            else:
+                for index in range(old, page_count):
+                    self._schedule(index)
+            self._cond.notify_all()
+
+    def update_viewport(self, first, last):
+        """可見範圍改變時重新排序新舊預取視窗內尚未開始的工作"""
+        with self._cond:
+            windows = [self._window()]
+            self._viewport = (first, last)
+            windows.append(self._window())
+            for start, end in windows:
+                for index in range(start, end + 1):
+                    if index not in self._taken:
+                        self._schedule(index)
+            self._compact()
+            self._cond.notify_all()
+
+    def priority(self, index):
+        """回傳 (優先等級, 與可見範圍的距離)，不需排程時回傳 None"""
+        first, last = self._viewport
+        if first <= index <= last:
+            return PRIORITY_VISIBLE, 0
+        distance = first - index if index < first else index - last
+        if distance <= self.prefetch_pages:
+            return PRIORITY_PREFETCH, distance
+        if self.background:
+            return PRIORITY_BACKGROUND, distance
+        return None
+
+    def _window(self):
+        """可見範圍加上預取頁數，即優先等級可能改變的頁碼範圍（含兩端）"""
+        first, last = self._viewport
+        return max(0, first - self.prefetch_pages), min(self.page_count - 1, last + self.prefetch_pages)
+
+    def _schedule(self, index):
+        key = self.priority(index)
+        if key is None:
+            self._keys.pop(index, None)
+        elif self._keys.get(index) != key:
+            self._keys[index] = key
+            heapq.heappush(self._heap, (key[0], key[1], index))
+
+    def _compact(self):
+        # 每次更新只留下與視窗大小相當的過期項目，偶爾重建的成本可攤銷
+        if len(self._heap) > 2 * len(self._keys) + COMPACT_SLACK:
+            self._heap = [(key[0], key[1], index) for index, key in self._keys.items()]
+            heapq.heapify(self._heap)
+
+    def take(self, max_count=1, block=True, timeout=None):
+        """取出最多 max_count 個最優先的頁面。
+
+        block 為 True 時等待直到有工作，最多等待 timeout 秒（None 為不限），
+        逾時或被 wake() 喚醒時回傳空列表；停止後回傳 None。
+        """
+        with self._cond:
+            if block:
+                self._cond.wait_for(lambda: self._stopped or self._keys or self._woken, timeout)
+            self._woken = False
+            if self._stopped:
+                return None
+            batch = []
+            while self._heap and len(batch) < max_count:
+                level, distance, index = heapq.heappop(self._heap)
+                if self._keys.get(index) != (level, distance):
+                    continue
+                del self._keys[index]
+                self._taken.add(index)
+                batch.append(index)
+            return batch
+
+    def requeue(self, index):
+        """讓已取出的頁面可以再次排程（例如渲染失敗或快取被淘汰）"""
+        with self._cond:
+            self._taken.discard(index)
+            if index < self.page_count:
+                self._schedule(index)
+                self._cond.notify_all()
+
+    def wake(self):
+        """讓等待中的 take() 立即返回，例如有新的來源文件要開啟"""
+        with self._cond:
+            self._woken = True
+            self._cond.notify_all()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
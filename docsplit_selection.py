@@ -0,0 +1,126 @@
+"""頁面選取模型。
+
+以每頁一個位元組的 bytearray 記錄選取狀態：切換為 O(1)，全選、反選、
+範圍選取與依序列舉都在 C 層完成。變動範圍會累積起來，由介面一次重繪。
+本模組不依賴 Qt。
+"""
+from itertools import compress
+
+
+_INVERT_TABLE = bytes([1, 0]) + bytes(254)
+
+
+class PageSelection:
+    """頁面選取集合，支援 Shift 範圍選取與頁碼範圍運算式"""
+
+    def __init__(self, page_count=0):
+        self._bits = bytearray(page_count)
+        self._count = 0
+        self.anchor = None
+        self._dirty = None
+
+    @property
+    def page_count(self):
+        return len(self._bits)
+
+    def __len__(self):
+        return self._count
+
+    def __bool__(self):
+        return self._count > 0
+
+    def __contains__(self, index):
+        return 0 <= index < len(self._bits) and self._bits[index] == 1
+
+    def __iter__(self):
+        """依頁碼順序列舉已選取的頁面"""
+        return compress(range(len(self._bits)), self._bits)
+
+    def indexes(self):
+        return list(self)
+
+    def resize(self, page_count):
+        """調整頁數；縮小時捨棄超出範圍的選取"""
+        if page_count < len(self._bits):
+            self._count -= self._bits.count(1, page_count)
+            del self._bits[page_count:]
+            if self.anchor is not None and self.anchor >= page_count:
+                self.anchor = None
+        else:
+            self._bits.extend(bytes(page_count - len(self._bits)))
+
+    def _mark(self, first, last):
+        if self._dirty is None:
+            self._dirty = (first, last)
+        else:
+            self._dirty = (min(first, self._dirty[0]), max(last, self._dirty[1]))
+
+    def take_dirty(self):
+        """取出自上次呼叫以來變動的 (第一頁, 最後一頁)，沒有變動時回傳 None"""
+        dirty, self._dirty = self._dirty, None
+        return dirty
+
+    def set(self, index, selected=True):
+        value = 1 if selected else 0
+        if self._bits[index] != value:
+            self._bits[index] = value
+            self._count += 1 if selected else -1
+            self._mark(index, index)
+
+    def toggle(self, index):
+        """切換單頁並設為範圍選取的起點，回傳新的狀態"""
+        selected = self._bits[index] == 0
+        self.set(index, selected)
+        self.anchor = index
+        return selected
+
+    def click(self, index, extend=False):
+        """一般點擊切換單頁；extend（Shift）時將起點到此頁設為與起點相同的狀態"""
+        if not extend or self.anchor is None:
+            return self.toggle(index)
+        selected = self._bits[self.anchor] == 1
+        self.set_range(min(self.anchor, index), max(self.anchor, index), selected)
+        return selected
+
+    def set_range(self, first, last, selected=True):
+        first = max(0, first)
+        last = min(len(self._bits) - 1, last)
+        if first > last:
+            return
+        before = self._bits.count(1, first, last + 1)
+        length = last - first + 1
+        self._bits[first:last + 1] = (b'\x01' if selected else b'\x00') * length
+        self._count += (length if selected else 0) - before
+        self._mark(first, last)
+
+    def select_all(self):
+        self.set_range(0, len(self._bits) - 1, True)
+
+    def clear(self):
+        self.set_range(0, len(self._bits) - 1, False)
+        self.anchor = None
+
+    def invert(self):
+        if not self._bits:
+            return
+        self._bits = bytearray(self._bits.translate(_INVERT_TABLE))
+        self._count = len(self._bits) - self._count
+        self._mark(0, len(self._bits) - 1)
+
+    def select_expression(self, spec, replace=True):
+        """依頁碼範圍運算式（1 起算，例如 "1-50,75,100-"）選取，格式錯誤時引發 ValueError"""
+        # docsplit_core 會載入 PyMuPDF，在此才匯入以免拖慢程式啟動
+        from docsplit_core import parse_page_ranges
+
+        indexes = parse_page_ranges(spec, len(self._bits))
+        if replace:
+            self.clear()
+        for index in indexes:
+            self.set(index, True)
+        return len(indexes)
+
+    def select_indexes(self, indexes, replace=True):
+        if replace:
+            self.clear()
+        for index in indexes:
+            self.set(index, True)
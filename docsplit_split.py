@@ -0,0 +1,358 @@
+"""依規則將一份 PDF 拆分為多個檔案。
+
+一次處理整份文件，依規則切成多個區段，每個區段存成一個 PDF：每 N 頁、
+每個第一層書籤、空白分隔頁（分隔頁本身不輸出），或頁碼範圍清單檔。
+區段由行程池平行寫出，每個工作行程只開啟並解析來源一次，之後處理的
+所有區段都共用這份已解析的文件；呼叫端的行程不執行任何 PyMuPDF 操作，
+介面執行緒因此不會因 GIL 停頓。空白頁偵測同樣在行程池中平行進行。
+本模組不依賴 Qt。
+
+    python docsplit_split.py statements.pdf --every 2 -o out
+    python docsplit_split.py book.pdf --outline -o chapters
+    python docsplit_split.py scans.pdf --blank -o batches
+    python docsplit_split.py run.pdf --ranges customers.txt -o out
+"""
+import os
+import re
+import sys
+import argparse
+import multiprocessing
+from time import perf_counter
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import docsplit_trace
+from docsplit_jobs import check
+
+
+EVERY = 'every'
+OUTLINE = 'outline'
+BLANK = 'blank'
+RANGES = 'ranges'
+RULES = (EVERY, OUTLINE, BLANK, RANGES)
+
+# 每次交給工作行程的頁數上限；越小進度與取消越即時，越大行程間往返越少
+CHUNK_PAGES = 200
+# 空白頁偵測：縮圖最長邊的像素數，低於 BLANK_LEVEL 的灰階像素視為墨跡，
+# 墨跡比例不超過 BLANK_INK_RATIO 即為空白頁（可容許掃描雜點）
+BLANK_FIT = 120
+BLANK_LEVEL = 200
+BLANK_INK_RATIO = 0.002
+# 輸出檔名中書籤標題或名稱的最大長度
+MAX_NAME_LENGTH = 80
+
+# kind 為 RULES 之一；value 為每幾頁（EVERY）、書籤層級（OUTLINE）或清單檔路徑（RANGES）
+SplitRule = namedtuple('SplitRule', 'kind value')
+# number 由 1 起算；title 為書籤標題或清單中的名稱，沒有時為空字串
+Section = namedtuple('Section', 'number title indexes')
+# outputs 為 [(輸出路徑, 頁數)]
+SplitResult = namedtuple('SplitResult', 'outputs pages size timings')
+
+
+def sections_every(page_count, n):
+    """每 n 頁一個區段"""
+    if n < 1:
+        raise ValueError(f"每份頁數須大於 0/Pages per file must be positive: {n}")
+    return [Section(number, '', list(range(start, min(start + n, page_count))))
+            for number, start in enumerate(range(0, page_count, n), 1)]
+
+
+def sections_from_outline(toc, page_count, level=1):
+    """在每個 level 層書籤的頁面開始新區段；第一個書籤之前的頁面自成一段。
+
+    toc 為 fitz.Document.get_toc() 的 [[層級, 標題, 頁碼（1 起算）], ...]。
+    """
+    starts = []
+    for entry_level, title, page in toc:
+        # 沒有目標頁（-1）或超出範圍的書籤略過；同一頁的多個書籤只取第一個
+        if entry_level != level or not 1 <= page <= page_count:
+            continue
+        if starts and page - 1 <= starts[-1][0]:
+            continue
+        starts.append((page - 1, title.strip()))
+    if not starts:
+        raise ValueError("文件沒有書籤/The document has no bookmarks")
+    if starts[0][0] > 0:
+        starts.insert(0, (0, ''))
+    ends = [start for start, _ in starts[1:]] + [page_count]
+    return [Section(number, title, list(range(start, end)))
+            for number, ((start, title), end) in enumerate(zip(starts, ends), 1)]
+
+
+def sections_between(blank, page_count):
+    """以空白頁分隔區段，空白頁本身不屬於任何區段；連續的空白頁視為一個分隔"""
+    sections = []
+    current = []
+    for index in range(page_count):
+        if index in blank:
+            if current:
+                sections.append(current)
+                current = []
+        else:
+            current.append(index)
+    if current:
+        sections.append(current)
+    if not sections:
+        raise ValueError("所有頁面都是空白頁/Every page is blank")
+    return [Section(number, '', indexes) for number, indexes in enumerate(sections, 1)]
+
+
+def read_range_list(path, page_count):
+    """讀取頁碼範圍清單：每行「名稱 頁碼範圍」或只有「頁碼範圍」，# 開頭為註解。
+
+    名稱可含空白（頁碼範圍為最後一個欄位），作為輸出檔名；同名的區段引發 ValueError。
+    """
+    from docsplit_core import parse_page_ranges
+    sections = []
+    names = set()
+    with open(path, encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            parts = line.rsplit(None, 1)
+            title, spec = (parts[0], parts[1]) if len(parts) == 2 else ('', parts[0])
+            try:
+                indexes = parse_page_ranges(spec, page_count)
+            except ValueError as e:
+                raise ValueError(f"{path}:{line_no}: {e}") from None
+            if not indexes:
+                continue
+            # 轉成檔名後為空的名稱改用「來源檔名_序號」，不會彼此衝突
+            key = safe_name(title).lower()
+            if key:
+                if key in names:
+                    raise ValueError(f"{path}:{line_no}: 名稱重複/Duplicate name: '{title}'")
+                names.add(key)
+            sections.append(Section(len(sections) + 1, title, indexes))
+    if not sections:
+        raise ValueError(f"{path}: 沒有頁碼範圍/No page ranges")
+    return sections
+
+
+def safe_name(text):
+    """將書籤標題或名稱轉為可用的檔名"""
+    name = re.sub(r'[<>:"/\\|?*\x00-\x1f]+', '_', text).strip(' .')
+    return name[:MAX_NAME_LENGTH].rstrip(' .')
+
+
+def output_name(stem, section, total, rule_kind):
+    """區段的輸出檔名：清單中有名稱時直接使用，否則為「來源檔名_序號[_書籤標題]」"""
+    title = safe_name(section.title)
+    if rule_kind == RANGES and title:
+        return f"{title}.pdf"
+    name = f"{stem}_{section.number:0{len(str(total))}d}"
+    if title:
+        name += f"_{title}"
+    return f"{name}.pdf"
+
+
+def is_blank_page(page, fit=BLANK_FIT, level=BLANK_LEVEL, ink_ratio=BLANK_INK_RATIO):
+    """沒有文字且縮小後幾乎沒有墨跡的頁面"""
+    import fitz
+    if page.get_text("text").strip():
+        return False
+    rect = page.rect
+    if rect.is_empty:
+        return True
+    scale = fit / max(rect.width, rect.height)
+    pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale), colorspace=fitz.csGRAY, alpha=False)
+    samples = pix.samples
+    # 刪除淺色像素後剩下的位元組數即為墨跡像素數
+    ink = len(samples.translate(None, bytes(range(level, 256))))
+    return ink <= len(samples) * ink_ratio
+
+
+# 工作行程中已開啟的來源文件
+_source = None
+
+
+def _init_worker(path):
+    global _source
+    import fitz
+    _source = fitz.open(path)
+
+
+def _source_info(level):
+    """回傳 (頁數, 書籤)；書籤只含 level 層以內"""
+    return _source.page_count, [entry for entry in _source.get_toc(simple=True) if entry[0] <= level]
+
+
+def _find_blank(indexes):
+    return [i for i in indexes if is_blank_page(_source.load_page(i))]
+
+
+def _write_sections(jobs, preset):
+    """寫出 [(輸出路徑, 頁碼列表)]，回傳 [(輸出路徑, 頁數, 位元組數)]"""
+    import docsplit_core
+    written = []
+    for out_path, indexes in jobs:
+        new_pdf = docsplit_core.build_pdf(_source, indexes, method='runs')
+        try:
+            docsplit_core.save_pdf(new_pdf, out_path, preset)
+        finally:
+            new_pdf.close()
+        written.append((out_path, len(indexes), os.path.getsize(out_path)))
+    return written
+
+
+def _chunk_pages(indexes, pages=CHUNK_PAGES):
+    return [indexes[i:i + pages] for i in range(0, len(indexes), pages)]
+
+
+def _chunk_jobs(jobs, pages=CHUNK_PAGES):
+    """將 [(輸出路徑, 頁碼列表)] 依頁數分組，每組約 pages 頁"""
+    chunks = []
+    size = 0
+    for job in jobs:
+        if not chunks or size >= pages:
+            chunks.append([])
+            size = 0
+        chunks[-1].append(job)
+        size += len(job[1])
+    return chunks
+
+
+def _run_chunks(pool, func, chunks, token, on_done):
+    """平行執行 func(chunk)，每完成一組呼叫 on_done(chunk, 結果)；取消時放棄尚未開始的組"""
+    pending = {pool.submit(func, *chunk): chunk for chunk in chunks}
+    try:
+        while pending:
+            done, _ = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            check(token)
+            for future in done:
+                on_done(pending.pop(future), future.result())
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def plan_sections(rule, page_count, toc, find_blank=None):
+    """依規則回傳區段列表；BLANK 需要 find_blank() -> 空白頁碼集合"""
+    if rule.kind == EVERY:
+        return sections_every(page_count, int(rule.value))
+    if rule.kind == OUTLINE:
+        return sections_from_outline(toc, page_count, int(rule.value or 1))
+    if rule.kind == BLANK:
+        return sections_between(find_blank(), page_count)
+    if rule.kind == RANGES:
+        return read_range_list(rule.value, page_count)
+    raise ValueError(f"不支援的拆分規則/Unsupported split rule: {rule.kind}")
+
+
+def split_pdf(src_path, rule, out_dir, preset='fast', workers=None, token=None, progress=None,
+              on_write=None, stem=None, on_plan=None):
+    """依 SplitRule 將 src_path 拆分為多個 PDF 寫到 out_dir，回傳 SplitResult。
+
+    區段由 workers 個工作行程平行寫出（至少一個，呼叫端不開啟文件）；on_plan(總頁數)
+    在區段規劃完成後呼叫一次（空白分隔頁與清單未列出的頁不計入），progress(頁數)
+    在每組區段寫完後呼叫，on_write(累計位元組) 回報已寫出的大小。取消時已寫完的
+    檔案保留，尚未開始的區段不再寫出。輸出檔名以 stem 開頭，預設為來源檔名。
+    """
+    timings = {}
+    start = perf_counter()
+    stem = stem or os.path.splitext(os.path.basename(src_path))[0]
+    workers = max(1, workers or os.cpu_count() or 1)
+    os.makedirs(out_dir, exist_ok=True)
+    # 與匯出行程相同使用 spawn，在介面行程中呼叫時不複製 Qt 狀態
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=_init_worker, initargs=(os.path.abspath(src_path),))
+    try:
+        check(token)
+        page_count, toc = pool.submit(_source_info, int(rule.value or 1) if rule.kind == OUTLINE else 1).result()
+
+        def find_blank():
+            blank = set()
+            with docsplit_trace.span("split.find_blank", pages=page_count):
+                _run_chunks(pool, _find_blank, [(chunk,) for chunk in _chunk_pages(list(range(page_count)))],
+                            token, lambda chunk, found: blank.update(found))
+            return blank
+
+        sections = plan_sections(rule, page_count, toc, find_blank)
+        timings['plan'] = perf_counter() - start
+        if on_plan is not None:
+            on_plan(sum(len(section.indexes) for section in sections))
+
+        jobs = [(os.path.join(out_dir, output_name(stem, section, len(sections), rule.kind)), section.indexes)
+                for section in sections]
+        outputs = []
+        total = [0, 0]
+
+        def written(_chunk, results):
+            pages = sum(result[1] for result in results)
+            outputs.extend((path, count) for path, count, _size in results)
+            total[0] += pages
+            total[1] += sum(result[2] for result in results)
+            if progress is not None:
+                progress(pages)
+            if on_write is not None:
+                on_write(total[1])
+
+        start = perf_counter()
+        with docsplit_trace.span("split.write", files=len(jobs), workers=workers):
+            _run_chunks(pool, _write_sections, [(chunk, preset) for chunk in _chunk_jobs(jobs)],
+                        token, written)
+        timings['write'] = perf_counter() - start
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+    # 依區段順序回報，與完成順序無關
+    order = {path: n for n, (path, _) in enumerate(jobs)}
+    outputs.sort(key=lambda output: order[output[0]])
+    return SplitResult(outputs, total[0], total[1], timings)
+
+
+def parse_rule(args):
+    if args.every is not None:
+        return SplitRule(EVERY, args.every)
+    if args.outline is not None:
+        return SplitRule(OUTLINE, args.outline)
+    if args.blank:
+        return SplitRule(BLANK, None)
+    return SplitRule(RANGES, args.ranges)
+
+
+def build_arg_parser():
+    import docsplit_core
+    parser = argparse.ArgumentParser(
+        prog="docsplit-split",
+        description="依規則將 PDF 拆分為多個檔案/Split a PDF into many files by rule",
+    )
+    parser.add_argument('input', help="來源 PDF/Input PDF")
+    rules = parser.add_mutually_exclusive_group(required=True)
+    rules.add_argument('--every', type=int, metavar='N', help="每 N 頁一個檔案/One file every N pages")
+    rules.add_argument('--outline', type=int, nargs='?', const=1, metavar='LEVEL',
+                       help="每個書籤一個檔案，預設第一層/One file per bookmark (default: top level)")
+    rules.add_argument('--blank', action='store_true',
+                       help="以空白頁分隔，空白頁不輸出/Split at blank separator pages")
+    rules.add_argument('--ranges', metavar='FILE',
+                       help="頁碼範圍清單，每行「[名稱] 頁碼範圍」/Range list with '[name] spec' per line")
+    parser.add_argument('-o', '--output-dir', default='.', help="輸出資料夾/Output directory")
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="平行行程數，預設為 CPU 數/Worker processes (default: CPU count)")
+    parser.add_argument('--preset', choices=sorted(docsplit_core.SAVE_PRESETS), default=docsplit_core.DEFAULT_PRESET,
+                        help=f"PDF 存檔選項/PDF save preset ({', '.join(docsplit_core.SAVE_PRESETS)})")
+    parser.add_argument('--timings', action='store_true',
+                        help="顯示各階段耗時與輸出大小/Print per-stage timings and output size")
+    return parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    try:
+        result = split_pdf(args.input, parse_rule(args), args.output_dir, args.preset, args.workers)
+    except (OSError, ValueError) as e:
+        print(f"FAIL {args.input}: {e}", file=sys.stderr)
+        return 1
+    for path, pages in result.outputs:
+        print(f"OK   {path} ({pages} pages)")
+    if args.timings:
+        parts = [f"{name}={seconds * 1000:.1f}ms" for name, seconds in result.timings.items()]
+        print(f"     files={len(result.outputs)} pages={result.pages} "
+              f"size={result.size / 1024:.1f}KB {' '.join(parts)}")
+    return 0
+
+
+if __name__ == "__main__":
+    # 打包成執行檔時，行程池的子行程由此進入
+    multiprocessing.freeze_support()
+    sys.exit(main())
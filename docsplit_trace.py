@@ -0,0 +1,226 @@
+"""階段層級的效能追蹤。
+
+以 span 包住開檔、逐頁渲染、訊號傳遞、縮圖版面更新、匯出與拼版等階段，
+事件可匯出為 Chrome trace-event JSON（chrome://tracing 或 Perfetto 開啟）。
+停用時（預設）每個追蹤點只做一次旗標檢查並回傳共用的空物件，可留在正式版中。
+設定環境變數 DOCSPLIT_TRACE=1 或呼叫 enable() 啟用。本模組不依賴 Qt。
+
+在其他行程（例如渲染行程池）內發生的事件不會被收集。
+"""
+import os
+import sys
+import json
+import time
+import functools
+import threading
+from collections import deque
+
+
+# 最多保留的事件數，超過時捨棄最舊的事件
+MAX_EVENTS = 200000
+# 計算速率時保留的完成時間數
+RATE_SAMPLES = 2048
+
+# 由環境變數啟用時整個工作階段都追蹤，關閉效能面板也不停止
+ENV_ENABLED = os.environ.get('DOCSPLIT_TRACE', '') not in ('', '0')
+_enabled = ENV_ENABLED
+_events = deque(maxlen=MAX_EVENTS)
+_completed = {}
+_completed_lock = threading.Lock()
+_thread_names = {}
+_pid = os.getpid()
+_clock = time.perf_counter
+
+
+def enabled():
+    return _enabled
+
+
+def enable(on=True):
+    global _enabled
+    _enabled = on
+
+
+def disable():
+    """停止記錄新事件（已記錄的事件保留可匯出）；DOCSPLIT_TRACE 啟用時不停止"""
+    if not ENV_ENABLED:
+        enable(False)
+
+
+def clear():
+    _events.clear()
+    with _completed_lock:
+        _completed.clear()
+
+
+def _now_us():
+    return _clock() * 1e6
+
+
+def _tid():
+    tid = threading.get_ident()
+    if tid not in _thread_names:
+        _thread_names[tid] = threading.current_thread().name
+    return tid
+
+
+def _finished(name, end):
+    with _completed_lock:
+        times = _completed.get(name)
+        if times is None:
+            times = _completed[name] = deque(maxlen=RATE_SAMPLES)
+        times.append(end)
+
+
+class _NullSpan:
+    """停用時共用的空 span"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('name', 'cat', 'args', 'start')
+
+    def __init__(self, name, cat, args):
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = _now_us()
+        return self
+
+    def __exit__(self, *exc):
+        end = _now_us()
+        event = {'name': self.name, 'cat': self.cat, 'ph': 'X', 'ts': self.start,
+                 'dur': end - self.start, 'pid': _pid, 'tid': _tid()}
+        if self.args:
+            event['args'] = self.args
+        _events.append(event)
+        _finished(self.name, end)
+        return False
+
+
+def span(name, cat='docsplit', **args):
+    """with span("render_page", page=3): ... 記錄一段耗時"""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, cat, args)
+
+
+def traced(name=None, cat='docsplit'):
+    """函式裝飾器版本的 span；停用時只多一次旗標檢查"""
+    def decorate(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*a, **kw):
+            if not _enabled:
+                return func(*a, **kw)
+            with _Span(label, cat, None):
+                return func(*a, **kw)
+
+        return wrapper
+    return decorate
+
+
+def begin_async(name, key, cat='docsplit'):
+    """開始跨執行緒的非同步事件（例如訊號從發出到被處理），以 key 配對"""
+    if _enabled:
+        _events.append({'name': name, 'cat': cat, 'ph': 'b', 'id': str(key), 'ts': _now_us(),
+                        'pid': _pid, 'tid': _tid()})
+
+
+def end_async(name, key, cat='docsplit'):
+    if _enabled:
+        end = _now_us()
+        _events.append({'name': name, 'cat': cat, 'ph': 'e', 'id': str(key), 'ts': end,
+                        'pid': _pid, 'tid': _tid()})
+        _finished(name, end)
+
+
+def counter(name, **values):
+    """記錄計數器（佇列深度、記憶體用量等）"""
+    if _enabled:
+        _events.append({'name': name, 'ph': 'C', 'ts': _now_us(), 'pid': _pid, 'tid': _tid(),
+                        'args': values})
+
+
+def instant(name, cat='docsplit', **args):
+    if _enabled:
+        _events.append({'name': name, 'cat': cat, 'ph': 'i', 's': 't', 'ts': _now_us(),
+                        'pid': _pid, 'tid': _tid(), 'args': args})
+
+
+def rate(name, window=2.0):
+    """最近 window 秒內每秒完成的 name 事件數"""
+    cutoff = _now_us() - window * 1e6
+    with _completed_lock:
+        times = _completed.get(name)
+        if not times:
+            return 0.0
+        recent = sum(1 for t in reversed(times) if t >= cutoff)
+    return recent / window
+
+
+def events():
+    return list(_events)
+
+
+def export_chrome(path):
+    """寫出 Chrome trace-event JSON，回傳事件數"""
+    trace_events = events()
+    metadata = [{'name': 'process_name', 'ph': 'M', 'pid': _pid, 'args': {'name': 'DocSplit'}}]
+    metadata += [{'name': 'thread_name', 'ph': 'M', 'pid': _pid, 'tid': tid, 'args': {'name': name}}
+                 for tid, name in list(_thread_names.items())]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': metadata + trace_events, 'displayTimeUnit': 'ms'}, f)
+    return len(trace_events)
+
+
+def memory_usage():
+    """目前行程的常駐記憶體（位元組），無法取得時回傳 None（可改用 peak_memory_usage）"""
+    if sys.platform.startswith('linux'):
+        try:
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError, IndexError):
+            return None
+    if os.name == 'nt':
+        import ctypes
+        from ctypes import wintypes
+
+        class Counters(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                        ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                        ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+        counters = Counters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize
+    return None
+
+
+def peak_memory_usage():
+    """行程啟動以來的常駐記憶體峰值（位元組），無法取得時回傳 None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 的 ru_maxrss 單位為位元組，Linux 與 BSD 為 KB
+    return peak if sys.platform == 'darwin' else peak * 1024
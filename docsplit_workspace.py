@@ -0,0 +1,209 @@
+"""多文件工作區與文件控制代碼池。
+
+工作區將多份 PDF（Word 文件為轉出的預覽 PDF）的頁面依加入順序接成一個
+連續的頁面列表，縮圖格與選取都使用全域頁碼，匯出與列印時再換回
+(文件, 頁碼)。DocumentPool 是有上限的 LRU 已開啟文件池：重複匯出、列印
+同一份文件時不必重新解析。本模組不依賴 Qt，PyMuPDF 在第一次開啟文件時才載入。
+"""
+import os
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+# 同時保持開啟的文件數，足以容納常見的 10-30 份來源文件；
+# 使用中的文件不會被關閉，可能暫時超過
+DEFAULT_POOL_SIZE = 32
+
+
+def _stamp(path):
+    """檔案修改時間與大小；改變時重新開啟"""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class _PooledDocument:
+    __slots__ = ('document', 'stamp', 'lock', 'users', 'retired')
+
+    def __init__(self, document, stamp):
+        self.document = document
+        self.stamp = stamp
+        # fitz.Document 不能同時由多個執行緒使用
+        self.lock = threading.RLock()
+        self.users = 0
+        self.retired = False
+
+
+class DocumentPool:
+    """有上限的 LRU 已開啟文件池，可由任何執行緒使用"""
+
+    def __init__(self, capacity=DEFAULT_POOL_SIZE):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.opens = 0
+        self.hits = 0
+
+    @staticmethod
+    def _key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    @contextmanager
+    def document(self, path):
+        """with pool.document(path) as doc: ... 期間獨占該文件"""
+        entry = self._checkout(path)
+        try:
+            with entry.lock:
+                yield entry.document
+        finally:
+            self._checkin(entry)
+
+    def _checkout(self, path):
+        key = self._key(path)
+        stamp = _stamp(key)
+        with self._lock:
+            entry = self._claim(key, stamp)
+        if entry is not None:
+            return entry
+        # 開啟大型或網路上的檔案可能很久，不持有池的鎖，其他文件照常取用
+        import fitz
+        document = fitz.open(key)
+        with self._lock:
+            entry = self._claim(key, stamp)
+            if entry is None:
+                entry = _PooledDocument(document, stamp)
+                self._entries[key] = entry
+                self.opens += 1
+                entry.users += 1
+                self._evict()
+                return entry
+        # 其他執行緒同時開啟了同一份文件，使用先放入池中的
+        document.close()
+        return entry
+
+    def _claim(self, key, stamp):
+        """取用池中未過期的文件，沒有時回傳 None；須持有 _lock"""
+        entry = self._entries.get(key)
+        if entry is not None and entry.stamp != stamp:
+            # 檔案已被修改，舊的控制代碼在不再使用後關閉
+            self._retire(key, entry)
+            entry = None
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        entry.users += 1
+        self._evict()
+        return entry
+
+    def _checkin(self, entry):
+        with self._lock:
+            entry.users -= 1
+            if entry.retired and entry.users == 0:
+                entry.document.close()
+            self._evict()
+
+    def _retire(self, key, entry):
+        del self._entries[key]
+        entry.retired = True
+        if entry.users == 0:
+            entry.document.close()
+
+    def _evict(self):
+        if len(self._entries) <= self.capacity:
+            return
+        # 由最久未使用的閒置文件開始關閉
+        for key in [key for key, entry in self._entries.items() if entry.users == 0]:
+            if len(self._entries) <= self.capacity:
+                break
+            self._retire(key, self._entries[key])
+
+    def discard(self, path):
+        """關閉指定文件（使用中時在使用結束後關閉）"""
+        with self._lock:
+            key = self._key(path)
+            if key in self._entries:
+                self._retire(key, self._entries[key])
+
+    def close(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._retire(key, self._entries[key])
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {'open': len(self._entries), 'opens': self.opens, 'hits': self.hits}
+
+
+class WorkspaceDocument:
+    """工作區中的一份文件：path 為來源檔，pdf_path 為渲染與匯出使用的 PDF"""
+
+    __slots__ = ('path', 'pdf_path', 'page_count', 'offset')
+
+    def __init__(self, path, pdf_path, page_count, offset):
+        self.path = path
+        self.pdf_path = pdf_path
+        self.page_count = page_count
+        self.offset = offset
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+
+class Workspace:
+    """依加入順序排列的文件；全域頁碼 = 文件的起始頁碼 + 文件內頁碼"""
+
+    def __init__(self):
+        self.documents = []
+        self._offsets = []
+
+    def __len__(self):
+        return len(self.documents)
+
+    def __iter__(self):
+        return iter(self.documents)
+
+    @property
+    def page_count(self):
+        if not self.documents:
+            return 0
+        last = self.documents[-1]
+        return last.offset + last.page_count
+
+    def clear(self):
+        self.documents = []
+        self._offsets = []
+
+    def add(self, path, page_count, pdf_path=None):
+        """加入文件（接在最後），回傳 WorkspaceDocument"""
+        document = WorkspaceDocument(path, pdf_path or path, page_count, self.page_count)
+        self.documents.append(document)
+        self._offsets.append(document.offset)
+        return document
+
+    def locate(self, index):
+        """全域頁碼 -> (WorkspaceDocument, 文件內頁碼)"""
+        if not 0 <= index < self.page_count:
+            raise IndexError(index)
+        document = self.documents[bisect_right(self._offsets, index) - 1]
+        return document, index - document.offset
+
+    def parts(self, indexes):
+        """將全域頁碼依序分組為 [(文件的 PDF 路徑, 文件內頁碼列表)]，相鄰同一文件的頁面合併"""
+        parts = []
+        current = None
+        for index in indexes:
+            document, page = self.locate(index)
+            if document is not current:
+                current = document
+                parts.append((document.pdf_path, []))
+            parts[-1][1].append(page)
+        return parts
+
+    def page_label(self, index):
+        document, page = self.locate(index)
+        return f"{document.name} · {page + 1}"
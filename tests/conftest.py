@@ -0,0 +1,37 @@
+"""測試共用設定：匯入專案模組，並以 benchmarks/synth.py 產生小型合成文件"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import fitz
+
+import synth
+
+
+def page_labels(doc):
+    """合成文件每頁開頭的「Page N」，用來確認輸出的頁面與順序"""
+    return [page.get_text().split('\n', 1)[0] for page in doc]
+
+
+@pytest.fixture(scope='session')
+def text_pdf(tmp_path_factory):
+    """20 頁的合成文字 PDF"""
+    return synth.make_pdf(str(tmp_path_factory.mktemp('synth') / 'text_20.pdf'), 20, 'text')
+
+
+@pytest.fixture(scope='session')
+def image_pdf(tmp_path_factory):
+    """8 頁的合成影像 PDF，每頁引用 4 張共用影像"""
+    return synth.make_pdf(str(tmp_path_factory.mktemp('synth') / 'image_8.pdf'), 8, 'image')
+
+
+@pytest.fixture
+def text_doc(text_pdf):
+    doc = fitz.open(text_pdf)
+    yield doc
+    doc.close()
@@ -0,0 +1,57 @@
+import os
+
+import docsplit_cache
+from docsplit_cache import ThumbnailCache
+
+
+def age(path, seconds):
+    st = os.stat(path)
+    os.utime(path, (st.st_atime - seconds, st.st_mtime - seconds))
+
+
+def test_meta_files_count_toward_limit_and_are_evicted(tmp_path):
+    cache = ThumbnailCache(str(tmp_path), max_bytes=10_000)
+    cache.put_meta('aa11', {'page_count': 3, 'padding': 'x' * 4000})
+    age(cache._meta_path('aa11'), 100)
+    assert cache._scan_size() > 4000
+
+    # 新寫入的縮圖超過上限時，最久未使用的文件資料一併淘汰
+    for page in range(3):
+        cache.put('bb22', page, 'thumb', b'\0' * 2500)
+    assert cache.get_meta('aa11') is None
+    assert all(cache.get('bb22', page, 'thumb') is not None for page in range(3))
+    assert cache._scan_size() <= cache.max_bytes * docsplit_cache.EVICT_TARGET_RATIO
+
+
+def test_get_meta_marks_meta_as_recently_used(tmp_path):
+    cache = ThumbnailCache(str(tmp_path), max_bytes=10_000)
+    cache.put('aa11', 0, 'thumb', b'\0' * 3000)
+    cache.put_meta('aa11', {'page_count': 1})
+    for path in (cache._entry_path('aa11', 0, 'thumb'), cache._meta_path('aa11')):
+        age(path, 100)
+    assert cache.get_meta('aa11') == {'page_count': 1}
+
+    for page in range(3):
+        cache.put('bb22', page, 'thumb', b'\0' * 2500)
+    # 最久未使用的縮圖先被淘汰，剛讀取的文件資料保留
+    assert cache.get('aa11', 0, 'thumb') is None
+    assert cache.get_meta('aa11') == {'page_count': 1}
+
+
+def test_clear_removes_meta(tmp_path):
+    cache = ThumbnailCache(str(tmp_path))
+    cache.put('aa11', 0, 'thumb', b'png')
+    cache.put_meta('aa11', {'page_count': 1})
+    cache.clear()
+    assert cache.get_meta('aa11') is None
+    assert cache._scan_size() == 0
+
+
+def test_overwriting_an_entry_does_not_grow_the_total(tmp_path):
+    cache = ThumbnailCache(str(tmp_path), max_bytes=10000)
+    cache.put('ab' * 20, 0, 1, b'x' * 300)
+    cache.put_meta('ab' * 20, {'page_count': 1})
+    for _ in range(5):
+        cache.put('ab' * 20, 0, 1, b'y' * 400)
+        cache.put_meta('ab' * 20, {'page_count': 1})
+    assert cache._total_bytes == cache._scan_size()
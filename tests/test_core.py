@@ -0,0 +1,138 @@
+import os
+
+import fitz
+import pytest
+
+import docsplit_core
+from docsplit_core import parse_page_ranges, coalesce_runs, build_pdf
+from conftest import page_labels
+
+
+@pytest.mark.parametrize('spec, expected', [
+    ("1", [0]),
+    ("1-3,5", [0, 1, 2, 4]),
+    ("3-5, 1 ,4", [0, 2, 3, 4]),
+    ("8-", [7, 8, 9]),
+    ("-2", [0, 1]),
+    ("..2", [0, 1]),
+    (":2", [0, 1]),
+    ("9..", [8, 9]),
+    ("2..3,5:6", [1, 2, 4, 5]),
+    ("all", list(range(10))),
+    ("*", list(range(10))),
+    ("1,,2,", [0, 1]),
+])
+def test_parse_page_ranges(spec, expected):
+    assert parse_page_ranges(spec, 10) == expected
+
+
+def test_parse_page_ranges_without_page_count():
+    assert parse_page_ranges("2-4,7") == [1, 2, 3, 6]
+    for spec in ("5-", "all"):
+        with pytest.raises(ValueError, match="page count"):
+            parse_page_ranges(spec)
+
+
+@pytest.mark.parametrize('spec', ["abc", "1-x", "x-3", "0", "5-3", "1.5"])
+def test_parse_page_ranges_invalid(spec):
+    # 錯誤訊息使用本模組的說明，而不是 int() 的原始訊息
+    with pytest.raises(ValueError, match="Invalid page range: '%s'" % spec):
+        parse_page_ranges(spec, 10)
+
+
+def test_parse_page_ranges_out_of_range():
+    with pytest.raises(ValueError, match="Page out of range: '11'"):
+        parse_page_ranges("1,11", 10)
+
+
+@pytest.mark.parametrize('indexes, expected', [
+    ([], []),
+    ([4], [(4, 4)]),
+    ([1, 2, 3, 7, 8], [(1, 3), (7, 8)]),
+    ([9, 3, 1, 2, 2], [(1, 3), (9, 9)]),
+    ([0, 2, 4], [(0, 0), (2, 2), (4, 4)]),
+])
+def test_coalesce_runs(indexes, expected):
+    assert coalesce_runs(indexes) == expected
+
+
+@pytest.mark.parametrize('method', ['runs', 'select', 'auto'])
+def test_build_pdf_keeps_selected_pages_in_order(text_doc, method):
+    new_pdf = build_pdf(text_doc, [12, 0, 1, 2, 19, 12], method=method)
+    try:
+        assert new_pdf.page_count == 5
+        assert page_labels(new_pdf) == ["Page 1", "Page 2", "Page 3", "Page 13", "Page 20"]
+    finally:
+        new_pdf.close()
+
+
+def test_build_pdf_reports_progress(text_doc):
+    done = []
+    build_pdf(text_doc, [0, 1, 5, 6, 7], method='runs', progress=done.append).close()
+    assert done == [2, 3]
+
+
+def test_shared_images_copied_once_across_runs(image_pdf):
+    # 隔頁選取時，各區段共用的影像只複製一份
+    with fitz.open(image_pdf) as src:
+        new_pdf = build_pdf(src, [0, 2, 4, 6], method='runs')
+    try:
+        images = {item[0] for page in new_pdf for item in page.get_images()}
+        assert len(images) == 8
+        assert sum(1 for xref in range(1, new_pdf.xref_length())
+                   if new_pdf.xref_get_key(xref, 'Subtype')[1] == '/Image') == 8
+    finally:
+        new_pdf.close()
+
+
+def test_rebuild_pdf_writes_output(text_pdf, tmp_path):
+    out_path = str(tmp_path / 'out.pdf')
+    result = docsplit_core.rebuild_pdf(text_pdf, [4, 5, 6, 10], out_path, preset='compact')
+    assert result.pages == 4
+    assert result.size == os.path.getsize(out_path)
+    with fitz.open(out_path) as doc:
+        assert page_labels(doc) == ["Page 5", "Page 6", "Page 7", "Page 11"]
+
+
+@pytest.mark.parametrize('preset', sorted(docsplit_core.SAVE_PRESETS))
+def test_every_offered_preset_saves_without_fallback(text_pdf, tmp_path, preset):
+    # 只提供目前 MuPDF 能寫出的存檔選項（新版已不支援線性化）
+    result = docsplit_core.rebuild_pdf(text_pdf, [0, 1], str(tmp_path / 'out.pdf'), preset=preset)
+    assert result.pages == 2
+    assert result.notes == []
+
+
+def test_output_paths_disambiguate_same_stem():
+    paths = docsplit_core._output_paths(
+        [os.path.join('a', 'x.pdf'), os.path.join('b', 'x.pdf'), 'y.pdf', os.path.join('a', 'x.pdf')],
+        'out', '_s')
+    assert paths == [os.path.join('out', name) for name in ('a_x_s.pdf', 'b_x_s.pdf', 'y_s.pdf', 'a_x_2_s.pdf')]
+
+
+def test_cli_exit_codes(text_pdf, tmp_path, capsys):
+    out_dir = str(tmp_path / 'out')
+    assert docsplit_core.main([text_pdf, '--pages', '..3,20', '-o', out_dir, '-j', '1']) == 0
+    with fitz.open(os.path.join(out_dir, 'text_20_selected.pdf')) as doc:
+        assert page_labels(doc) == ["Page 1", "Page 2", "Page 3", "Page 20"]
+    assert docsplit_core.main([text_pdf, '--pages=-2', '-o', out_dir, '-j', '1', '--suffix', '_head']) == 0
+    with fitz.open(os.path.join(out_dir, 'text_20_head.pdf')) as doc:
+        assert doc.page_count == 2
+
+    # 頁碼無效或檔案不存在時回報失敗並回傳 1
+    assert docsplit_core.main([text_pdf, '--pages', 'abc', '-o', out_dir, '-j', '1']) == 1
+    assert docsplit_core.main([str(tmp_path / 'missing.pdf'), '--pages', '1', '-o', out_dir, '-j', '1']) == 1
+    assert "Invalid page range: 'abc'" in capsys.readouterr().err
+
+    # 用法錯誤由 argparse 以 2 結束
+    for argv in ([text_pdf, '-o', out_dir], ['-o', out_dir]):
+        with pytest.raises(SystemExit) as exc:
+            docsplit_core.main(argv)
+        assert exc.value.code == 2
+
+
+def test_cli_job_list(text_pdf, tmp_path):
+    list_path = tmp_path / 'jobs.txt'
+    list_path.write_text(f"# 註解\n{text_pdf} 1-2\n{text_pdf} 5\n", encoding='utf-8')
+    out_dir = str(tmp_path / 'out')
+    assert docsplit_core.main(['--list', str(list_path), '-o', out_dir, '-j', '1']) == 0
+    assert sorted(os.listdir(out_dir)) == ['synth0_text_20_2_selected.pdf', 'synth0_text_20_selected.pdf']
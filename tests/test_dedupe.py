@@ -0,0 +1,85 @@
+import random
+
+import numpy as np
+import pytest
+
+import docsplit_dedupe
+from docsplit_dedupe import duplicate_of, duplicate_groups, unique_pages, dhash, DEFAULT_THRESHOLD
+
+
+def flip_bits(value, count, rng):
+    for bit in rng.sample(range(64), count):
+        value ^= 1 << bit
+    return value
+
+
+def brute_force(hashes, known, threshold):
+    """逐對比較的參考實作"""
+    result = []
+    for i, value in enumerate(hashes):
+        match = -1
+        if known[i]:
+            for j in range(i):
+                if known[j] and bin(value ^ hashes[j]).count('1') <= threshold:
+                    match = j
+                    break
+        result.append(match)
+    return result
+
+
+def test_identical_near_and_distinct_pages():
+    rng = random.Random(1)
+    base = rng.getrandbits(64)
+    other = base ^ ((1 << 64) - 1)
+    hashes = [
+        base,
+        flip_bits(base, DEFAULT_THRESHOLD, rng),       # 門檻內的近似頁
+        other,
+        base,                                          # 完全相同
+        flip_bits(base, DEFAULT_THRESHOLD + 1, rng),   # 超過門檻
+        other,
+    ]
+    duplicates = duplicate_of(hashes)
+    assert duplicates.tolist() == [-1, 0, -1, 0, -1, 2]
+    assert unique_pages(duplicates) == [0, 2, 4]
+    assert duplicate_groups(duplicates).tolist() == [0, 0, 2, 0, -1, 2]
+
+
+def test_unknown_pages_are_skipped():
+    hashes = np.array([7, 7, 7, 7], dtype=np.uint64)
+    known = np.array([False, True, False, True])
+    assert duplicate_of(hashes, known).tolist() == [-1, -1, -1, 1]
+
+
+def test_chained_duplicates_group_to_earliest_page():
+    # 1 與 0 相近、2 與 1 相近但與 0 相距較遠：三頁仍屬同一組
+    hashes = [0, 0b111, 0b111111]
+    duplicates = duplicate_of(hashes, threshold=3)
+    assert duplicates.tolist() == [-1, 0, 1]
+    assert duplicate_groups(duplicates).tolist() == [0, 0, 0]
+
+
+@pytest.mark.parametrize('block_rows', [4, 7, docsplit_dedupe.BLOCK_ROWS])
+def test_matches_across_block_boundaries(monkeypatch, block_rows):
+    monkeypatch.setattr(docsplit_dedupe, 'BLOCK_ROWS', block_rows)
+    rng = random.Random(block_rows)
+    originals = [rng.getrandbits(64) for _ in range(40)]
+    # 超過一個區塊的頁數；複本散布在之後的區塊中
+    count = max(3 * block_rows, 1200) if block_rows == docsplit_dedupe.BLOCK_ROWS else 50
+    hashes = list(originals)
+    while len(hashes) < count:
+        hashes.append(flip_bits(rng.choice(originals), rng.randrange(DEFAULT_THRESHOLD + 3), rng))
+    known = [rng.random() > 0.1 for _ in hashes]
+
+    expected = brute_force(hashes, known, DEFAULT_THRESHOLD)
+    assert duplicate_of(np.array(hashes, dtype=np.uint64), np.array(known)).tolist() == expected
+    assert any(i >= block_rows and 0 <= j < block_rows for i, j in enumerate(expected))
+
+
+def test_dhash_tolerates_small_changes():
+    rng = np.random.default_rng(0)
+    page = (np.linspace(0, 255, 200)[None, :] * np.ones((150, 1))).astype(np.uint8)
+    noisy = np.clip(page.astype(int) + rng.integers(-3, 4, page.shape), 0, 255).astype(np.uint8)
+    flipped = page[:, ::-1]
+    assert bin(dhash(page) ^ dhash(noisy)).count('1') <= DEFAULT_THRESHOLD
+    assert bin(dhash(page) ^ dhash(flipped)).count('1') > DEFAULT_THRESHOLD
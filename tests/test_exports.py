@@ -0,0 +1,38 @@
+import threading
+
+import pytest
+
+import docsplit_exports
+from docsplit_exports import ExportQueue
+
+
+def test_failed_job_keeps_traceback_instead_of_printing(capsys):
+    queue = ExportQueue()
+
+    def fail(job):
+        raise ValueError("disk full")
+
+    job = queue.submit('pdf', 'out.pdf', fail)
+    queue.shutdown(cancel=False)
+    assert job.state == docsplit_exports.FAILED
+    assert job.error == "disk full"
+    assert "Traceback" in job.details and "ValueError: disk full" in job.details
+    assert capsys.readouterr() == ('', '')
+
+
+def test_jobs_report_result_and_reject_busy_output():
+    queue = ExportQueue(workers=1)
+    release = threading.Event()
+
+    def wait(job):
+        release.wait(5)
+        return 'done'
+
+    first = queue.submit('pdf', 'a', wait, out_path='a.pdf')
+    # 同一個輸出檔已有未完成的工作
+    with pytest.raises(ValueError):
+        queue.submit('pdf', 'a', wait, out_path='a.pdf')
+    release.set()
+    queue.shutdown(cancel=False)
+    assert first.state == docsplit_exports.DONE and first.result == 'done'
+    assert first.details is None
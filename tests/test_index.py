@@ -0,0 +1,74 @@
+import fitz
+import pytest
+
+from docsplit_index import PageIndex, MIN_TRIGRAM_CHARS
+
+PAGES = [
+    "Quarterly revenue forecast for Q3",
+    "Budget review and appendix",
+    "Q3 budget summary",
+    "會議紀錄：營收與預算",
+    "100% done_now",
+]
+
+
+def make_pdf(path, texts):
+    doc = fitz.open()
+    for text in texts:
+        # 內建的繁體中文字型，讓中文文字可以擷取
+        doc.new_page().insert_text((40, 60), text, fontname='china-t', fontsize=11)
+    doc.save(path)
+    doc.close()
+    return path
+
+
+@pytest.fixture
+def index(tmp_path):
+    pdf_path = make_pdf(str(tmp_path / 'doc.pdf'), PAGES)
+    with PageIndex(str(tmp_path / 'pages.sqlite')) as page_index:
+        assert page_index.update('doc', pdf_path, 'hash-1') == len(PAGES)
+        yield page_index
+
+
+def test_long_terms_use_full_text_index(index):
+    assert index.search('doc', 'budget') == [1, 2]
+    assert index.search('doc', 'BUDGET summary') == [2]
+    assert index.search('doc', 'revenue') == [0]
+    assert index.search('doc', 'missing') == []
+
+
+def test_short_terms_fall_back_to_like(index):
+    assert len('Q3') < MIN_TRIGRAM_CHARS
+    assert index.search('doc', 'q3') == [0, 2]
+    # 短詞與長詞同時出現時兩種條件都要符合
+    assert index.search('doc', 'Q3 budget') == [2]
+    assert index.search('doc', 'Q3 appendix') == []
+
+
+def test_cjk_substrings(index):
+    assert index.search('doc', '營收') == [3]
+    assert index.search('doc', '會議紀錄') == [3]
+    assert index.search('doc', '預算 營收') == [3]
+
+
+def test_like_wildcards_are_literal(index):
+    assert index.search('doc', '0%') == [4]
+    assert index.search('doc', 'e_n') == [4]
+    assert index.search('doc', '%') == [4]
+
+
+def test_empty_query_and_unknown_document(index):
+    assert index.search('doc', '   ') == []
+    assert index.search('other', 'budget') == []
+
+
+def test_update_only_extracts_changed_pages(index, tmp_path):
+    assert index.update('doc', str(tmp_path / 'doc.pdf'), 'hash-1') == 0
+    changed = PAGES[:2] + ["Forecast only"]
+    pdf_path = make_pdf(str(tmp_path / 'doc2.pdf'), changed)
+    # 前兩頁內容相同不必重新擷取；多出的頁面被移除
+    assert index.update('doc', pdf_path, 'hash-2') == 1
+    assert index.indexed_pages('doc') == 3
+    assert index.search('doc', 'forecast') == [0, 2]
+    assert index.search('doc', 'Q3') == [0]
+    assert index.search('doc', '營收') == []
@@ -0,0 +1,46 @@
+import zipfile
+
+import pytest
+from pptx import Presentation
+
+import docsplit_pptx
+import synth
+
+
+@pytest.fixture(scope='module')
+def image_pptx(tmp_path_factory):
+    """6 張投影片的合成 PPTX，每張有兩張圖片"""
+    return synth.make_pptx(str(tmp_path_factory.mktemp('synth') / 'image_6.pptx'), 6, 'image')
+
+
+def kept_members(src_path, out_path):
+    with zipfile.ZipFile(src_path) as src, zipfile.ZipFile(out_path) as out:
+        assert out.testzip() is None
+        source = {info.filename: info for info in src.infolist()}
+        return [(source[info.filename], info) for info in out.infolist()]
+
+
+def test_kept_members_are_copied_without_recompression(image_pptx, tmp_path):
+    out_path = str(tmp_path / 'subset.pptx')
+    assert docsplit_pptx.subset_pptx(image_pptx, [0, 2], out_path) == 2
+    assert docsplit_pptx.slide_count(out_path) == 2
+    pairs = kept_members(image_pptx, out_path)
+    media = [(old, new) for old, new in pairs if new.filename.startswith('ppt/media/')]
+    assert media
+    for old, new in media:
+        assert (new.CRC, new.compress_size, new.file_size) == (old.CRC, old.compress_size, old.file_size)
+        assert new.compress_type == old.compress_type
+    # 未選的投影片部件一併捨棄
+    names = {new.filename for _, new in pairs}
+    assert 'ppt/slides/slide1.xml' in names and 'ppt/slides/slide2.xml' not in names
+    assert len(Presentation(out_path).slides) == 2
+
+
+def test_stream_fallback_writes_the_same_members(image_pptx, tmp_path, monkeypatch):
+    monkeypatch.setattr(docsplit_pptx, '_can_copy_raw', lambda zout: False)
+    out_path = str(tmp_path / 'subset.pptx')
+    docsplit_pptx.subset_pptx(image_pptx, [1], out_path)
+    for old, new in kept_members(image_pptx, out_path):
+        if new.filename.startswith('ppt/media/'):
+            assert (new.CRC, new.file_size) == (old.CRC, old.file_size)
+    assert docsplit_pptx.slide_count(out_path) == 1
@@ -0,0 +1,131 @@
+import pytest
+
+from docsplit_selection import PageSelection
+from docsplit_workspace import Workspace
+
+
+def test_click_toggles_and_tracks_dirty_range():
+    selection = PageSelection(20)
+    assert selection.click(5) is True
+    assert selection.click(9) is True
+    # 兩次點擊之間未取出的變動範圍合併為一段
+    assert selection.take_dirty() == (5, 9)
+    assert selection.take_dirty() is None
+
+    assert selection.click(5) is False
+    assert selection.indexes() == [9]
+    assert len(selection) == 1
+    assert selection.take_dirty() == (5, 5)
+
+
+def test_shift_click_extends_from_anchor_with_anchor_state():
+    selection = PageSelection(20)
+    selection.click(3)
+    selection.take_dirty()
+    selection.click(7, extend=True)
+    assert selection.indexes() == [3, 4, 5, 6, 7]
+    assert selection.take_dirty() == (3, 7)
+
+    # 反方向延伸；起點不變
+    selection.click(1, extend=True)
+    assert selection.indexes() == [1, 2, 3, 4, 5, 6, 7]
+    assert selection.anchor == 3
+
+    # 起點取消選取後，Shift 範圍設為未選取
+    selection.click(5)
+    selection.take_dirty()
+    selection.click(2, extend=True)
+    assert selection.indexes() == [1, 6, 7]
+    assert selection.take_dirty() == (2, 5)
+    assert len(selection) == 3
+
+
+def test_shift_click_without_anchor_toggles():
+    selection = PageSelection(10)
+    assert selection.click(4, extend=True) is True
+    assert selection.indexes() == [4]
+    assert selection.anchor == 4
+
+
+def test_ctrl_toggling_moves_anchor():
+    # Ctrl 點擊即一般點擊：切換單頁並成為新的範圍起點
+    selection = PageSelection(30)
+    for index in (2, 10, 20):
+        selection.click(index)
+    selection.click(10)
+    assert selection.indexes() == [2, 20]
+    assert selection.anchor == 10
+    assert selection.take_dirty() == (2, 20)
+    selection.click(12, extend=True)
+    assert selection.indexes() == [2, 20]
+    assert selection.take_dirty() == (10, 12)
+
+
+@pytest.mark.parametrize('page_count', [1, 7, 13, 1001])
+def test_invert_on_length_not_multiple_of_eight(page_count):
+    selection = PageSelection(page_count)
+    chosen = set(range(0, page_count, 3))
+    selection.select_indexes(chosen)
+    selection.take_dirty()
+    selection.invert()
+    assert selection.indexes() == [i for i in range(page_count) if i not in chosen]
+    assert len(selection) == page_count - len(chosen)
+    assert selection.page_count == page_count
+    assert selection.take_dirty() == (0, page_count - 1)
+    selection.invert()
+    assert selection.indexes() == sorted(chosen)
+
+
+def test_invert_empty_selection_is_noop():
+    selection = PageSelection(0)
+    selection.invert()
+    assert selection.take_dirty() is None
+    assert not selection
+
+
+def test_set_range_clamps_and_counts():
+    selection = PageSelection(10)
+    selection.set_range(-5, 3)
+    selection.set_range(2, 50)
+    assert len(selection) == 10
+    selection.set_range(4, 5, False)
+    assert len(selection) == 8
+    assert 4 not in selection and 6 in selection and 10 not in selection
+
+
+def test_resize_drops_selection_and_anchor_past_end():
+    selection = PageSelection(10)
+    selection.click(8)
+    selection.click(2)
+    selection.click(9)
+    selection.resize(5)
+    assert selection.indexes() == [2]
+    assert len(selection) == 1
+    assert selection.anchor is None
+    selection.resize(12)
+    assert selection.page_count == 12
+    assert selection.indexes() == [2]
+
+
+def test_select_expression_across_workspace_documents():
+    # 工作區中的頁碼運算式使用全域頁碼，選取結果可跨越文件邊界
+    workspace = Workspace()
+    workspace.add('alpha.pdf', 40)
+    workspace.add('beta.pdf', 5)
+    workspace.add('gamma.pdf', 60)
+    selection = PageSelection(workspace.page_count)
+
+    assert selection.select_expression("39-47, 105") == 10
+    assert workspace.parts(selection.indexes()) == [
+        ('alpha.pdf', [38, 39]),
+        ('beta.pdf', [0, 1, 2, 3, 4]),
+        ('gamma.pdf', [0, 1, 59]),
+    ]
+    assert [workspace.page_label(i) for i in (39, 40, 45)] == ["alpha.pdf · 40", "beta.pdf · 1", "gamma.pdf · 1"]
+
+    # 不取代時加入現有選取；開放區間以工作區總頁數為終點
+    assert selection.select_expression("100-", replace=False) == 6
+    assert workspace.parts(selection.indexes())[-1] == ('gamma.pdf', [0, 1, 54, 55, 56, 57, 58, 59])
+
+    with pytest.raises(ValueError):
+        selection.select_expression("106")
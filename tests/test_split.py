@@ -0,0 +1,42 @@
+import os
+
+import fitz
+import pytest
+
+import docsplit_split
+from docsplit_split import SplitRule, read_range_list, output_name
+
+
+def test_titles_that_sanitize_to_nothing_are_not_duplicates(tmp_path):
+    ranges = tmp_path / 'ranges.txt'
+    ranges.write_text("... 1-2\n. . 3\nIntro 4\n", encoding='utf-8')
+    sections = read_range_list(str(ranges), 10)
+    assert [section.indexes for section in sections] == [[0, 1], [2], [3]]
+    names = [output_name('doc', section, len(sections), docsplit_split.RANGES) for section in sections]
+    assert names == ['doc_1.pdf', 'doc_2.pdf', 'Intro.pdf']
+
+
+def test_sanitized_duplicate_names_are_rejected(tmp_path):
+    ranges = tmp_path / 'ranges.txt'
+    ranges.write_text("Part:1 1\npart_1 2\n", encoding='utf-8')
+    with pytest.raises(ValueError, match='Duplicate name'):
+        read_range_list(str(ranges), 10)
+
+
+def test_blank_separator_progress_reaches_the_planned_total(tmp_path):
+    src_path = str(tmp_path / 'separated.pdf')
+    doc = fitz.open()
+    for number in range(7):
+        page = doc.new_page()
+        # 第 3、6 頁為空白分隔頁
+        if number not in (2, 5):
+            page.insert_text((72, 72), f"Page {number + 1}")
+    doc.save(src_path)
+    doc.close()
+
+    planned, done = [], []
+    result = docsplit_split.split_pdf(src_path, SplitRule(docsplit_split.BLANK, None), str(tmp_path / 'out'),
+                                      workers=1, progress=done.append, on_plan=planned.append)
+    assert [pages for _, pages in result.outputs] == [2, 2, 1]
+    assert planned == [5] and sum(done) == 5 == result.pages
+    assert all(os.path.exists(path) for path, _ in result.outputs)
@@ -0,0 +1,53 @@
+import sys
+
+import docsplit_trace
+
+
+def test_traced_keeps_function_metadata_and_records_span():
+    @docsplit_trace.traced()
+    def render(page):
+        """渲染一頁"""
+        return page * 2
+
+    assert render.__name__ == 'render' and render.__doc__ == "渲染一頁"
+    assert render.__wrapped__(3) == 6
+    docsplit_trace.clear()
+    docsplit_trace.enable()
+    try:
+        assert render(2) == 4
+    finally:
+        docsplit_trace.enable(False)
+    names = [event['name'] for event in docsplit_trace.events()]
+    assert names == [render.__qualname__]
+
+
+def test_memory_usage_is_current_and_not_above_peak():
+    current = docsplit_trace.memory_usage()
+    peak = docsplit_trace.peak_memory_usage()
+    if sys.platform.startswith('linux'):
+        assert current and peak
+        # 峰值不會小於目前用量，確認兩者單位一致
+        assert current <= peak * 1.05
+
+
+def test_disable_stops_recording_unless_enabled_by_environment(monkeypatch):
+    monkeypatch.setattr(docsplit_trace, 'ENV_ENABLED', False)
+    docsplit_trace.clear()
+    # 顯示效能面板
+    docsplit_trace.enable()
+    with docsplit_trace.span('shown'):
+        pass
+    # 關閉效能面板
+    docsplit_trace.disable()
+    assert not docsplit_trace.enabled()
+    with docsplit_trace.span('hidden'):
+        pass
+    assert [event['name'] for event in docsplit_trace.events()] == ['shown']
+
+    monkeypatch.setattr(docsplit_trace, 'ENV_ENABLED', True)
+    docsplit_trace.enable()
+    try:
+        docsplit_trace.disable()
+        assert docsplit_trace.enabled()
+    finally:
+        docsplit_trace.enable(False)